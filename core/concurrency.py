@@ -0,0 +1,62 @@
+"""
+Concurrency
+
+This file defines helpers of async views, which serve I/O bound
+endpoints without holding a worker under the ASGI entry point.
+Under WSGI, the same views run synchronously as usual.
+
+Blocking work that does not touch the database, such as calls to
+upstream APIs and password hashing of sign-up, runs in a bounded thread pool,
+so slow upstreams can neither block the event loop
+nor grow threads without limit.
+Sign-in hashes in the thread pool of Django's `acheck_password()`.
+Database access goes through the async ORM or `sync_to_async()`.
+
+"""
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.OFFLOAD_THREADS,
+    thread_name_prefix="offload",
+)
+
+
+def offload(func):
+    """Wrap blocking `func` to be awaited on the bounded thread pool."""
+
+    return sync_to_async(func, thread_sensitive=False, executor=executor)
+
+
+def read_json(request):
+    """Read JSON object or form body of a request.
+
+    Returns None when the body cannot be parsed.
+
+    """
+
+    if request.content_type != "application/json":
+        return request.POST.dict()
+
+    try:
+        data = json.loads(request.body or b"{}")
+    except ValueError:
+        return None
+
+    return data if isinstance(data, dict) else None
+
+
+def respond(data, status=200):
+    """Respond with JSON, keeping non-ASCII characters as DRF does."""
+
+    return JsonResponse(
+        data,
+        status=status,
+        safe=False,
+        json_dumps_params={"ensure_ascii": False},
+    )
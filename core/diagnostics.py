@@ -0,0 +1,360 @@
+"""
+Diagnostics
+
+This file defines tracemalloc based memory diagnostics.
+State lives in the worker process, so each gunicorn worker
+keeps its own snapshots and per-endpoint peaks.
+
+Tracing is disabled unless `MEMORY_DIAGNOSTICS` is set,
+or it is started explicitly through the diagnostics endpoint.
+
+"""
+
+import threading
+import time
+import tracemalloc
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+# Frames that only describe the tracer itself
+IGNORED_FILES = [
+    tracemalloc.__file__,
+    "<frozen importlib._bootstrap>",
+    "<frozen importlib._bootstrap_external>",
+    "<unknown>",
+]
+
+MAX_SNAPSHOTS = 10
+
+_lock = threading.Lock()
+_snapshots = []
+_endpoints = {}
+
+# Requests being profiled, and number of the latest one
+_active = 0
+_started = 0
+
+
+def start(frames=None):
+    """Start tracing allocations if it is not running yet."""
+
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames or settings.MEMORY_DIAGNOSTICS_FRAMES)
+
+
+def stop():
+    """Stop tracing and drop every collected data."""
+
+    tracemalloc.stop()
+    reset()
+
+
+def reset():
+    """Drop snapshots and per-endpoint peaks."""
+
+    with _lock:
+        _snapshots.clear()
+        _endpoints.clear()
+
+
+def take_snapshot(label=None):
+    """Take a filtered snapshot and keep it for later comparison.
+
+    The first snapshot is kept as a baseline, and only the latest
+    `MAX_SNAPSHOTS` snapshots are kept after it.
+
+    """
+
+    if not tracemalloc.is_tracing():
+        raise RuntimeError("Memory tracing is not running.")
+
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.Filter(False, pattern) for pattern in IGNORED_FILES]
+    )
+    entry = {
+        "label": label or f"snapshot-{len(_snapshots)}",
+        "taken_at": time.time(),
+        "size": sum(stat.size for stat in snapshot.statistics("filename")),
+        "snapshot": snapshot,
+    }
+
+    with _lock:
+        _snapshots.append(entry)
+        if len(_snapshots) > MAX_SNAPSHOTS:
+            del _snapshots[1]
+
+    return entry
+
+
+def compare(old, new, key="lineno", limit=20):
+    """Return top allocation sites grown between two snapshots."""
+
+    stats = new.compare_to(old, key)
+
+    return [
+        {
+            "site": format_trace(stat.traceback, key),
+            "size": stat.size,
+            "size_diff": stat.size_diff,
+            "count": stat.count,
+            "count_diff": stat.count_diff,
+        }
+        for stat in stats[:limit]
+    ]
+
+
+def top(snapshot, key="lineno", limit=20):
+    """Return the largest allocation sites of a single snapshot."""
+
+    return [
+        {
+            "site": format_trace(stat.traceback, key),
+            "size": stat.size,
+            "count": stat.count,
+        }
+        for stat in snapshot.statistics(key)[:limit]
+    ]
+
+
+def format_trace(traceback, key):
+    if key == "traceback":
+        return [f"{frame.filename}:{frame.lineno}" for frame in traceback]
+
+    frame = traceback[0]
+    if key == "filename":
+        return frame.filename
+
+    return f"{frame.filename}:{frame.lineno}"
+
+
+def record_endpoint(name, peak):
+    """Record peak memory usage of a single request."""
+
+    with _lock:
+        stats = _endpoints.setdefault(
+            name,
+            {"count": 0, "peak": 0, "last": 0, "total": 0},
+        )
+        stats["count"] += 1
+        stats["peak"] = max(stats["peak"], peak)
+        stats["last"] = peak
+        stats["total"] += peak
+
+
+def enter_request():
+    """Count a request in, returning its number and whether it is alone."""
+
+    global _active, _started
+
+    with _lock:
+        _active += 1
+        _started += 1
+
+        return _started, _active == 1
+
+
+def exit_request(number, alone):
+    """Count a request out, returning whether no other request overlapped it."""
+
+    global _active
+
+    with _lock:
+        _active -= 1
+
+        return alone and _started == number
+
+
+def endpoint_stats():
+    with _lock:
+        return sorted(
+            (
+                {
+                    "endpoint": name,
+                    "count": stats["count"],
+                    "peak": stats["peak"],
+                    "last": stats["last"],
+                    "mean": stats["total"] // stats["count"],
+                }
+                for name, stats in _endpoints.items()
+            ),
+            key=lambda item: item["peak"],
+            reverse=True,
+        )
+
+
+def report(key="lineno", limit=20):
+    """Summarize tracing state, snapshot diff and endpoint peaks.
+
+    Allocation sites are compared between the baseline snapshot
+    and the latest one, so growth over the worker lifetime shows up.
+
+    """
+
+    tracing = tracemalloc.is_tracing()
+    current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+
+    with _lock:
+        snapshots = list(_snapshots)
+
+    data = {
+        "tracing": tracing,
+        "current": current,
+        "peak": peak,
+        "snapshots": [
+            {
+                "label": entry["label"],
+                "taken_at": entry["taken_at"],
+                "size": entry["size"],
+            }
+            for entry in snapshots
+        ],
+        "endpoints": endpoint_stats(),
+        "top": [],
+        "diff": [],
+    }
+
+    if snapshots:
+        data["top"] = top(snapshots[-1]["snapshot"], key, limit)
+    if len(snapshots) > 1:
+        data["diff"] = compare(
+            snapshots[0]["snapshot"],
+            snapshots[-1]["snapshot"],
+            key,
+            limit,
+        )
+
+    return data
+
+
+class MemoryProfileMiddleware:
+    """Record peak traced memory per endpoint.
+
+    Peaks are measured by resetting the tracemalloc peak before each
+    request. The peak is global to the process, so requests overlapping
+    another, on threads or async tasks, are not recorded; profile with
+    one request at a time, such as with `memprofile` or a sync worker.
+    Nothing is done while tracing is not running.
+
+    The middleware is async capable, so async views are not pushed
+    back into the single sync thread under ASGI.
+
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+        if settings.MEMORY_DIAGNOSTICS:
+            start()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        if not tracemalloc.is_tracing():
+            return self.get_response(request)
+
+        number, alone = enter_request()
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+
+        try:
+            response = self.get_response(request)
+        finally:
+            alone = exit_request(number, alone)
+
+        if alone:
+            self.record(request, baseline)
+
+        return response
+
+    async def __acall__(self, request):
+        if not tracemalloc.is_tracing():
+            return await self.get_response(request)
+
+        number, alone = enter_request()
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+
+        try:
+            response = await self.get_response(request)
+        finally:
+            alone = exit_request(number, alone)
+
+        if alone:
+            self.record(request, baseline)
+
+        return response
+
+    def record(self, request, baseline):
+        _, peak = tracemalloc.get_traced_memory()
+        if (match := request.resolver_match) is not None:
+            route = match.route.replace("^", "").replace("$", "")
+            name = f"{request.method} /{route}"
+        else:
+            name = f"{request.method} {request.path}"
+        record_endpoint(name, peak - baseline)
+
+
+class MemoryDiagnosticsView(APIView):
+    """Staff-only view over memory diagnostics of the serving worker.
+
+    GET returns the current report, and POST runs one of the actions
+    `start`, `snapshot`, `reset` or `stop`.
+
+    """
+
+    permission_classes = [IsAdminUser]
+
+    KEYS = ["lineno", "filename", "traceback"]
+
+    def get(self, request):
+        key = request.query_params.get("key", "lineno")
+        if key not in self.KEYS:
+            return Response(
+                {"detail": f"`key` must be one of {', '.join(self.KEYS)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            limit = int(request.query_params.get("limit", 20))
+        except ValueError:
+            return Response(
+                {"detail": "`limit` must be an integer."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(report(key, limit))
+
+    def post(self, request):
+        action = request.data.get("action")
+
+        if action == "start":
+            start()
+        elif action == "snapshot":
+            if not tracemalloc.is_tracing():
+                return Response(
+                    {"detail": "Memory tracing is not running."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            take_snapshot(request.data.get("label"))
+        elif action == "reset":
+            reset()
+        elif action == "stop":
+            stop()
+        else:
+            return Response(
+                {"detail": "`action` must be one of start, snapshot, reset, stop."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(report(limit=0))
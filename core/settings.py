@@ -59,6 +59,8 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    # Project middlewares
+    "core.diagnostics.MemoryProfileMiddleware",
 ]
 
 
@@ -74,7 +76,7 @@ REST_FRAMEWORK = {
         "django_filters.rest_framework.DjangoFilterBackend",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "user.authentication.CachedJWTAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.AllowAny",
@@ -96,6 +98,15 @@ SIMPLE_JWT = {
 ROOT_URLCONF = "core.urls"
 
 
+# Users of access tokens are cached for this many seconds,
+# and dropped at once when they change (see `user.authentication`)
+USER_CACHE_TIMEOUT = env.int("USER_CACHE_TIMEOUT", default=60)
+
+# Processes hashing passwords of `POST /user/import/`, kept few,
+# as they run beside web workers (`import_users` uses every CPU)
+USER_IMPORT_PROCESSES = env.int("USER_IMPORT_PROCESSES", default=2)
+
+
 # Templates
 
 TEMPLATES = [
@@ -118,14 +129,30 @@ WSGI_APPLICATION = "core.wsgi.application"
 
 # Database
 
+# Transactions take the write lock when they begin, so signals reading
+# and writing back derived fields of a sheet run one after another
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        "OPTIONS": {
+            "transaction_mode": "IMMEDIATE",
+        },
     }
 }
 
 
+# Cache
+
+# Local memory is per process. Workers of a server share a cache
+# through e.g. `CACHE_URL=filecache:///var/tmp/zindo` or `redis://`.
+# Users of access tokens are only cached in a shared cache,
+# so changes of users reach every worker at once.
+CACHES = {
+    "default": env.cache_url("CACHE_URL", default="locmemcache://"),
+}
+
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -187,8 +214,77 @@ EMAIL_HOST_USER = env("EMAIL_HOST_USER", default="")
 EMAIL_HOST_PASSWORD = env("EMAIL_HOST_PASSWORD", default="")
 DEFAULT_FROM_EMAIL = env("DEFAULT_FROM_EMAIL", default="noreply@zindo.online")
 
+# Emails are queued in the outbox and sent by `send_emails`,
+# which retries failed ones after a doubling delay
+EMAIL_OUTBOX_BATCH_SIZE = env.int("EMAIL_OUTBOX_BATCH_SIZE", default=50)
+EMAIL_OUTBOX_MAX_ATTEMPTS = env.int("EMAIL_OUTBOX_MAX_ATTEMPTS", default=5)
+EMAIL_OUTBOX_RETRY_DELAY = env.int("EMAIL_OUTBOX_RETRY_DELAY", default=60)
+EMAIL_OUTBOX_RETRY_MAX_DELAY = env.int("EMAIL_OUTBOX_RETRY_MAX_DELAY", default=3600)
+EMAIL_OUTBOX_POLL = env.float("EMAIL_OUTBOX_POLL", default=5.0)
+
+
+# Naver book search
+
+NAVER_BOOK_SEARCH_URL = env(
+    "NAVER_BOOK_SEARCH_URL",
+    default="https://openapi.naver.com/v1/search/book.json",
+)
+NAVER_TIMEOUT = env.float("NAVER_TIMEOUT", default=5.0)
+# Missing keys are refused by the API
+NAVER_CLIENT_ID = env("NAVER_CLIENT_ID", default="")
+NAVER_CLIENT_SECRET = env("NAVER_CLIENT_SECRET", default="")
+
+
+# Async views
+
+# Threads running blocking work of async views, such as upstream calls
+OFFLOAD_THREADS = env.int("OFFLOAD_THREADS", default=8)
+
 
 # URLs used in emails
 
 API_BASE_URL = env("API_BASE_URL", default="http://localhost:8000")
 FRONTEND_URL = env("FRONTEND_URL", default="http://localhost:5173")
+
+
+# Memory diagnostics
+
+MEMORY_DIAGNOSTICS = env.bool("MEMORY_DIAGNOSTICS", default=False)
+MEMORY_DIAGNOSTICS_FRAMES = env.int("MEMORY_DIAGNOSTICS_FRAMES", default=10)
+
+
+# Timelines
+
+# Cached timelines are keyed on last modification of sheets,
+# so this only bounds how long stale keys occupy the cache
+TIMELINE_CACHE_TIMEOUT = env.int("TIMELINE_CACHE_TIMEOUT", default=60 * 60)
+
+
+# Analytics
+
+# Cached analytics are keyed on the latest writes of records and sheets,
+# so this only bounds staleness from edits of students and textbooks
+ANALYTICS_CACHE_TIMEOUT = env.int("ANALYTICS_CACHE_TIMEOUT", default=60 * 60)
+
+
+# Sync
+
+# Rows are stamped before their transaction commits,
+# so sync reads this many seconds before the cursor again
+SYNC_OVERLAP = env.int("SYNC_OVERLAP", default=5)
+# Rows listed by a response of sync, which pages the rest
+SYNC_PAGE_SIZE = env.int("SYNC_PAGE_SIZE", default=1000)
+# Days tombstones are kept for clients to sync from
+TOMBSTONE_RETENTION_DAYS = env.int("TOMBSTONE_RETENTION_DAYS", default=30)
+
+
+# Event stream
+
+# Seconds between polls of new events, shared by subscribers of a worker
+EVENT_STREAM_POLL = env.float("EVENT_STREAM_POLL", default=1.0)
+# Seconds of silence before a comment keeps connections open
+EVENT_STREAM_HEARTBEAT = env.float("EVENT_STREAM_HEARTBEAT", default=15.0)
+# Milliseconds clients wait before reconnecting
+EVENT_STREAM_RETRY = env.int("EVENT_STREAM_RETRY", default=3000)
+# Days events are kept for clients to resume from
+EVENT_RETENTION_DAYS = env.int("EVENT_RETENTION_DAYS", default=7)
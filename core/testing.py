@@ -0,0 +1,330 @@
+"""
+Testing
+
+This file defines helpers shared by test cases of every application.
+
+"""
+
+import http.server
+import json
+import os
+import re
+import socketserver
+import threading
+import time
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class StubServer:
+    """Local HTTP server answering every GET with JSON after a delay.
+
+    Stands in for upstream APIs in tests and load tests,
+    and counts the most requests it has served at once.
+
+    """
+
+    def __init__(self, body, delay=0):
+        self.body = json.dumps(body).encode()
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        stub = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                with stub.lock:
+                    stub.active += 1
+                    stub.max_active = max(stub.max_active, stub.active)
+                try:
+                    time.sleep(stub.delay)
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(stub.body)))
+                    self.end_headers()
+                    self.wfile.write(stub.body)
+                except ConnectionError:
+                    # Client gave up waiting, as on timeouts
+                    pass
+                finally:
+                    with stub.lock:
+                        stub.active -= 1
+
+            def log_message(self, *args):
+                pass
+
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}/"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        return self
+
+    def __exit__(self, *args):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class SMTPStub:
+    """Local SMTP server keeping messages it receives in memory.
+
+    Stands in for the mail server in tests, refusing recipients
+    in `reject` with a temporary error, and counts connections.
+
+    """
+
+    def __init__(self, reject=()):
+        self.reject = set(reject)
+        self.messages = []
+        self.connections = 0
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        stub = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, line):
+                self.wfile.write(f"{line}\r\n".encode())
+
+            def handle(self):
+                with stub.lock:
+                    stub.connections += 1
+
+                recipients = []
+                self.reply("220 localhost")
+                while line := self.rfile.readline():
+                    command = line.decode().strip()
+                    verb = command[:4].upper()
+
+                    if verb in ("HELO", "EHLO"):
+                        self.reply("250 localhost")
+                    elif verb == "MAIL":
+                        recipients = []
+                        self.reply("250 OK")
+                    elif verb == "RCPT":
+                        address = command.partition(":")[2].strip(" <>")
+                        if address in stub.reject:
+                            self.reply("451 Try again later")
+                        else:
+                            recipients.append(address)
+                            self.reply("250 OK")
+                    elif verb == "DATA":
+                        self.reply("354 End data with <CR><LF>.<CR><LF>")
+                        lines = []
+                        while (line := self.rfile.readline()) not in (b".\r\n", b""):
+                            lines.append(line)
+                        with stub.lock:
+                            stub.messages.append(
+                                {"to": recipients, "data": b"".join(lines)}
+                            )
+                        self.reply("250 OK")
+                    elif verb == "QUIT":
+                        self.reply("221 Bye")
+                        break
+                    else:
+                        # RSET and NOOP, which need nothing done
+                        self.reply("250 OK")
+
+        self.server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        return self
+
+    def __exit__(self, *args):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def settings(self):
+        """Settings sending emails of Django to this server."""
+
+        return {
+            "EMAIL_BACKEND": "django.core.mail.backends.smtp.EmailBackend",
+            "EMAIL_HOST": "127.0.0.1",
+            "EMAIL_PORT": self.port,
+            "EMAIL_USE_TLS": False,
+            "EMAIL_HOST_USER": "",
+            "EMAIL_HOST_PASSWORD": "",
+        }
+
+
+class QueryCountMixin:
+    """Assert that requests issue a constant number of queries."""
+
+    def capture(self, method, path, data=None, status=None):
+        """Send a request and return captured queries."""
+
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(self.client, method)(path, data, format="json")
+
+        if status is not None:
+            self.assertEqual(response.status_code, status, response.content[:500])
+
+        return context.captured_queries
+
+    def assertConstantQueries(self, method, path, grow, data=None, status=200):
+        """Check query count does not change after `grow` adds rows.
+
+        `data` may be a callable, for payloads that cannot be sent twice.
+        On failure, queries of both requests are printed.
+
+        """
+
+        before = self.capture(
+            method,
+            path,
+            data() if callable(data) else data,
+            status,
+        )
+        grow()
+        after = self.capture(
+            method,
+            path,
+            data() if callable(data) else data,
+            status,
+        )
+
+        if len(before) != len(after):
+            self.fail(
+                f"{method.upper()} {path} issued {len(before)} queries, "
+                f"then {len(after)} after adding rows.\n\n"
+                f"Before:\n{self.format_queries(before)}\n\n"
+                f"After:\n{self.format_queries(after)}"
+            )
+
+        return len(after)
+
+    def format_queries(self, queries, limit=30):
+        lines = [
+            f"{index}. {query['sql']}" for index, query in enumerate(queries[:limit], 1)
+        ]
+        if len(queries) > limit:
+            lines.append(f"... and {len(queries) - limit} more")
+
+        return "\n".join(lines)
+
+
+class QueryPlanMixin:
+    """Assert that queries of a request use accepted query plans.
+
+    Each SELECT issued by a request is explained with
+    `EXPLAIN QUERY PLAN`, and flagged when it scans a table, even
+    in the order of an index, or sorts rows with a temporary B-tree.
+    Only tables in `small_tables`, which never grow with usage,
+    may be scanned freely.
+    Flagged plans must be listed in the `query_plans` snapshot file,
+    which maps test case names to their accepted plans.
+
+    Run tests with `UPDATE_QUERY_PLANS=1` to rewrite the snapshot,
+    then review the diff of the file before committing it.
+
+    """
+
+    query_plans = None
+    small_tables = ()
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.update_plans = os.environ.get("UPDATE_QUERY_PLANS") == "1"
+        cls.accepted_plans = {}
+        if os.path.exists(cls.query_plans):
+            with open(cls.query_plans) as f:
+                cls.accepted_plans = json.load(f)
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.update_plans:
+            with open(cls.query_plans, "w") as f:
+                json.dump(
+                    dict(sorted(cls.accepted_plans.items())),
+                    f,
+                    indent=2,
+                    ensure_ascii=False,
+                )
+                f.write("\n")
+
+        super().tearDownClass()
+
+    def explain(self, method, path, data=None):
+        """Send a request and return SELECT statements with their plans."""
+
+        statements = []
+
+        def capture(execute, sql, params, many, context):
+            if sql.lstrip().upper().startswith("SELECT"):
+                statements.append((sql, params))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(capture):
+            response = getattr(self.client, method)(path, data, format="json")
+        self.assertLess(response.status_code, 400, response.content[:500])
+
+        explained = []
+        with connection.cursor() as cursor:
+            for sql, params in statements:
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+                plan = [row[-1] for row in cursor.fetchall()]
+                if (item := {"sql": sql, "plan": plan}) not in explained:
+                    explained.append(item)
+
+        return explained
+
+    def is_flagged(self, sql, plan):
+        # Subqueries name tables by aliases, like `"zindo_sheet" U0`
+        tables = {
+            alias: table for table, alias in re.findall(r'"(\w+)" ([A-Z]\d+)\b', sql)
+        }
+
+        for line in plan:
+            if line.startswith("USE TEMP B-TREE FOR ORDER BY"):
+                return True
+
+            # Only SEARCH lines are bounded, as SCAN lines read every row
+            # of the table or index, even when using an index for ordering
+            if (match := re.match(r"SCAN (\S+)", line)) is None:
+                continue
+
+            # Subqueries and constant rows are not tables
+            if match.group(1) in ["CONSTANT"] or match.group(1).startswith("("):
+                continue
+            if tables.get(match.group(1), match.group(1)) not in self.small_tables:
+                return True
+
+        return False
+
+    def assertAcceptedPlans(self, name, method, path, data=None):
+        flagged = [
+            item
+            for item in self.explain(method, path, data)
+            if self.is_flagged(item["sql"], item["plan"])
+        ]
+        plans = []
+        for item in flagged:
+            if item["plan"] not in plans:
+                plans.append(item["plan"])
+
+        if self.update_plans:
+            if plans:
+                self.accepted_plans[name] = plans
+            else:
+                self.accepted_plans.pop(name, None)
+            return
+
+        accepted = self.accepted_plans.get(name, [])
+        if unexpected := [item for item in flagged if item["plan"] not in accepted]:
+            self.fail(
+                f"{method.upper()} {path} ({name}) uses unaccepted query plans.\n\n"
+                + "\n\n".join(
+                    f"{item['sql']}\n  " + "\n  ".join(item["plan"])
+                    for item in unexpected
+                )
+                + "\n\nAdd an index to search by, or rerun with UPDATE_QUERY_PLANS=1 "
+                "to accept them."
+            )
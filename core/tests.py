@@ -0,0 +1,131 @@
+import tracemalloc
+
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from rest_framework.test import APITestCase
+
+from user.models import User
+
+from . import diagnostics
+from .testing import QueryPlanMixin
+
+PASSWORD = "zindo-password-1234"
+
+
+class MemoryDiagnosticsTestCase(APITestCase):
+    def setUp(self):
+        self.staff = User.objects.create_superuser(
+            "staff@zindo.online",
+            PASSWORD,
+            name="관리자",
+        )
+        self.teacher = User.objects.create_user(
+            "teacher@zindo.online",
+            PASSWORD,
+            name="선생님",
+            is_active=True,
+        )
+
+    def tearDown(self):
+        diagnostics.stop()
+
+    def test_staff_only(self):
+        response = self.client.get("/diagnostics/memory/")
+        self.assertEqual(response.status_code, 401)
+
+        self.client.force_authenticate(self.teacher)
+        response = self.client.post(
+            "/diagnostics/memory/", {"action": "start"}, format="json"
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(tracemalloc.is_tracing())
+
+        self.client.force_authenticate(self.staff)
+        response = self.client.post(
+            "/diagnostics/memory/", {"action": "start"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["tracing"])
+
+    def test_snapshot_limit(self):
+        self.client.force_authenticate(self.staff)
+        self.client.post("/diagnostics/memory/", {"action": "start"}, format="json")
+
+        for index in range(diagnostics.MAX_SNAPSHOTS + 3):
+            self.client.post(
+                "/diagnostics/memory/",
+                {"action": "snapshot", "label": f"s{index}"},
+                format="json",
+            )
+
+        # Baseline is kept, followed by the latest snapshots
+        labels = [
+            snapshot["label"]
+            for snapshot in self.client.get("/diagnostics/memory/").json()["snapshots"]
+        ]
+        self.assertEqual(len(labels), diagnostics.MAX_SNAPSHOTS)
+        self.assertEqual(labels[0], "s0")
+        self.assertEqual(labels[-1], f"s{diagnostics.MAX_SNAPSHOTS + 2}")
+
+    def test_overlapping_requests(self):
+        diagnostics.start()
+        factory = RequestFactory()
+
+        middleware = diagnostics.MemoryProfileMiddleware(lambda request: HttpResponse())
+        middleware(factory.get("/alone/"))
+
+        # Inner request resets the peak of the outer one, so neither counts
+        def nested(request):
+            return middleware(factory.get("/inner/"))
+
+        diagnostics.MemoryProfileMiddleware(nested)(factory.get("/outer/"))
+
+        self.assertEqual(
+            [stats["endpoint"] for stats in diagnostics.endpoint_stats()],
+            ["GET /alone/"],
+        )
+
+
+class QueryPlanTestCase(TestCase):
+    def setUp(self):
+        self.mixin = QueryPlanMixin()
+        self.mixin.small_tables = ("zindo_statsbatch",)
+
+    def test_flagged(self):
+        sql = 'SELECT * FROM "zindo_sheet" WHERE "zindo_sheet"."student_id" = %s'
+
+        self.assertFalse(
+            self.mixin.is_flagged(
+                sql, ["SEARCH zindo_sheet USING INDEX sheet_student_idx (student_id=?)"]
+            )
+        )
+        self.assertTrue(self.mixin.is_flagged(sql, ["SCAN zindo_sheet"]))
+        # Reading a whole index is as slow as reading the table
+        self.assertTrue(
+            self.mixin.is_flagged(
+                sql, ["SCAN zindo_sheet USING INDEX sheet_updated_idx"]
+            )
+        )
+        self.assertTrue(
+            self.mixin.is_flagged(
+                sql, ["SEARCH zindo_sheet", "USE TEMP B-TREE FOR ORDER BY"]
+            )
+        )
+
+    def test_small_tables(self):
+        sql = (
+            'SELECT * FROM "zindo_sheet" WHERE "zindo_sheet"."batch_id" IN '
+            '(SELECT U0."id" FROM "zindo_statsbatch" U0)'
+        )
+
+        self.assertFalse(
+            self.mixin.is_flagged(
+                sql,
+                [
+                    "SEARCH zindo_sheet USING INDEX sheet_batch_idx (batch_id=?)",
+                    "LIST SUBQUERY 1",
+                    "SCAN U0",
+                ],
+            )
+        )
+        self.assertTrue(self.mixin.is_flagged(sql, ["SCAN zindo_sheet"]))
@@ -2,10 +2,14 @@ from django.contrib import admin
 from django.shortcuts import HttpResponse
 from django.urls import include, path
 
+from . import diagnostics
+
 urlpatterns = [
     # Admin page / healthchecker
     path("admin/", admin.site.urls),
     path("", lambda _: HttpResponse("zindo!")),
+    # Diagnostics
+    path("diagnostics/memory/", diagnostics.MemoryDiagnosticsView.as_view()),
     # App routing
     path("user/", include("user.urls")),
     path("zindo/", include("zindo.urls")),
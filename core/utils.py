@@ -26,6 +26,21 @@ def uuid_filepath(instance, filename):
     return f"{app_name}/{model_name}/{uuid_name}{ext.lower()}"
 
 
+def is_cache_shared(alias="default"):
+    """
+    Check if workers of a server share the cache
+
+    Local memory is kept by each process, so changes written there
+    are not seen by other workers
+
+    """
+
+    from django.core.cache import caches
+    from django.core.cache.backends.locmem import LocMemCache
+
+    return not isinstance(caches[alias], LocMemCache)
+
+
 def unreachable():
     """
     Unreachable code block representation
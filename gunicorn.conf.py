@@ -0,0 +1,50 @@
+"""
+Gunicorn configuration
+
+This file is read by gunicorn started from the repository root
+(`uv run gunicorn`, or `-c gunicorn.conf.py` elsewhere), and keeps
+restarts short. The app is loaded and warmed once in the master,
+so workers fork ready to serve instead of each booting Django.
+
+Settings are read from environment variables `GUNICORN_*`.
+Set `GUNICORN_APP=core.asgi:application` and
+`GUNICORN_WORKER_CLASS=uvicorn_worker.UvicornWorker` (from the
+`uvicorn-worker` dependency) to serve async views and the event
+stream under ASGI.
+
+"""
+
+import gc
+import os
+
+wsgi_app = os.environ.get("GUNICORN_APP", "core.wsgi:application")
+bind = os.environ.get("GUNICORN_BIND", "127.0.0.1:8000")
+workers = int(os.environ.get("GUNICORN_WORKERS", 2))
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "sync")
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+
+# Load the app in the master, and fork workers from it
+preload_app = True
+
+
+def when_ready(server):
+    """Import every view in the master, after the app is loaded."""
+
+    from django.db import connections
+    from django.urls import get_resolver
+
+    # Reading URL patterns imports every view, so workers fork with them
+    _ = get_resolver().url_patterns
+
+    # Workers must open their own connections
+    connections.close_all()
+
+    # Objects of the warm master are never collected, so forked
+    # workers do not copy their pages by touching reference counts
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    from django.db import connections
+
+    connections.close_all()
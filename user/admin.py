@@ -49,3 +49,10 @@ class EmailVerificationTokenAdmin(admin.ModelAdmin):
 class PasswordResetTokenAdmin(admin.ModelAdmin):
     list_display = ["user", "token", "created_at", "expires_at", "is_used"]
     readonly_fields = ["token", "created_at"]
+
+
+@admin.register(models.OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ["subject", "recipients", "status", "attempts", "created_at"]
+    list_filter = ["status"]
+    readonly_fields = ["created_at", "sent_at"]
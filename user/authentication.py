@@ -0,0 +1,70 @@
+"""
+Authentication
+
+This file defines JWT authentication resolving users from the cache,
+which saves loading the user on every authenticated request.
+
+Each user has a version in the cache, replaced by signals whenever
+the user, its groups or its permissions change, so a deactivated
+user is refused at once rather than after the cache expires.
+Cached users are stored with the version they were loaded at,
+and only used while it is still current.
+
+Versions must reach every worker, so users are only cached in a shared
+cache. With local memory, which each worker keeps apart, users are
+loaded on every request as by `JWTAuthentication`.
+
+"""
+
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from core.utils import is_cache_shared
+
+
+def user_key(user_id):
+    return f"user:{user_id}"
+
+
+def version_key(user_id):
+    return f"user:{user_id}:version"
+
+
+def invalidate_users(user_ids):
+    """Replace versions of users, so their cached copies are not used."""
+
+    cache.set_many(
+        {version_key(user_id): uuid.uuid4().hex for user_id in user_ids},
+        None,
+    )
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT authentication with users cached for `USER_CACHE_TIMEOUT`."""
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None or not is_cache_shared():
+            # Let simplejwt refuse the token, or load the user, as usual
+            return super().get_user(validated_token)
+
+        keys = [user_key(user_id), version_key(user_id)]
+        cached = cache.get_many(keys)
+
+        if (version := cached.get(keys[1])) is None:
+            # Start a version, unless another request just did
+            cache.add(keys[1], uuid.uuid4().hex, None)
+            version = cache.get(keys[1])
+
+        elif (entry := cached.get(keys[0])) is not None and entry[0] == version:
+            return entry[1]
+
+        # Inactive and missing users are refused here, and never cached
+        user = super().get_user(validated_token)
+        cache.set(keys[0], (version, user), settings.USER_CACHE_TIMEOUT)
+
+        return user
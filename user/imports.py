@@ -0,0 +1,161 @@
+"""
+Imports
+
+This file creates users in bulk, from rows of CSV or JSON.
+
+Password hashing dominates the cost of creating users, so passwords
+are hashed across a process pool, then every user is inserted with
+a single `bulk_create()`, along with verification tokens and emails
+of inactive users when asked.
+
+"""
+
+import csv
+import datetime
+import io
+import json
+import os
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from . import models, outbox, serializers
+
+
+def read_users(file, format):
+    """Read rows of users from a text or binary file of `format`."""
+
+    try:
+        text = file.read()
+        if isinstance(text, bytes):
+            text = text.decode("utf-8-sig")
+
+        if format == "csv":
+            return list(csv.DictReader(io.StringIO(text)))
+        if format == "json":
+            return json.loads(text)
+    except (csv.Error, ValueError) as error:
+        raise ValidationError({"detail": f"File cannot be read: {error}"})
+
+    raise ValidationError({"detail": "`format` must be one of csv, json."})
+
+
+def hash_passwords(passwords, processes=None):
+    """Hash passwords across a process pool, keeping their order.
+
+    Missing passwords become unusable ones.
+
+    """
+
+    processes = min(processes or os.cpu_count() or 1, len(passwords))
+    if processes <= 1:
+        return [make_password(password or None) for password in passwords]
+
+    # Imported here, as multiprocessing is slow to import and rarely used
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Workers started without fork need Django set up on their own
+    with ProcessPoolExecutor(processes, initializer=django.setup) as executor:
+        return list(
+            executor.map(
+                make_password,
+                [password or None for password in passwords],
+                chunksize=max(len(passwords) // (processes * 4), 1),
+            )
+        )
+
+
+def check_emails(emails):
+    """Get errors by row of emails taken by users or by earlier rows."""
+
+    taken = set(
+        models.User.objects.filter(email__in=emails).values_list("email", flat=True)
+    )
+    seen = set()
+    errors = []
+    for email in emails:
+        if email in taken or email in seen:
+            errors.append({"email": ["User with this email already exists."]})
+        else:
+            errors.append({})
+        seen.add(email)
+
+    return errors
+
+
+def import_users(rows, send_verification=False, processes=None):
+    """Validate rows, then create their users in one transaction.
+
+    Raises `ValidationError` with errors by row, creating no user,
+    if any row is invalid or its email is taken,
+    including by users signed up while passwords were hashed.
+    Returns created users.
+
+    """
+
+    if not isinstance(rows, list):
+        raise ValidationError({"detail": "Users must be a list."})
+
+    serializer = serializers.ImportUserSerializer(data=rows, many=True)
+    serializer.is_valid(raise_exception=True)
+    rows = serializer.validated_data
+
+    # Check emails in the file and in the database at once
+    emails = [models.User.objects.normalize_email(row["email"]) for row in rows]
+    if any(errors := check_emails(emails)):
+        raise ValidationError(errors)
+
+    passwords = hash_passwords([row.get("password") for row in rows], processes)
+
+    try:
+        with transaction.atomic():
+            users = models.User.objects.bulk_create(
+                [
+                    models.User(
+                        email=email,
+                        name=row["name"],
+                        password=password,
+                        is_active=row["is_active"],
+                        is_staff=row["is_staff"],
+                    )
+                    for email, row, password in zip(emails, rows, passwords)
+                ]
+            )
+
+            if send_verification:
+                queue_verification_emails(
+                    [user for user in users if not user.is_active]
+                )
+    except IntegrityError:
+        # Emails may have been taken since they were checked
+        if any(errors := check_emails(emails)):
+            raise ValidationError(errors) from None
+        raise
+
+    return users
+
+
+def queue_verification_emails(users):
+    """Create verification tokens of new users and queue their emails."""
+
+    expires_at = timezone.now() + datetime.timedelta(hours=24)
+    tokens = models.EmailVerificationToken.objects.bulk_create(
+        [
+            models.EmailVerificationToken(user=user, expires_at=expires_at)
+            for user in users
+        ]
+    )
+
+    models.OutboxEmail.objects.bulk_create(
+        [
+            models.OutboxEmail(
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                **outbox.verification_email(user.email, token.token),
+            )
+            for user, token in zip(users, tokens)
+        ]
+    )
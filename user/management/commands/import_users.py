@@ -0,0 +1,74 @@
+import pathlib
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+from user import imports
+
+
+class Command(BaseCommand):
+    help = (
+        "Create users from a CSV or JSON file "
+        "with `email`, `name` and optional `password`, `is_active`, `is_staff`"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or JSON file of users")
+        parser.add_argument(
+            "--format",
+            choices=["csv", "json"],
+            help="Format of the file (default: by its extension)",
+        )
+        parser.add_argument(
+            "--send-verification",
+            action="store_true",
+            help="Queue verification emails of inactive users",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            help="Number of processes hashing passwords (default: CPU count)",
+        )
+
+    def handle(self, *args, **options):
+        path = pathlib.Path(options["path"])
+        format = options["format"] or path.suffix.lstrip(".").lower()
+
+        started = time.perf_counter()
+        try:
+            with path.open("rb") as file:
+                users = imports.import_users(
+                    imports.read_users(file, format),
+                    send_verification=options["send_verification"],
+                    processes=options["processes"],
+                )
+        except OSError as error:
+            raise CommandError(error)
+        except ValidationError as error:
+            raise CommandError(
+                "No user was imported.\n" + "\n".join(format_errors(error.detail))
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {len(users)} users in {time.perf_counter() - started:.1f}s."
+            )
+        )
+
+
+def format_errors(detail):
+    """Yield lines of errors, by row when given as a list."""
+
+    if isinstance(detail, dict):
+        detail = [detail]
+        rows = False
+    else:
+        rows = True
+
+    for index, errors in enumerate(detail, start=1):
+        for field, messages in errors.items():
+            if not isinstance(messages, list):
+                messages = [messages]
+            line = f"{field}: {' '.join(str(message) for message in messages)}"
+            yield f"Row {index}, {line}" if rows else line
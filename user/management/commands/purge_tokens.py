@@ -0,0 +1,63 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from user.models import EmailVerificationToken, PasswordResetToken
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired verification tokens and expired or used reset tokens. "
+        "Each batch is a short transaction, so writers wait only for a batch."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rows deleted per transaction",
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.0,
+            help="Seconds to wait between batches, letting writers in",
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        targets = [
+            (
+                "verification tokens",
+                EmailVerificationToken.objects.filter(expires_at__lt=now),
+            ),
+            (
+                "expired reset tokens",
+                PasswordResetToken.objects.filter(expires_at__lt=now),
+            ),
+            (
+                "used reset tokens",
+                PasswordResetToken.objects.filter(is_used=True),
+            ),
+        ]
+
+        for name, tokens in targets:
+            deleted = self.purge(tokens, options["batch_size"], options["pause"])
+            self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} {name}."))
+
+    def purge(self, tokens, batch_size, pause):
+        """Delete `tokens` in batches, and return how many were deleted."""
+
+        total = 0
+        while pks := list(tokens.values_list("pk", flat=True)[:batch_size]):
+            # Tokens have no dependent rows, so this is a single DELETE
+            deleted, _ = tokens.model.objects.filter(pk__in=pks).delete()
+            total += deleted
+
+            if len(pks) < batch_size:
+                break
+            time.sleep(pause)
+
+        return total
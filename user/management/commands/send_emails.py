@@ -0,0 +1,44 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from user import outbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Send queued emails of the outbox in batches. "
+        "Run a single worker, as batches are not locked."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.EMAIL_OUTBOX_BATCH_SIZE,
+            help="Number of emails sent over one SMTP connection",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling the outbox instead of exiting when empty",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=settings.EMAIL_OUTBOX_POLL,
+            help="Seconds to wait between polls of an empty outbox",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = outbox.deliver(options["batch_size"])
+            if sent or failed:
+                self.stdout.write(f"Sent {sent} emails, {failed} failed.")
+
+            # Drain full batches at once, then wait for new emails
+            if sent + failed < options["batch_size"]:
+                if not options["loop"]:
+                    break
+                time.sleep(options["interval"])
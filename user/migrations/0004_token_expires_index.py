@@ -0,0 +1,28 @@
+# Generated by Django 6.1.2 on 2026-10-19 17:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("user", "0003_outbox"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="emailverificationtoken",
+            index=models.Index(fields=["expires_at"], name="verification_expires_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="passwordresettoken",
+            index=models.Index(fields=["expires_at"], name="reset_expires_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="passwordresettoken",
+            index=models.Index(
+                condition=models.Q(("is_used", True)),
+                fields=["expires_at"],
+                name="reset_used_idx",
+            ),
+        ),
+    ]
@@ -38,6 +38,14 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     objects = UserManager()
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["date_joined"],
+                name="user_date_joined_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"[User #{self.id:04d}] {self.email} ({self.name})"
 
@@ -53,6 +61,14 @@ class EmailVerificationToken(models.Model):
     created_at = models.DateTimeField("생성일", auto_now_add=True)
     expires_at = models.DateTimeField("만료일")
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["expires_at"],
+                name="verification_expires_idx",
+            ),
+        ]
+
     def is_expired(self):
         return timezone.now() > self.expires_at
 
@@ -72,8 +88,66 @@ class PasswordResetToken(models.Model):
     expires_at = models.DateTimeField("만료일")
     is_used = models.BooleanField("사용 여부", default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["expires_at"],
+                name="reset_expires_idx",
+            ),
+            # Used tokens only, which are purged before they expire
+            models.Index(
+                fields=["expires_at"],
+                condition=models.Q(is_used=True),
+                name="reset_used_idx",
+            ),
+        ]
+
     def is_expired(self):
         return timezone.now() > self.expires_at
 
     def __str__(self):
         return f"[PasswordResetToken] {self.user.email}"
+
+
+class OutboxEmail(models.Model):
+    """Email written in the transaction of a request.
+
+    Delivered later by `send_emails`, so requests never wait on SMTP.
+    Failed deliveries are retried with backoff, up to a limit.
+
+    """
+
+    STATUS_PENDING = "pending"
+    STATUS_SENT = "sent"
+    STATUS_FAILED = "failed"
+
+    subject = models.CharField("제목", max_length=255)
+    message = models.TextField("내용")
+    from_email = models.CharField("보내는 주소", max_length=255)
+    recipients = models.JSONField("받는 주소", default=list)
+    status = models.CharField(
+        "상태",
+        max_length=8,
+        choices=[
+            (STATUS_PENDING, "대기"),
+            (STATUS_SENT, "발송"),
+            (STATUS_FAILED, "실패"),
+        ],
+        default=STATUS_PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField("시도 횟수", default=0)
+    last_error = models.TextField("마지막 오류", blank=True)
+    created_at = models.DateTimeField("생성일", auto_now_add=True)
+    next_attempt_at = models.DateTimeField("다음 시도", default=timezone.now)
+    sent_at = models.DateTimeField("발송일", null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["status", "next_attempt_at"],
+                name="outbox_due_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"[OutboxEmail #{self.id:04d}] {self.subject} ({self.status})"
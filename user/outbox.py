@@ -0,0 +1,128 @@
+"""
+Outbox
+
+This file queues emails as `OutboxEmail` rows and delivers them.
+
+Requests only write rows, in their own transaction, so a slow or
+failing mail server never holds a request, and an email is queued
+if and only if the change that caused it commits.
+The `send_emails` command delivers due emails in batches,
+over one SMTP connection per batch.
+
+"""
+
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import models
+
+
+def enqueue(subject, message, recipients, from_email=None):
+    """Queue an email to be sent by `send_emails`."""
+
+    return models.OutboxEmail.objects.create(
+        subject=subject,
+        message=message,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=list(recipients),
+    )
+
+
+def verification_email(email, token):
+    """Build email verifying `email` with `token`, as `enqueue()` takes it."""
+
+    verify_url = f"{settings.FRONTEND_URL}/user/verify-email?token={token}"
+
+    return {
+        "subject": "[Zindo] 이메일 인증",
+        "message": f"아래 링크를 클릭하여 이메일을 인증하세요:\n\n{verify_url}",
+        "recipients": [email],
+    }
+
+
+def backoff(attempts):
+    """Delay before retrying an email failed `attempts` times."""
+
+    return datetime.timedelta(
+        seconds=min(
+            settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1),
+            settings.EMAIL_OUTBOX_RETRY_MAX_DELAY,
+        )
+    )
+
+
+def deliver(batch_size=None):
+    """Send one batch of due emails and record how each went.
+
+    Returns the numbers of sent and failed emails.
+
+    """
+
+    # Imported here, as only the worker sends emails
+    from django.core.mail import EmailMessage, get_connection
+
+    now = timezone.now()
+    emails = list(
+        models.OutboxEmail.objects.filter(
+            status=models.OutboxEmail.STATUS_PENDING,
+            next_attempt_at__lte=now,
+        ).order_by("next_attempt_at", "pk")[
+            : batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+        ]
+    )
+    if not emails:
+        return 0, 0
+
+    sent = []
+    failed = []
+
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as error:
+        # Mail server is down, so every email of the batch failed
+        failed = [(email, error) for email in emails]
+    else:
+        try:
+            for email in emails:
+                message = EmailMessage(
+                    subject=email.subject,
+                    body=email.message,
+                    from_email=email.from_email,
+                    to=email.recipients,
+                    connection=connection,
+                )
+                try:
+                    message.send()
+                except Exception as error:
+                    failed.append((email, error))
+                else:
+                    sent.append(email)
+        finally:
+            connection.close()
+
+    now = timezone.now()
+    for email in sent:
+        email.status = models.OutboxEmail.STATUS_SENT
+        email.attempts += 1
+        email.sent_at = now
+        email.last_error = ""
+
+    for email, error in failed:
+        email.attempts += 1
+        email.last_error = f"{error.__class__.__name__}: {error}"
+        if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+            email.status = models.OutboxEmail.STATUS_FAILED
+        else:
+            email.next_attempt_at = now + backoff(email.attempts)
+
+    with transaction.atomic():
+        models.OutboxEmail.objects.bulk_update(
+            emails,
+            ["status", "attempts", "last_error", "next_attempt_at", "sent_at"],
+        )
+
+    return len(sent), len(failed)
@@ -40,13 +40,23 @@ class SignUpSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         validated_data.pop("password_confirm")
         password = validated_data.pop("password")
+        # Async views hash ahead, off the database thread
+        encoded = validated_data.pop("encoded_password", None)
         user = models.User(**validated_data)
-        user.set_password(password)
+        if encoded is None:
+            user.set_password(password)
+        else:
+            user.password = encoded
         user.is_active = False
         user.save()
         return user
 
 
+class SignInSerializer(serializers.Serializer):
+    email = serializers.CharField()
+    password = serializers.CharField(trim_whitespace=False, write_only=True)
+
+
 class PasswordResetRequestSerializer(serializers.Serializer):
     email = serializers.EmailField()
 
@@ -60,3 +70,22 @@ class PasswordResetConfirmSerializer(serializers.Serializer):
         if data["password"] != data["password_confirm"]:
             raise serializers.ValidationError("Passwords do not match.")
         return data
+
+
+class ImportUserSerializer(serializers.Serializer):
+    """Row of bulk user import, where `password` may be left out."""
+
+    email = serializers.EmailField()
+    name = serializers.CharField(max_length=50)
+    password = serializers.CharField(
+        required=False,
+        allow_blank=True,
+        write_only=True,
+        validators=[validate_password],
+    )
+    is_active = serializers.BooleanField(default=False)
+    is_staff = serializers.BooleanField(default=False)
+
+
+class ImportOptionsSerializer(serializers.Serializer):
+    send_verification = serializers.BooleanField(default=False)
@@ -0,0 +1,87 @@
+"""
+Signals
+
+This file drops cached users when they change,
+see `authentication.invalidate_users()`.
+
+Any save of a user invalidates it, which covers activation,
+staff status and passwords, changed through `UserViewSet`,
+email verification or password reset alike.
+Queryset `.update()` skips signals, so invalidate users yourself.
+
+"""
+
+from functools import partial
+
+from django.contrib.auth.models import Group
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import models
+from .authentication import invalidate_users
+
+
+def invalidate(user_ids):
+    """Invalidate users now, and again once the change commits.
+
+    Requests loading users before the commit may cache them
+    with the first version, which the second one replaces.
+
+    """
+
+    user_ids = list(user_ids)
+    invalidate_users(user_ids)
+    transaction.on_commit(partial(invalidate_users, user_ids))
+
+
+@receiver(post_save, sender=models.User)
+@receiver(post_delete, sender=models.User)
+def user_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+
+    invalidate([instance.pk])
+
+
+@receiver(m2m_changed, sender=models.User.groups.through)
+@receiver(m2m_changed, sender=models.User.user_permissions.through)
+def user_permissions_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            invalidate([instance.pk])
+
+    # Changed from the side of a group or permission
+    elif action in ("post_add", "post_remove"):
+        invalidate(pk_set)
+    elif action == "pre_clear":
+        if sender is models.User.groups.through:
+            users = models.User.objects.filter(groups=instance)
+        else:
+            users = models.User.objects.filter(user_permissions=instance)
+        invalidate(users.values_list("pk", flat=True))
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def group_permissions_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action not in ("post_add", "post_remove", "post_clear"):
+            return
+        groups = [instance.pk]
+
+    # Changed from the side of a permission
+    elif action in ("post_add", "post_remove"):
+        groups = pk_set
+    elif action == "pre_clear":
+        groups = list(instance.group_set.values_list("pk", flat=True))
+    else:
+        return
+
+    invalidate(
+        models.User.objects.filter(groups__in=groups).values_list("pk", flat=True)
+    )
+
+
+@receiver(pre_delete, sender=Group)
+def group_deleting(sender, instance, **kwargs):
+    invalidate(instance.user_set.values_list("pk", flat=True))
@@ -1 +1,667 @@
-# Create your tests here.
+import datetime
+import io
+import json
+import pathlib
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import Group, Permission
+from django.contrib.auth.hashers import make_password
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.testing import QueryCountMixin, QueryPlanMixin, SMTPStub
+
+from . import imports, models, outbox
+
+PASSWORD = "zindo-password-1234"
+
+
+def populate(count):
+    """Create active users with unusable passwords, without hashing."""
+
+    models.User.objects.bulk_create(
+        [
+            models.User(
+                email=f"teacher{index}@zindo.online",
+                name=f"선생님{index}",
+                is_active=True,
+                password="!",
+            )
+            for index in range(count)
+        ]
+    )
+
+
+class OutboxTestCase(APITestCase):
+    def queue(self, count, recipient="teacher{index}@zindo.online"):
+        for index in range(count):
+            outbox.enqueue(
+                "[Zindo] 테스트",
+                "내용",
+                [recipient.format(index=index)],
+            )
+
+    def test_signup_queues_email(self):
+        response = self.client.post(
+            "/user/auth/signup/",
+            {
+                "email": "new@zindo.online",
+                "name": "새 선생님",
+                "password": PASSWORD,
+                "password_confirm": PASSWORD,
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+
+        # Nothing is sent within the request
+        self.assertEqual(mail.outbox, [])
+
+        email = models.OutboxEmail.objects.get()
+        token = models.EmailVerificationToken.objects.get()
+        self.assertEqual(email.recipients, ["new@zindo.online"])
+        self.assertIn(str(token.token), email.message)
+        self.assertEqual(email.status, models.OutboxEmail.STATUS_PENDING)
+
+    def test_password_reset_queues_email(self):
+        models.User.objects.create_user(
+            "teacher@zindo.online",
+            PASSWORD,
+            name="선생님",
+            is_active=True,
+        )
+
+        self.client.post(
+            "/user/auth/password-reset/",
+            {"email": "teacher@zindo.online"},
+            format="json",
+        )
+        self.client.post(
+            "/user/auth/password-reset/",
+            {"email": "unknown@zindo.online"},
+            format="json",
+        )
+
+        email = models.OutboxEmail.objects.get()
+        token = models.PasswordResetToken.objects.get()
+        self.assertEqual(email.recipients, ["teacher@zindo.online"])
+        self.assertIn(str(token.token), email.message)
+
+    def test_batch_over_one_connection(self):
+        self.queue(5)
+
+        with SMTPStub() as stub, override_settings(**stub.settings()):
+            call_command("send_emails", batch_size=2, stdout=io.StringIO())
+
+        self.assertEqual(len(stub.messages), 5)
+        self.assertEqual(stub.connections, 3)
+        self.assertFalse(
+            models.OutboxEmail.objects.exclude(
+                status=models.OutboxEmail.STATUS_SENT,
+                sent_at__isnull=False,
+            ).exists()
+        )
+
+    @override_settings(EMAIL_OUTBOX_RETRY_DELAY=60, EMAIL_OUTBOX_MAX_ATTEMPTS=2)
+    def test_retry_with_backoff(self):
+        self.queue(1)
+        self.queue(1, recipient="bounce@zindo.online")
+
+        with SMTPStub(reject=["bounce@zindo.online"]) as stub:
+            with override_settings(**stub.settings()):
+                self.assertEqual(outbox.deliver(), (1, 1))
+
+                # Failed email is not due until its backoff has passed
+                self.assertEqual(outbox.deliver(), (0, 0))
+
+                email = models.OutboxEmail.objects.get(
+                    recipients=["bounce@zindo.online"]
+                )
+                self.assertEqual(email.status, models.OutboxEmail.STATUS_PENDING)
+                self.assertEqual(email.attempts, 1)
+                self.assertIn("SMTPRecipientsRefused", email.last_error)
+                self.assertAlmostEqual(
+                    (email.next_attempt_at - timezone.now()).total_seconds(),
+                    60,
+                    delta=5,
+                )
+
+                email.next_attempt_at = timezone.now()
+                email.save()
+                self.assertEqual(outbox.deliver(), (0, 1))
+
+        email.refresh_from_db()
+        self.assertEqual(email.status, models.OutboxEmail.STATUS_FAILED)
+        self.assertEqual(email.attempts, 2)
+        self.assertEqual(len(stub.messages), 1)
+
+    def test_server_down(self):
+        self.queue(2)
+
+        with SMTPStub() as stub:
+            settings = stub.settings()
+
+        with override_settings(**settings):
+            self.assertEqual(outbox.deliver(), (0, 2))
+
+        self.assertEqual(
+            set(models.OutboxEmail.objects.values_list("attempts", flat=True)),
+            {1},
+        )
+
+
+# Workers of a server share a cache on disk, unlike local memory
+SHARED_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": pathlib.Path(tempfile.gettempdir()) / "zindo-test-cache",
+    },
+}
+
+
+def worker_caches(name):
+    """Local memory of one worker, apart from that of other workers."""
+
+    return {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": name,
+        },
+    }
+
+
+class SignInTestCase(APITestCase):
+    def setUp(self):
+        models.User.objects.create_user(
+            "user@zindo.online", PASSWORD, name="사용자", is_active=True
+        )
+
+    def test_signin(self):
+        response = self.client.post(
+            "/user/auth/signin/",
+            {"email": "user@zindo.online", "password": PASSWORD},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("access", response.json())
+
+        response = self.client.post(
+            "/user/auth/signin/",
+            {"email": "user@zindo.online", "password": f" {PASSWORD}"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 401)
+
+    def test_invalid_body(self):
+        for data in [
+            {"email": "user@zindo.online", "password": [PASSWORD]},
+            {"email": {"address": "user@zindo.online"}, "password": PASSWORD},
+            {"email": "user@zindo.online", "password": True},
+            {"email": "user@zindo.online"},
+        ]:
+            response = self.client.post("/user/auth/signin/", data, format="json")
+            self.assertEqual(response.status_code, 400, data)
+
+        response = self.client.post(
+            "/user/auth/signin/", "[]", content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class CachedAuthenticationTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+        self.staff = models.User.objects.create_superuser(
+            "staff@zindo.online",
+            PASSWORD,
+            name="관리자",
+        )
+        self.teacher = models.User.objects.create_user(
+            "teacher@zindo.online",
+            PASSWORD,
+            name="선생님",
+            is_active=True,
+        )
+
+    def request(self, user, method="get", path=None, data=None):
+        token = RefreshToken.for_user(user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        response = getattr(self.client, method)(
+            path or f"/user/{self.teacher.pk}/",
+            data,
+            format="json",
+        )
+        self.client.credentials()
+
+        return response
+
+    def test_user_cached(self):
+        self.request(self.staff)
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.request(self.staff)
+
+        # Only the teacher is read, for the response
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(context.captured_queries), 1)
+
+    def test_deactivation(self):
+        self.assertEqual(self.request(self.teacher).status_code, 403)
+
+        response = self.request(self.staff, "patch", data={"is_active": False})
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.request(self.teacher).status_code, 401)
+
+    def test_staff_revoked(self):
+        self.assertEqual(self.request(self.staff).status_code, 200)
+
+        self.staff.is_staff = False
+        self.staff.save()
+
+        self.assertEqual(self.request(self.staff).status_code, 403)
+
+    def test_password_reset(self):
+        self.request(self.teacher)
+        version = cache.get(f"user:{self.teacher.pk}:version")
+
+        token = models.PasswordResetToken.objects.create(
+            user=self.teacher,
+            expires_at=timezone.now() + datetime.timedelta(hours=1),
+        )
+        self.client.post(
+            "/user/auth/password-reset/confirm/",
+            {
+                "token": str(token.token),
+                "password": "zindo-password-5678",
+                "password_confirm": "zindo-password-5678",
+            },
+            format="json",
+        )
+
+        self.assertNotEqual(cache.get(f"user:{self.teacher.pk}:version"), version)
+
+    def test_local_memory(self):
+        # Staff status is revoked by another worker, whose memory is apart
+        with override_settings(CACHES=worker_caches("first")):
+            self.assertEqual(self.request(self.staff).status_code, 200)
+
+        with override_settings(CACHES=worker_caches("second")):
+            self.staff.is_staff = False
+            self.staff.save()
+
+        with override_settings(CACHES=worker_caches("first")):
+            self.assertEqual(self.request(self.staff).status_code, 403)
+
+    def test_permissions(self):
+        self.request(self.teacher)
+        group = Group.objects.create(name="교사")
+
+        for change in [
+            lambda: self.teacher.groups.add(group),
+            lambda: group.permissions.add(Permission.objects.first()),
+            lambda: group.user_set.clear(),
+            lambda: self.teacher.user_permissions.add(Permission.objects.first()),
+        ]:
+            version = cache.get(f"user:{self.teacher.pk}:version")
+            change()
+            self.assertNotEqual(
+                cache.get(f"user:{self.teacher.pk}:version"),
+                version,
+            )
+
+
+class PurgeTokensTestCase(APITestCase):
+    def test_purge(self):
+        now = timezone.now()
+        hour = datetime.timedelta(hours=1)
+        users = [
+            models.User.objects.create(email=f"user{index}@zindo.online", name="인증")
+            for index in range(5)
+        ]
+
+        for user, expires_at in zip(users, [now - hour] * 4 + [now + hour]):
+            models.EmailVerificationToken.objects.create(
+                user=user,
+                expires_at=expires_at,
+            )
+        for expires_at, is_used in [
+            (now - hour, False),
+            (now - hour, True),
+            (now + hour, True),
+            (now + hour, False),
+        ]:
+            models.PasswordResetToken.objects.create(
+                user=users[0],
+                expires_at=expires_at,
+                is_used=is_used,
+            )
+
+        stdout = io.StringIO()
+        call_command("purge_tokens", batch_size=3, stdout=stdout)
+
+        self.assertEqual(
+            stdout.getvalue().splitlines(),
+            [
+                "Deleted 4 verification tokens.",
+                "Deleted 2 expired reset tokens.",
+                "Deleted 1 used reset tokens.",
+            ],
+        )
+        self.assertEqual(
+            list(models.EmailVerificationToken.objects.values_list("user", flat=True)),
+            [users[4].pk],
+        )
+        self.assertEqual(
+            list(
+                models.PasswordResetToken.objects.values_list("is_used", "expires_at")
+            ),
+            [(False, now + hour)],
+        )
+
+
+class ImportUsersTestCase(APITestCase):
+    def setUp(self):
+        self.staff = models.User.objects.create_superuser(
+            "staff@zindo.online",
+            PASSWORD,
+            name="관리자",
+        )
+
+    def test_import(self):
+        users = imports.import_users(
+            [
+                {"email": "a@ZINDO.online", "name": "가", "password": PASSWORD},
+                {"email": "b@zindo.online", "name": "나", "password": PASSWORD},
+                {"email": "c@zindo.online", "name": "다", "is_active": True},
+            ],
+            send_verification=True,
+            processes=2,
+        )
+
+        self.assertEqual(
+            [user.email for user in users],
+            ["a@zindo.online", "b@zindo.online", "c@zindo.online"],
+        )
+        a, b, c = models.User.objects.filter(pk__in=[user.pk for user in users])
+        self.assertTrue(a.check_password(PASSWORD))
+        self.assertTrue(b.check_password(PASSWORD))
+        self.assertFalse(c.has_usable_password())
+
+        # Emails are queued for inactive users only
+        self.assertEqual(
+            sorted(
+                models.EmailVerificationToken.objects.values_list(
+                    "user__email", flat=True
+                )
+            ),
+            ["a@zindo.online", "b@zindo.online"],
+        )
+        for email in models.OutboxEmail.objects.all():
+            token = models.EmailVerificationToken.objects.get(
+                user__email=email.recipients[0]
+            )
+            self.assertIn(str(token.token), email.message)
+
+    def test_invalid_rows(self):
+        with self.assertRaises(ValidationError) as context:
+            imports.import_users(
+                [
+                    {"email": "new@zindo.online", "name": "새"},
+                    {"email": "staff@zindo.online", "name": "중복"},
+                    {"email": "new@zindo.online", "name": "새"},
+                ]
+            )
+
+        self.assertEqual(
+            [bool(errors) for errors in context.exception.detail],
+            [False, True, True],
+        )
+        self.assertEqual(models.User.objects.count(), 1)
+
+    def test_concurrent_signup(self):
+        def hash_passwords(passwords, processes=None):
+            # User signs up while passwords are hashed
+            models.User.objects.create_user("b@zindo.online", name="나")
+            return [make_password(None) for _ in passwords]
+
+        with mock.patch.object(imports, "hash_passwords", hash_passwords):
+            with self.assertRaises(ValidationError) as context:
+                imports.import_users(
+                    [
+                        {"email": "a@zindo.online", "name": "가"},
+                        {"email": "b@zindo.online", "name": "나"},
+                    ]
+                )
+
+        self.assertEqual(
+            [bool(errors) for errors in context.exception.detail],
+            [False, True],
+        )
+        self.assertFalse(models.User.objects.filter(email="a@zindo.online").exists())
+
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = pathlib.Path(directory) / "users.csv"
+            path.write_text(
+                "email,name,password\n"
+                f"a@zindo.online,가,{PASSWORD}\n"
+                "b@zindo.online,나,\n"
+            )
+
+            stdout = io.StringIO()
+            call_command("import_users", str(path), stdout=stdout)
+            self.assertIn("Imported 2 users", stdout.getvalue())
+
+            with self.assertRaisesMessage(CommandError, "Row 1, email"):
+                call_command("import_users", str(path), stdout=stdout)
+
+        self.assertEqual(models.User.objects.count(), 3)
+        self.assertFalse(models.OutboxEmail.objects.exists())
+
+    def test_endpoint(self):
+        self.client.force_authenticate(self.staff)
+
+        response = self.client.post(
+            "/user/import/",
+            {
+                "users": [{"email": "a@zindo.online", "name": "가"}],
+                "send_verification": True,
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()[0]["email"], "a@zindo.online")
+        self.assertEqual(models.OutboxEmail.objects.count(), 1)
+
+        # Endpoint hashes across a small pool beside web workers
+        with (
+            override_settings(USER_IMPORT_PROCESSES=1),
+            mock.patch.object(
+                imports, "hash_passwords", wraps=imports.hash_passwords
+            ) as hash_passwords,
+        ):
+            self.client.post(
+                "/user/import/",
+                {"users": [{"email": "c@zindo.online", "name": "다"}]},
+                format="json",
+            )
+        hash_passwords.assert_called_once_with([None], 1)
+
+        upload = SimpleUploadedFile(
+            "users.json",
+            json.dumps([{"email": "b@zindo.online", "name": "나"}]).encode(),
+        )
+        response = self.client.post("/user/import/", {"file": upload})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(models.OutboxEmail.objects.count(), 1)
+
+    def test_endpoint_staff_only(self):
+        response = self.client.post("/user/import/", {"users": []}, format="json")
+
+        self.assertEqual(response.status_code, 401)
+
+
+class QueryCountTestCase(QueryCountMixin, APITestCase):
+    """Query counts of user endpoints must not grow with users."""
+
+    def setUp(self):
+        self.staff = models.User.objects.create_superuser(
+            "staff@zindo.online",
+            PASSWORD,
+            name="관리자",
+        )
+
+    def grow(self):
+        populate(200)
+
+    def test_user_list(self):
+        self.client.force_authenticate(self.staff)
+
+        self.assertConstantQueries("get", "/user/", self.grow)
+
+    def test_user_detail(self):
+        self.client.force_authenticate(self.staff)
+
+        self.assertConstantQueries("get", f"/user/{self.staff.pk}/", self.grow)
+
+    def test_signup(self):
+        count = iter(range(2))
+
+        self.assertConstantQueries(
+            "post",
+            "/user/auth/signup/",
+            self.grow,
+            data=lambda: {
+                "email": f"new{next(count)}@zindo.online",
+                "name": "새 선생님",
+                "password": PASSWORD,
+                "password_confirm": PASSWORD,
+            },
+            status=201,
+        )
+
+    def test_verify_email(self):
+        def token():
+            user = models.User.objects.create(
+                email=f"verify{models.User.objects.count()}@zindo.online",
+                name="인증",
+            )
+            return models.EmailVerificationToken.objects.create(
+                user=user,
+                expires_at=timezone.now() + datetime.timedelta(hours=1),
+            ).token
+
+        self.assertConstantQueries(
+            "get",
+            "/user/auth/verify-email/",
+            self.grow,
+            data=lambda: {"token": str(token())},
+        )
+
+    def test_signin(self):
+        self.assertConstantQueries(
+            "post",
+            "/user/auth/signin/",
+            self.grow,
+            data={"email": "staff@zindo.online", "password": PASSWORD},
+        )
+
+    def test_password_reset_request(self):
+        self.assertConstantQueries(
+            "post",
+            "/user/auth/password-reset/",
+            self.grow,
+            data={"email": "staff@zindo.online"},
+        )
+
+    def test_password_reset_confirm(self):
+        tokens = iter(
+            models.PasswordResetToken.objects.create(
+                user=self.staff,
+                expires_at=timezone.now() + datetime.timedelta(hours=1),
+            ).token
+            for _ in range(2)
+        )
+
+        self.assertConstantQueries(
+            "post",
+            "/user/auth/password-reset/confirm/",
+            self.grow,
+            data=lambda: {
+                "token": str(next(tokens)),
+                "password": PASSWORD,
+                "password_confirm": PASSWORD,
+            },
+        )
+
+
+class QueryPlanTestCase(QueryPlanMixin, APITestCase):
+    """Queries of user endpoints must not scan or sort large tables."""
+
+    query_plans = pathlib.Path(__file__).parent / "query_plans.json"
+
+    def setUp(self):
+        populate(3)
+        self.staff = models.User.objects.create_superuser(
+            "staff@zindo.online",
+            PASSWORD,
+            name="관리자",
+        )
+
+    def test_user_list(self):
+        self.client.force_authenticate(self.staff)
+
+        self.assertAcceptedPlans("users.list", "get", "/user/")
+
+    def test_signin(self):
+        self.assertAcceptedPlans(
+            "auth.signin",
+            "post",
+            "/user/auth/signin/",
+            {"email": "staff@zindo.online", "password": PASSWORD},
+        )
+
+    def test_verify_email(self):
+        token = models.EmailVerificationToken.objects.create(
+            user=models.User.objects.create(email="verify@zindo.online", name="인증"),
+            expires_at=timezone.now() + datetime.timedelta(hours=1),
+        )
+
+        self.assertAcceptedPlans(
+            "auth.verify-email",
+            "get",
+            f"/user/auth/verify-email/?token={token.token}",
+        )
+
+    def test_password_reset(self):
+        self.assertAcceptedPlans(
+            "auth.password-reset",
+            "post",
+            "/user/auth/password-reset/",
+            {"email": "staff@zindo.online"},
+        )
+
+        token = models.PasswordResetToken.objects.get(user=self.staff)
+        self.assertAcceptedPlans(
+            "auth.password-reset.confirm",
+            "post",
+            "/user/auth/password-reset/confirm/",
+            {
+                "token": str(token.token),
+                "password": PASSWORD,
+                "password_confirm": PASSWORD,
+            },
+        )
@@ -1,19 +1,28 @@
 import datetime
 import uuid
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.contrib.auth import authenticate
-from django.core.mail import send_mail
+from django.contrib.auth import aauthenticate
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
 from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from . import models, serializers
+from core.concurrency import offload, read_json, respond
 
+from . import models, outbox, serializers
+
+
+def _queue_verification_email(user):
+    """Renew verification token of user and queue its email."""
 
-def _send_verification_email(user):
     token, _ = models.EmailVerificationToken.objects.update_or_create(
         user=user,
         defaults={
@@ -22,27 +31,42 @@ def _send_verification_email(user):
         },
     )
 
-    verify_url = f"{settings.FRONTEND_URL}/user/verify-email?token={token.token}"
-    send_mail(
-        subject="[Zindo] 이메일 인증",
-        message=f"아래 링크를 클릭하여 이메일을 인증하세요:\n\n{verify_url}",
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[user.email],
-    )
+    outbox.enqueue(**outbox.verification_email(user.email, token.token))
 
 
-class SignUpView(APIView):
-    authentication_classes = []
-    permission_classes = []
+@transaction.atomic
+def _sign_up(serializer, encoded_password):
+    """Create user and queue its email, so neither is left alone."""
 
-    def post(self, request):
-        serializer = serializers.SignUpSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        user = serializer.save()
+    user = serializer.save(encoded_password=encoded_password)
+    _queue_verification_email(user)
+
+    return user
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class SignUpView(View):
+    """Async, so hashing holds no worker under ASGI.
+
+    The verification email is queued in the outbox, see `outbox`.
+
+    """
+
+    async def post(self, request):
+        if (data := read_json(request)) is None:
+            return respond(
+                {"detail": "Request body must be a JSON object."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        serializer = serializers.SignUpSerializer(data=data)
+        if not await sync_to_async(serializer.is_valid)():
+            return respond(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        _send_verification_email(user)
+        encoded = await offload(make_password)(serializer.validated_data["password"])
+        await sync_to_async(_sign_up)(serializer, encoded)
 
-        return Response(
+        return respond(
             {"detail": "Verification email has been sent."},
             status=status.HTTP_201_CREATED,
         )
@@ -82,29 +106,39 @@ class VerifyEmailView(APIView):
         return Response({"detail": "Email verified successfully."})
 
 
-class SignInView(APIView):
-    authentication_classes = []
-    permission_classes = []
+@method_decorator(csrf_exempt, name="dispatch")
+class SignInView(View):
+    """Async, so password hashing holds no worker under ASGI.
 
-    def post(self, request):
-        email = request.data.get("email")
-        password = request.data.get("password")
+    Hashing runs in the thread pool of `acheck_password()`,
+    not in the bounded pool of `core.concurrency`.
 
-        if not email or not password:
-            return Response(
-                {"detail": "Email and password are required."},
+    """
+
+    async def post(self, request):
+        if (data := read_json(request)) is None:
+            return respond(
+                {"detail": "Request body must be a JSON object."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        user = authenticate(request, username=email, password=password)
+        serializer = serializers.SignInSerializer(data=data)
+        if not serializer.is_valid():
+            return respond(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        user = await aauthenticate(
+            request,
+            username=serializer.validated_data["email"],
+            password=serializer.validated_data["password"],
+        )
         if user is None:
-            return Response(
+            return respond(
                 {"detail": "Invalid credentials or account not verified."},
                 status=status.HTTP_401_UNAUTHORIZED,
             )
 
         refresh = RefreshToken.for_user(user)
-        return Response(
+        return respond(
             {
                 "refresh": str(refresh),
                 "access": str(refresh.access_token),
@@ -130,18 +164,18 @@ class PasswordResetRequestView(APIView):
         except models.User.DoesNotExist:
             return generic_response
 
-        token = models.PasswordResetToken.objects.create(
-            user=user,
-            expires_at=timezone.now() + datetime.timedelta(hours=1),
-        )
+        with transaction.atomic():
+            token = models.PasswordResetToken.objects.create(
+                user=user,
+                expires_at=timezone.now() + datetime.timedelta(hours=1),
+            )
 
-        reset_url = f"{settings.FRONTEND_URL}/reset-password?token={token.token}"
-        send_mail(
-            subject="[Zindo] 비밀번호 재설정",
-            message=f"아래 링크를 클릭하여 비밀번호를 재설정하세요:\n\n{reset_url}",
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user.email],
-        )
+            reset_url = f"{settings.FRONTEND_URL}/reset-password?token={token.token}"
+            outbox.enqueue(
+                subject="[Zindo] 비밀번호 재설정",
+                message=f"아래 링크를 클릭하여 비밀번호를 재설정하세요:\n\n{reset_url}",
+                recipients=[user.email],
+            )
 
         return generic_response
 
@@ -1,10 +1,46 @@
-from rest_framework import viewsets
+from django.conf import settings
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
 
-from . import models, serializers
+from . import imports, models, serializers
 
 
 class UserViewSet(viewsets.ModelViewSet):
     queryset = models.User.objects.all().order_by("-date_joined")
     serializer_class = serializers.UserSerializer
     permission_classes = [IsAdminUser]
+
+    @action(detail=False, methods=["post"], url_path="import")
+    def import_users(self, request):
+        """Create users in bulk, see `imports.import_users()`.
+
+        Takes a CSV or JSON `file` upload, or a JSON list `users`.
+        `send_verification` queues verification emails of inactive users.
+        Passwords are hashed by `USER_IMPORT_PROCESSES` processes.
+
+        """
+
+        if file := request.FILES.get("file"):
+            format = file.name.rpartition(".")[2].lower()
+            rows = imports.read_users(file, format)
+        elif "users" in request.data:
+            rows = request.data["users"]
+        else:
+            raise ValidationError({"detail": "`file` or `users` is required."})
+
+        options = serializers.ImportOptionsSerializer(data=request.data)
+        options.is_valid(raise_exception=True)
+
+        users = imports.import_users(
+            rows,
+            processes=settings.USER_IMPORT_PROCESSES,
+            **options.validated_data,
+        )
+
+        return Response(
+            serializers.UserSerializer(users, many=True).data,
+            status=status.HTTP_201_CREATED,
+        )
@@ -0,0 +1,209 @@
+"""
+Events
+
+This file streams changes of records and sheets to clients
+as server-sent events, which needs the ASGI entry point.
+
+Events are rows of `Event`, written by signals in the transaction
+of the change. Each event loop polls the table once per interval
+for all of its subscribers and fans new events out in memory,
+so database load does not grow with connected clients.
+Writes are serialized by SQLite, so ids of events commit in order
+and a client resuming from `Last-Event-ID` misses none of them.
+
+"""
+
+import asyncio
+import collections
+import json
+import logging
+import weakref
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Max
+from django.http import JsonResponse, StreamingHttpResponse
+
+from . import models
+
+logger = logging.getLogger(__name__)
+
+# Latest events kept in memory for subscribers to catch up from
+BUFFER_SIZE = 1000
+
+_brokers = weakref.WeakKeyDictionary()
+
+
+class Broker:
+    """Poll new events for every subscriber of an event loop."""
+
+    def __init__(self):
+        self.events = collections.deque(maxlen=BUFFER_SIZE)
+        self.arrived = asyncio.Event()
+        self.last_id = None
+        self.subscribers = 0
+        self.task = None
+
+    async def poll(self):
+        while True:
+            try:
+                events = [
+                    event
+                    async for event in models.Event.objects.filter(
+                        pk__gt=self.last_id
+                    ).order_by("pk")[:BUFFER_SIZE]
+                ]
+            except Exception:
+                # Subscribers would only get heartbeats if the task died,
+                # so errors like a locked database are retried next round
+                logger.exception("Polling events failed")
+                events = []
+
+            if events:
+                self.events.extend(events)
+                self.last_id = events[-1].pk
+
+                # Wake up every subscriber waiting for this round
+                arrived, self.arrived = self.arrived, asyncio.Event()
+                arrived.set()
+
+            await asyncio.sleep(settings.EVENT_STREAM_POLL)
+
+    async def subscribe(self):
+        self.subscribers += 1
+
+        if self.task is None:
+            if self.last_id is None:
+                self.last_id = await latest_id()
+            self.task = asyncio.create_task(self.poll())
+
+    def unsubscribe(self):
+        self.subscribers -= 1
+
+        if self.subscribers == 0 and self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def listen(self, last_id, student=None):
+        """Yield batches of events after `last_id`, of `student` if given.
+
+        Empty batches are yielded when nothing arrives for a heartbeat.
+
+        """
+
+        await self.subscribe()
+        try:
+            while True:
+                arrived = self.arrived
+
+                if last_id >= self.last_id:
+                    events = []
+                elif self.events and last_id >= self.events[0].pk - 1:
+                    events = [
+                        event
+                        for event in self.events
+                        if event.pk > last_id
+                        and (student is None or event.student_id == student)
+                    ]
+                    last_id = self.last_id
+                else:
+                    # Events older than the buffer are read from the database
+                    events = models.Event.objects.filter(
+                        pk__gt=last_id,
+                        pk__lte=self.last_id,
+                    ).order_by("pk")
+                    if student is not None:
+                        events = events.filter(student_id=student)
+                    events = [event async for event in events[:BUFFER_SIZE]]
+
+                    if len(events) < BUFFER_SIZE:
+                        last_id = self.last_id
+                    else:
+                        last_id = events[-1].pk
+
+                if events:
+                    yield events
+                    continue
+
+                try:
+                    await asyncio.wait_for(
+                        arrived.wait(),
+                        settings.EVENT_STREAM_HEARTBEAT,
+                    )
+                except TimeoutError:
+                    yield []
+
+        finally:
+            self.unsubscribe()
+
+
+def get_broker():
+    loop = asyncio.get_running_loop()
+    if (broker := _brokers.get(loop)) is None:
+        broker = _brokers[loop] = Broker()
+
+    return broker
+
+
+async def latest_id():
+    latest = await models.Event.objects.aaggregate(latest=Max("pk"))
+
+    return latest["latest"] or 0
+
+
+def format_event(event):
+    data = {
+        "id": event.object_id,
+        "sheet": event.sheet_id,
+        "student": event.student_id,
+        "created_at": event.created_at.isoformat(),
+    }
+
+    return f"id: {event.pk}\nevent: {event.kind}\ndata: {json.dumps(data)}\n\n"
+
+
+async def stream(request):
+    """Stream events of the academy, or of a student with `?student=`.
+
+    Clients resume after the event given by `Last-Event-ID`
+    (or `?last_event_id=`), and start from now without it.
+
+    """
+
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {"detail": "Event stream needs an ASGI server."},
+            status=501,
+        )
+
+    try:
+        student = request.GET.get("student")
+        student = int(student) if student else None
+        last_id = request.headers.get("Last-Event-ID") or request.GET.get(
+            "last_event_id"
+        )
+        last_id = int(last_id) if last_id else await latest_id()
+    except ValueError:
+        return JsonResponse(
+            {"detail": "`student` and `Last-Event-ID` must be integers."},
+            status=400,
+        )
+
+    async def events():
+        yield f"retry: {settings.EVENT_STREAM_RETRY}\n\n"
+
+        async for batch in get_broker().listen(last_id, student):
+            if not batch:
+                yield ": keep-alive\n\n"
+            for event in batch:
+                yield format_event(event)
+
+    return StreamingHttpResponse(
+        events(),
+        content_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Proxies must pass events through as they come
+            "X-Accel-Buffering": "no",
+        },
+    )
@@ -0,0 +1,506 @@
+import datetime
+import io
+import json
+import os
+import platform
+import statistics
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from user.models import User
+from zindo import utils
+from zindo.models import Record, Sheet, StatsBatch, Student, TextBook
+
+BENCHMARK_EMAIL = "benchmark@zindo.online"
+BENCHMARK_PASSWORD = "benchmark-password"
+BENCHMARK_ISBN = "9791100000000"
+BENCHMARK_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "benchmark",
+    },
+}
+
+
+class Command(BaseCommand):
+    help = "Benchmark API endpoints on generated datasets of several sizes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            default="10,50,200",
+            help="Comma separated numbers of students to generate",
+        )
+        parser.add_argument(
+            "--sheets-per-student",
+            type=int,
+            default=6,
+            help="Number of sheets per student",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=365,
+            help="Number of days of history to generate",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Random seed of generated datasets",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=20,
+            help="Number of requests per endpoint",
+        )
+        parser.add_argument(
+            "--only",
+            action="append",
+            help="Run only endpoints whose name contains this (repeatable)",
+        )
+        parser.add_argument(
+            "--output",
+            help="Write results to this JSON file",
+        )
+        parser.add_argument(
+            "--baseline",
+            help="Compare results against this JSON file",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.25,
+            help="Allowed relative p95 slowdown against baseline",
+        )
+        parser.add_argument(
+            "--min-delta",
+            type=float,
+            default=2.0,
+            help="Ignore p95 slowdowns smaller than this many milliseconds",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options["sizes"].split(",")]
+        except ValueError:
+            raise CommandError("--sizes must be comma separated integers.")
+
+        baseline = None
+        if path := options["baseline"]:
+            with open(path) as f:
+                baseline = json.load(f)
+
+        results = {
+            "meta": {
+                "created_at": timezone.now().isoformat(),
+                "python": platform.python_version(),
+                "sheets_per_student": options["sheets_per_student"],
+                "days": options["days"],
+                "seed": options["seed"],
+                "iterations": options["iterations"],
+            },
+            "sizes": {},
+        }
+
+        setup_test_environment()
+        try:
+            # Cache is cleared between requests, so keep it apart from the
+            # configured one, which may be shared with running workers
+            with override_settings(CACHES=BENCHMARK_CACHES):
+                for size in sizes:
+                    results["sizes"][str(size)] = self.run_size(size, options)
+        finally:
+            teardown_test_environment()
+
+        if path := options["output"]:
+            with open(path, "w") as f:
+                json.dump(results, f, indent=2, ensure_ascii=False)
+            self.stdout.write(f"Results written to {path}.")
+
+        if baseline is not None:
+            regressions = self.compare(
+                baseline,
+                results,
+                options["threshold"],
+                options["min_delta"],
+            )
+            if regressions:
+                raise CommandError(f"{regressions} regression(s) against baseline.")
+            self.stdout.write(self.style.SUCCESS("No regressions against baseline."))
+
+    def run_size(self, size, options):
+        """Run every endpoint on a fresh database with `size` students.
+
+        The database is a temporary file, so the configured one is untouched.
+
+        """
+
+        old_name = connection.settings_dict["NAME"]
+        old_test = connection.settings_dict.get("TEST", {})
+        connection.settings_dict["TEST"] = {
+            **old_test,
+            "NAME": os.path.join(
+                tempfile.gettempdir(),
+                f"zindo-benchmark-{os.getpid()}.sqlite3",
+            ),
+        }
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            started = time.perf_counter()
+            call_command(
+                "seed",
+                students=size,
+                sheets_per_student=options["sheets_per_student"],
+                days=options["days"],
+                seed=options["seed"],
+                stdout=io.StringIO(),
+            )
+            self.stdout.write(
+                self.style.MIGRATE_HEADING(
+                    f"{size} students, {Record.objects.count()} records "
+                    f"(generated in {time.perf_counter() - started:.1f}s)"
+                )
+            )
+
+            endpoints = self.get_endpoints()
+            if only := options["only"]:
+                endpoints = [
+                    endpoint
+                    for endpoint in endpoints
+                    if any(name in endpoint[0] for name in only)
+                ]
+
+            results = {}
+            for name, method, path, data, headers in endpoints:
+                results[name] = self.measure(
+                    method,
+                    path,
+                    data,
+                    headers,
+                    options["iterations"],
+                )
+                self.stdout.write(
+                    f"  {name:<28} p50 {results[name]['p50']:8.2f}ms  "
+                    f"p95 {results[name]['p95']:8.2f}ms  "
+                    f"{results[name]['queries']:4d} queries  "
+                    f"{results[name]['bytes']:>10,d} bytes"
+                )
+
+            return results
+
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            connection.settings_dict["TEST"] = old_test
+
+    def get_endpoints(self):
+        """Build `(name, method, path, data, headers)` for every endpoint."""
+
+        staff = User.objects.create_superuser(
+            BENCHMARK_EMAIL,
+            BENCHMARK_PASSWORD,
+            name="benchmark",
+        )
+        auth = {"Authorization": f"Bearer {RefreshToken.for_user(staff).access_token}"}
+
+        student = Student.objects.order_by("pk").first()
+        sheet = Sheet.objects.order_by("pk").first()
+        record = Record.objects.order_by("pk").first()
+        stats_batch = StatsBatch.objects.order_by("pk").first()
+
+        # Search must be answered by the database, not by Naver
+        textbook = TextBook.objects.order_by("pk").first()
+        textbook.isbn = BENCHMARK_ISBN
+        textbook.save()
+
+        # Pick a textbook without an active sheet of the student
+        free_textbook = TextBook.objects.exclude(
+            sheet__student=student,
+            sheet__is_finished=False,
+        ).first()
+
+        today = timezone.localdate()
+        week_ago = today - datetime.timedelta(days=7)
+        month_ago = today - datetime.timedelta(days=30)
+        year_ago = today - datetime.timedelta(days=365)
+
+        # Cursor past rows just generated, as if nothing changed since
+        cursor = utils.encode_cursor(
+            timezone.now() + datetime.timedelta(seconds=settings.SYNC_OVERLAP)
+        )
+
+        return [
+            ("students.list", "get", "/zindo/students/", None, {}),
+            ("students.list.grade", "get", "/zindo/students/?grade=2", None, {}),
+            ("students.grades", "get", "/zindo/students/grades/", None, {}),
+            ("students.detail", "get", f"/zindo/students/{student.pk}/", None, {}),
+            (
+                "students.coverage",
+                "get",
+                f"/zindo/students/{student.pk}/coverage/",
+                None,
+                {},
+            ),
+            (
+                "students.profile",
+                "get",
+                f"/zindo/students/{student.pk}/profile/",
+                None,
+                {},
+            ),
+            (
+                "students.attendance",
+                "get",
+                f"/zindo/students/attendance/?start={month_ago}&end={today}",
+                None,
+                {},
+            ),
+            (
+                "students.timeline",
+                "get",
+                f"/zindo/students/{student.pk}/timeline/?start={year_ago}&end={today}",
+                None,
+                {},
+            ),
+            (
+                "students.create",
+                "post",
+                "/zindo/students/",
+                {"name": "벤치마크", "admission_date": "2024-03-04"},
+                {},
+            ),
+            ("textbooks.list", "get", "/zindo/textbooks/", None, {}),
+            ("textbooks.detail", "get", f"/zindo/textbooks/{textbook.pk}/", None, {}),
+            (
+                "textbooks.create",
+                "post",
+                "/zindo/textbooks/",
+                {"name": "벤치마크 교재", "subject": "수학"},
+                {},
+            ),
+            (
+                "textbooks.search",
+                "get",
+                f"/zindo/textbooks/search/?isbn={BENCHMARK_ISBN}",
+                None,
+                {},
+            ),
+            ("sheets.list", "get", "/zindo/sheets/", None, {}),
+            (
+                "sheets.list.student",
+                "get",
+                f"/zindo/sheets/?student__id={student.pk}",
+                None,
+                {},
+            ),
+            (
+                "sheets.list.activity",
+                "get",
+                "/zindo/sheets/?ordering=-last_recorded_at",
+                None,
+                {},
+            ),
+            (
+                "sheets.list.behind",
+                "get",
+                "/zindo/sheets/?behind_schedule=true",
+                None,
+                {},
+            ),
+            ("sheets.detail", "get", f"/zindo/sheets/{sheet.pk}/", None, {}),
+            (
+                "sheets.timeline",
+                "get",
+                f"/zindo/sheets/{sheet.pk}/timeline/?start={year_ago}&end={today}",
+                None,
+                {},
+            ),
+            (
+                "sheets.create",
+                "post",
+                "/zindo/sheets/",
+                {
+                    "student": student.pk,
+                    "name": free_textbook.name,
+                    "subject": free_textbook.subject,
+                    "pace": 4,
+                },
+                {},
+            ),
+            ("records.list", "get", "/zindo/records/", None, {}),
+            (
+                "records.list.sheet",
+                "get",
+                f"/zindo/records/?sheet__id={sheet.pk}",
+                None,
+                {},
+            ),
+            (
+                "records.list.student",
+                "get",
+                f"/zindo/records/?sheet__student__id={student.pk}",
+                None,
+                {},
+            ),
+            (
+                "records.list.date",
+                "get",
+                f"/zindo/records/?created_at__date__gte={week_ago}"
+                f"&created_at__date__lte={today}",
+                None,
+                {},
+            ),
+            ("records.detail", "get", f"/zindo/records/{record.pk}/", None, {}),
+            (
+                "records.create",
+                "post",
+                "/zindo/records/",
+                {
+                    "sheet": sheet.pk,
+                    "progress": {"type": "range", "start": 1, "end": 4},
+                },
+                {},
+            ),
+            (
+                "activities.list.student",
+                "get",
+                f"/zindo/activities/?student__id={student.pk}"
+                f"&date__gte={month_ago}&date__lte={today}",
+                None,
+                {},
+            ),
+            (
+                "activities.analytics",
+                "get",
+                "/zindo/activities/analytics/?group_by=subject&group_by=grade"
+                f"&group_by=week&start={year_ago}&end={today}",
+                None,
+                {},
+            ),
+            ("stats-batches.list", "get", "/zindo/stats-batches/", None, {}),
+            (
+                "stats-batches.detail",
+                "get",
+                f"/zindo/stats-batches/{stats_batch.pk}/",
+                None,
+                {},
+            ),
+            (
+                "stats-batches.create",
+                "post",
+                "/zindo/stats-batches/",
+                {"title": "벤치마크", "student_ids": [student.pk]},
+                {},
+            ),
+            ("sync", "get", "/zindo/sync/", None, {}),
+            (
+                "sync.since",
+                "get",
+                f"/zindo/sync/?since={cursor}",
+                None,
+                {},
+            ),
+            ("users.list", "get", "/user/", None, auth),
+            (
+                "auth.signin",
+                "post",
+                "/user/auth/signin/",
+                {"email": BENCHMARK_EMAIL, "password": BENCHMARK_PASSWORD},
+                {},
+            ),
+        ]
+
+    def measure(self, method, path, data, headers, iterations):
+        """Request an endpoint repeatedly and summarize it.
+
+        Writes are rolled back after every request, and the cache
+        is cleared before it, so each iteration runs against the same
+        dataset, and cached endpoints are timed building their results.
+
+        """
+
+        client = Client(headers=headers)
+        timings = []
+        queries = []
+
+        def count_queries(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        for _ in range(iterations):
+            queries.clear()
+            cache.clear()
+            with transaction.atomic():
+                with connection.execute_wrapper(count_queries):
+                    started = time.perf_counter()
+                    if method == "get":
+                        response = client.get(path)
+                    else:
+                        response = client.post(
+                            path,
+                            data,
+                            content_type="application/json",
+                        )
+                    timings.append((time.perf_counter() - started) * 1000)
+                transaction.set_rollback(True)
+
+            if response.status_code >= 400:
+                raise CommandError(
+                    f"{method.upper()} {path} returned {response.status_code}: "
+                    f"{response.content[:200]!r}"
+                )
+
+        timings.sort()
+
+        return {
+            "p50": statistics.median(timings),
+            "p95": timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+            "queries": len(queries),
+            "bytes": len(response.content),
+        }
+
+    def compare(self, baseline, results, threshold, min_delta):
+        """Print differences against baseline and count regressions.
+
+        A regression is a p95 latency slower than `threshold`
+        by more than `min_delta` milliseconds,
+        or any increase in the number of queries.
+
+        """
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Comparison against baseline"))
+        regressions = 0
+
+        for size, endpoints in results["sizes"].items():
+            for name, current in endpoints.items():
+                if (old := baseline["sizes"].get(size, {}).get(name)) is None:
+                    continue
+
+                ratio = current["p95"] / old["p95"] if old["p95"] else 1
+                messages = []
+                if ratio > 1 + threshold and current["p95"] - old["p95"] > min_delta:
+                    messages.append(f"p95 {old['p95']:.2f}ms -> {current['p95']:.2f}ms")
+                if current["queries"] > old["queries"]:
+                    messages.append(f"queries {old['queries']} -> {current['queries']}")
+
+                line = f"  [{size}] {name:<28} p95 {ratio - 1:+7.1%}"
+                if messages:
+                    regressions += 1
+                    self.stdout.write(
+                        self.style.ERROR(f"{line}  {', '.join(messages)}")
+                    )
+                else:
+                    self.stdout.write(line)
+
+        return regressions
@@ -0,0 +1,132 @@
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import AsyncClient, Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from core.testing import StubServer
+
+# Answer of the stubbed Naver book search
+STUB_BOOK = {
+    "items": [
+        {
+            "title": "쎈 수학 3-1",
+            "isbn": "9791100000001",
+            "image": "https://example.com/book.jpg",
+        }
+    ]
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test textbook search against a slow local stub of Naver, "
+        "served by sync workers and by the async view"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=200,
+            help="Number of requests per mode",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=50,
+            help="Number of requests in flight at once",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Number of sync workers, as gunicorn workers",
+        )
+        parser.add_argument(
+            "--delay",
+            type=float,
+            default=0.1,
+            help="Seconds the stub waits before answering",
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+
+        # Unknown isbns go to the stub, on a temporary empty database
+        test_settings = connection.settings_dict.setdefault("TEST", {})
+        test_settings["NAME"] = os.path.join(
+            tempfile.gettempdir(),
+            f"zindo-loadtest-{os.getpid()}.sqlite3",
+        )
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with (
+                StubServer(STUB_BOOK, delay=options["delay"]) as stub,
+                override_settings(NAVER_BOOK_SEARCH_URL=stub.url),
+            ):
+                paths = [
+                    f"/zindo/textbooks/search/?isbn={index}"
+                    for index in range(options["requests"])
+                ]
+
+                self.report("sync", self.run_sync(paths, options["workers"]))
+                self.report(
+                    "async",
+                    asyncio.run(self.run_async(paths, options["concurrency"])),
+                )
+
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def run_sync(self, paths, workers):
+        """Serve requests by a fixed number of blocking workers."""
+
+        client = Client()
+
+        def request(path):
+            started = time.perf_counter()
+            response = client.get(path)
+            return response.status_code, time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(request, paths))
+
+        return results, time.perf_counter() - started
+
+    async def run_async(self, paths, concurrency):
+        """Serve requests concurrently on a single event loop."""
+
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def request(path):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(path)
+                return response.status_code, time.perf_counter() - started
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*[request(path) for path in paths])
+
+        return results, time.perf_counter() - started
+
+    def report(self, mode, run):
+        results, elapsed = run
+        timings = sorted(timing * 1000 for _, timing in results)
+        errors = sum(status >= 400 for status, _ in results)
+
+        self.stdout.write(
+            f"{mode:<6} {len(results) / elapsed:8.1f} req/s  "
+            f"p50 {statistics.median(timings):8.2f}ms  "
+            f"p95 {timings[int(len(timings) * 0.95) - 1]:8.2f}ms  "
+            f"{errors} errors"
+        )
@@ -0,0 +1,118 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core import diagnostics
+from user.models import User
+
+DEFAULT_PATHS = [
+    "/zindo/students/",
+    "/zindo/textbooks/",
+    "/zindo/sheets/",
+    "/zindo/records/",
+    "/zindo/stats-batches/",
+]
+
+
+class Command(BaseCommand):
+    help = "Profile memory allocations of API endpoints with tracemalloc"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path",
+            action="append",
+            dest="paths",
+            help="Endpoint to request (repeatable, defaults to zindo lists)",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=10,
+            help="Number of requests per endpoint",
+        )
+        parser.add_argument(
+            "--user",
+            help="Email of the user to authenticate requests as",
+        )
+        parser.add_argument(
+            "--key",
+            choices=diagnostics.MemoryDiagnosticsView.KEYS,
+            default="lineno",
+            help="Group allocation sites by line, file or traceback",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=10,
+            help="Number of allocation sites to report",
+        )
+
+    def handle(self, *args, **options):
+        paths = options["paths"] or DEFAULT_PATHS
+        headers = {}
+
+        if email := options["user"]:
+            try:
+                user = User.objects.get(email=email)
+            except User.DoesNotExist:
+                raise CommandError(f"User {email} does not exist.")
+
+            token = RefreshToken.for_user(user).access_token
+            headers["Authorization"] = f"Bearer {token}"
+
+        setup_test_environment()
+        diagnostics.start()
+        diagnostics.reset()
+
+        try:
+            client = Client(headers=headers)
+
+            # Warm up caches and lazy imports before the baseline
+            for path in paths:
+                self.request(client, path)
+            diagnostics.reset()
+            diagnostics.take_snapshot("baseline")
+
+            for _ in range(options["iterations"]):
+                for path in paths:
+                    self.request(client, path)
+            diagnostics.take_snapshot("final")
+
+            data = diagnostics.report(options["key"], options["limit"])
+
+        finally:
+            diagnostics.stop()
+            teardown_test_environment()
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Per-endpoint peak memory"))
+        for item in data["endpoints"]:
+            self.stdout.write(
+                f"  {item['endpoint']:<40} "
+                f"peak {self.format_size(item['peak']):>10}  "
+                f"mean {self.format_size(item['mean']):>10}  "
+                f"({item['count']} requests)"
+            )
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Growth since baseline"))
+        for item in data["diff"]:
+            site = item["site"]
+            if isinstance(site, list):
+                site = "\n    ".join(site)
+            self.stdout.write(
+                f"  {self.format_size(item['size_diff']):>10} "
+                f"({item['count_diff']:+d} blocks)  {site}"
+            )
+
+    def request(self, client, path):
+        response = client.get(path)
+        if response.status_code >= 400:
+            raise CommandError(f"GET {path} returned {response.status_code}.")
+
+    def format_size(self, size):
+        for unit in ["B", "KiB", "MiB"]:
+            if abs(size) < 1024:
+                return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+            size /= 1024
+
+        return f"{size:.1f} GiB"
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from zindo import utils
+from zindo.models import Sheet, TextBook
+
+
+class Command(BaseCommand):
+    help = "Merge manual textbooks whose names differ only in case or spacing"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Number of duplicate groups merged per transaction",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report duplicate groups",
+        )
+
+    def handle(self, *args, **options):
+        if options["dry_run"]:
+            groups = utils.find_duplicate_textbooks(TextBook)
+            for pks in groups:
+                textbooks = TextBook.objects.filter(pk__in=pks).order_by("pk")
+                self.stdout.write(
+                    f"  [{textbooks[0].subject}] "
+                    + ", ".join(textbook.name for textbook in textbooks)
+                )
+            self.stdout.write(f"Found {len(groups)} duplicate groups.")
+            return
+
+        merged, removed = utils.merge_duplicate_textbooks(
+            TextBook,
+            Sheet,
+            batch_size=options["batch_size"],
+        )
+        self.stdout.write(f"Merged {merged} groups, removed {removed} textbooks.")
+
+        # Keys may change when normalization changes
+        updated = utils.update_textbook_keys(TextBook)
+        self.stdout.write(self.style.SUCCESS(f"Updated {updated} name keys."))
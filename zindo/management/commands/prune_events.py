@@ -0,0 +1,25 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from zindo.models import Event
+
+
+class Command(BaseCommand):
+    help = "Delete events older than clients may resume from"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.EVENT_RETENTION_DAYS,
+            help="Number of days events are kept",
+        )
+
+    def handle(self, *args, **options):
+        before = timezone.now() - datetime.timedelta(days=options["days"])
+        deleted, _ = Event.objects.filter(created_at__lt=before).delete()
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} events."))
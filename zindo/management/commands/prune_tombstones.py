@@ -0,0 +1,25 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from zindo.models import Tombstone
+
+
+class Command(BaseCommand):
+    help = "Delete tombstones older than clients may sync from"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.TOMBSTONE_RETENTION_DAYS,
+            help="Number of days tombstones are kept",
+        )
+
+    def handle(self, *args, **options):
+        before = timezone.now() - datetime.timedelta(days=options["days"])
+        deleted, _ = Tombstone.objects.filter(deleted_at__lt=before).delete()
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} tombstones."))
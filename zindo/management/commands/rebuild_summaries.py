@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from zindo import utils
+from zindo.models import DailyActivity, Record, Sheet
+
+
+class Command(BaseCommand):
+    help = "Recompute data derived from records of sheets"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of sheets updated per transaction",
+        )
+
+    def handle(self, *args, **options):
+        updated = utils.refresh_all_sheet_summaries(
+            Sheet,
+            Record,
+            batch_size=options["batch_size"],
+        )
+        self.stdout.write(f"Refreshed {updated} sheets.")
+
+        created = utils.refresh_all_daily_activities(
+            Sheet,
+            DailyActivity,
+            Record,
+            batch_size=options["batch_size"],
+        )
+        self.stdout.write(f"Rebuilt {created} daily activity rows.")
+
+        updated = utils.refresh_all_sheet_forecasts(
+            Sheet,
+            DailyActivity,
+            batch_size=options["batch_size"],
+        )
+        self.stdout.write(f"Refreshed forecasts of {updated} sheets.")
+
+        updated = utils.refresh_all_sheet_coverages(
+            Sheet,
+            Record,
+            batch_size=options["batch_size"],
+        )
+        self.stdout.write(f"Rebuilt coverage of {updated} sheets.")
+
+        # Expire cached timelines and analytics, keyed on modification of sheets
+        Sheet.objects.update(updated_at=timezone.now())
+        self.stdout.write(self.style.SUCCESS("Rebuild complete."))
@@ -1,9 +1,12 @@
 import datetime
+import random
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 from django.utils import timezone
 
-from zindo.models import Record, Sheet, Student, TextBook
+from zindo import signals, utils
+from zindo.models import DailyActivity, Record, Sheet, StatsBatch, Student, TextBook
 
 
 STUDENTS = [
@@ -63,6 +66,36 @@ RECORDS = [
     (7, 1, 3, 2, None),
 ]
 
+# Scale mode pools
+FAMILY_NAMES = "김이박최정강조윤장임한오서신권황안송류홍"
+GIVEN_NAMES = "민서지하준도윤예은수아현우주원채연시유진호건태린"
+
+SERIES = {
+    "수학": ["쎈 수학", "디딤돌 수학", "개념원리 연산", "기적의 계산법"],
+    "국어": ["디딤돌 국어 독해력", "기적의 독해력", "하루 한 장 문법"],
+    "영어": ["Bricks Reading", "Grammar Inside", "영어 읽기 기초"],
+    "과학": ["천재 과학", "오투 과학"],
+}
+
+NOTES = [
+    "오늘 집중력 좋았음",
+    "곱셈 개념 이해 느림, 반복 필요",
+    "지문 이해 잘 함",
+    "독해 속도 개선 중",
+    "숙제 미완료",
+    "오답 정리 필요",
+    "복습 위주로 진행",
+]
+
+# Number of sheets a student works on at the same time
+TRACKS = 3
+
+# Probability that a student studies on a weekday, and the note rate
+ATTENDANCE = 0.85
+NOTE_RATE = 0.1
+
+INACTIVE_RATE = 0.1
+
 
 class Command(BaseCommand):
     help = "Seed the database with dummy data for development"
@@ -73,15 +106,57 @@ class Command(BaseCommand):
             action="store_true",
             help="Delete all existing data before seeding",
         )
+        parser.add_argument(
+            "--students",
+            type=int,
+            help="Generate this many students (enables scale mode)",
+        )
+        parser.add_argument(
+            "--sheets-per-student",
+            type=int,
+            default=6,
+            help="Number of sheets per student in scale mode",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=365,
+            help="Number of days of history to generate in scale mode",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Random seed for scale mode",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Rows per bulk insert in scale mode",
+        )
 
     def handle(self, *args, **options):
         if options["flush"]:
-            Record.objects.all().delete()
-            Sheet.objects.all().delete()
-            TextBook.objects.all().delete()
-            Student.objects.all().delete()
+            # Deleting through signals would load every record
+            with transaction.atomic(), signals.untracked_deletes():
+                Record.objects.all().delete()
+                Sheet.objects.all().delete()
+                TextBook.objects.all().delete()
+                Student.objects.all().delete()
+                StatsBatch.objects.all().delete()
             self.stdout.write("Flushed existing data.")
 
+        if options["students"] is not None:
+            self.seed_scale(
+                students=options["students"],
+                sheets_per_student=options["sheets_per_student"],
+                days=options["days"],
+                seed=options["seed"],
+                batch_size=options["batch_size"],
+            )
+            return
+
         students = [Student.objects.create(**s) for s in STUDENTS]
         self.stdout.write(f"Created {len(students)} students.")
 
@@ -111,3 +186,189 @@ class Command(BaseCommand):
         self.stdout.write(f"Created {len(records)} records.")
 
         self.stdout.write(self.style.SUCCESS("Seed complete."))
+
+    @transaction.atomic
+    def seed_scale(self, students, sheets_per_student, days, seed, batch_size):
+        """Generate a large deterministic dataset.
+
+        Each student works on up to `TRACKS` sheets at the same time,
+        and each track starts late enough to end with a sheet in progress.
+        A sheet advances by about `pace` pages on every studied weekday,
+        is finished once it reaches the last page of its textbook,
+        and the next sheet of the track starts on the following day.
+        Sheets still in progress at the end of the range stay active.
+
+        The same seed always produces the same data, anchored at today.
+
+        """
+
+        rng = random.Random(seed)
+        today = timezone.localdate()
+        start_date = today - datetime.timedelta(days=days - 1)
+        tz = timezone.get_current_timezone()
+
+        # Textbook catalog
+        textbooks = TextBook.objects.bulk_create(
+            [
+                TextBook(
+                    name=f"{series} {level}단계",
+                    subject=subject,
+                    total_pages=rng.randrange(60, 200, 4),
+                )
+                for subject, series_list in SERIES.items()
+                for series in series_list
+                for level in range(1, 13)
+            ],
+            batch_size=batch_size,
+        )
+        pages = {textbook.pk: textbook.total_pages for textbook in textbooks}
+        self.stdout.write(f"Created {len(textbooks)} textbooks.")
+
+        if sheets_per_student > len(textbooks):
+            raise CommandError(
+                f"--sheets-per-student cannot exceed {len(textbooks)} textbooks."
+            )
+
+        student_objs = Student.objects.bulk_create(
+            [
+                Student(
+                    name=rng.choice(FAMILY_NAMES) + "".join(rng.sample(GIVEN_NAMES, 2)),
+                    admission_date=datetime.date(today.year - rng.randrange(6), 3, 2),
+                    is_active=rng.random() >= INACTIVE_RATE,
+                )
+                for _ in range(students)
+            ],
+            batch_size=batch_size,
+        )
+        self.stdout.write(f"Created {len(student_objs)} students.")
+
+        sheet_count = 0
+        record_count = 0
+        records = []
+
+        for student in student_objs:
+            # Plan sheets of the student, then insert them at once
+            plans = []
+            for index, textbook in enumerate(rng.sample(textbooks, sheets_per_student)):
+                plans.append(
+                    {
+                        "track": index % TRACKS,
+                        "sheet": Sheet(
+                            student=student,
+                            textbook=textbook,
+                            pace=rng.randint(2, 6),
+                            is_finished=False,
+                        ),
+                        "pages": pages[textbook.pk],
+                    }
+                )
+
+            # Start each track so that its last sheet is still in progress
+            days_by_track = {}
+            for track in range(TRACKS):
+                study_days = sum(
+                    plan["pages"] / plan["sheet"].pace
+                    for plan in plans
+                    if plan["track"] == track
+                )
+                span = study_days / (5 / 7 * ATTENDANCE) * rng.uniform(0.8, 0.98)
+                days_by_track[track] = max(
+                    start_date,
+                    today - datetime.timedelta(days=int(span)),
+                )
+
+            for plan in plans:
+                track_start = days_by_track[plan["track"]]
+                plan["rows"], next_start, plan["sheet"].is_finished = self.plan_records(
+                    rng,
+                    track_start,
+                    today,
+                    plan["sheet"].pace,
+                    plan["pages"],
+                )
+                days_by_track[plan["track"]] = next_start
+
+            # Sheets never started within the range are dropped
+            plans = [plan for plan in plans if plan["rows"]]
+            Sheet.objects.bulk_create([plan["sheet"] for plan in plans])
+            sheet_count += len(plans)
+
+            for plan in plans:
+                for date, start, end in plan["rows"]:
+                    created_at = datetime.datetime.combine(
+                        date,
+                        datetime.time(rng.randint(14, 20), rng.randrange(60)),
+                        tzinfo=tz,
+                    )
+                    records.append(
+                        Record(
+                            sheet_id=plan["sheet"].pk,
+                            created_at=created_at,
+                            progress={"type": "range", "start": start, "end": end},
+                            note=rng.choice(NOTES)
+                            if rng.random() < NOTE_RATE
+                            else None,
+                        )
+                    )
+
+            if len(records) >= batch_size:
+                Record.objects.bulk_create(records, batch_size=batch_size)
+                record_count += len(records)
+                records = []
+
+        Record.objects.bulk_create(records, batch_size=batch_size)
+        record_count += len(records)
+        self.stdout.write(f"Created {sheet_count} sheets.")
+        self.stdout.write(f"Created {record_count} records.")
+
+        # Bulk inserts skip signals maintaining summaries
+        utils.refresh_sheet_summaries(Sheet.objects.all(), Record)
+        utils.refresh_daily_activities(Sheet.objects.all(), DailyActivity, Record)
+        utils.refresh_sheet_forecasts(Sheet.objects.all(), DailyActivity)
+        utils.refresh_sheet_coverages(Sheet.objects.all(), Record)
+        self.stdout.write("Refreshed data derived from records.")
+
+        # Monthly stats batches for active students
+        active_ids = [student.pk for student in student_objs if student.is_active]
+        batches = []
+        month = start_date.replace(day=1)
+        while month <= today:
+            next_month = (month + datetime.timedelta(days=32)).replace(day=1)
+            batches.append(
+                StatsBatch(
+                    title=f"{month.year}년 {month.month}월 학습 통계",
+                    start_date=month,
+                    end_date=next_month - datetime.timedelta(days=1),
+                    student_ids=active_ids,
+                    global_newsletter=f"{month.month}월 한 달 동안 수고 많았습니다.",
+                )
+            )
+            month = next_month
+        StatsBatch.objects.bulk_create(batches, batch_size=batch_size)
+        self.stdout.write(f"Created {len(batches)} stats batches.")
+
+        self.stdout.write(self.style.SUCCESS("Seed complete."))
+
+    def plan_records(self, rng, start_date, end_date, pace, pages):
+        """Plan daily progress ranges of a single sheet.
+
+        Returns the planned `(date, start, end)` rows, the date the next
+        sheet of the track may start on, and whether the sheet finished.
+
+        """
+
+        rows = []
+        page = 1
+        date = start_date
+
+        while date <= end_date:
+            if date.weekday() < 5 and rng.random() < ATTENDANCE:
+                end = min(page + max(1, pace + rng.randint(-1, 1)) - 1, pages)
+                rows.append((date, page, end))
+                page = end + 1
+            date += datetime.timedelta(days=1)
+
+            if page > pages:
+                return rows, date, True
+
+        return rows, date, False
@@ -0,0 +1,128 @@
+import collections
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+# Boots the app as a worker does, reporting each phase on stdout
+BOOT_SCRIPT = """
+import json, os, sys, time
+
+started = time.perf_counter()
+phases = {}
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+import django
+from django.conf import settings
+settings.INSTALLED_APPS
+phases["settings"] = time.perf_counter()
+
+django.setup(set_prefix=False)
+phases["apps"] = time.perf_counter()
+
+from django.urls import get_resolver
+get_resolver().url_patterns
+phases["urls"] = time.perf_counter()
+
+last = started
+for name, at in phases.items():
+    phases[name], last = (at - last) * 1000, at
+phases["total"] = (last - started) * 1000
+print(json.dumps(phases))
+"""
+
+
+def parse_import_times(stderr):
+    """Get self time in microseconds by module, from `-X importtime` output."""
+
+    # Lines read "import time: self | cumulative | name", after a header
+    imports = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_time, _, name = line.removeprefix("import time:").split("|")
+        imports[name.strip()] = int(self_time)
+
+    return imports
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure startup of a worker in fresh interpreters, "
+        "by boot phase and by imported module"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Number of interpreters booted, reported by median",
+        )
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=20,
+            help="Number of top-level packages listed by import time",
+        )
+        parser.add_argument(
+            "--modules",
+            action="store_true",
+            help="List modules instead of top-level packages",
+        )
+
+    def handle(self, *args, **options):
+        runs = [self.boot() for _ in range(max(options["repeat"], 1))]
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Boot phases (median)"))
+        for phase in runs[0]["phases"]:
+            median = statistics.median(run["phases"][phase] for run in runs)
+            self.stdout.write(f"  {phase:<12} {median:8.1f}ms")
+
+        # Self times add up to the import cost of a package
+        imports = collections.defaultdict(list)
+        for run in runs:
+            totals = collections.Counter()
+            for module, self_time in run["imports"].items():
+                name = module if options["modules"] else module.split(".")[0]
+                totals[name] += self_time
+            for name, total in totals.items():
+                imports[name].append(total)
+
+        medians = sorted(
+            ((statistics.median(times), name) for name, times in imports.items()),
+            reverse=True,
+        )
+        total = sum(median for median, _ in medians)
+
+        self.stdout.write(
+            self.style.MIGRATE_HEADING(
+                f"Imports (median, {len(medians)} "
+                f"{'modules' if options['modules'] else 'packages'}, "
+                f"{total / 1000:.1f}ms)"
+            )
+        )
+        for median, name in medians[: options["top"]]:
+            self.stdout.write(
+                f"  {name:<48} {median / 1000:8.1f}ms {median / total:6.1%}"
+            )
+
+    def boot(self):
+        """Boot a fresh interpreter, and return its phases and import times."""
+
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", BOOT_SCRIPT],
+            capture_output=True,
+            text=True,
+            env=os.environ,
+        )
+        if result.returncode != 0:
+            raise CommandError(f"Boot failed:\n{result.stderr[-2000:]}")
+
+        return {
+            "phases": json.loads(result.stdout),
+            "imports": parse_import_times(result.stderr),
+        }
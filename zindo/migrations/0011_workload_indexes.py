@@ -0,0 +1,56 @@
+# Generated by Django 6.1.2 on 2026-10-19 16:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("zindo", "0010_statsbatch"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="record",
+            index=models.Index(
+                fields=["sheet", "created_at"], name="record_sheet_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="record",
+            index=models.Index(fields=["created_at"], name="record_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="sheet",
+            index=models.Index(
+                condition=models.Q(("is_finished", False)),
+                fields=["student", "textbook"],
+                name="sheet_active_textbook_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="student",
+            index=models.Index(fields=["name"], name="student_name_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="student",
+            index=models.Index(
+                fields=["admission_date"], name="student_admission_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="student",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["name"],
+                name="student_active_name_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="textbook",
+            index=models.Index(
+                condition=models.Q(("isbn__isnull", False)),
+                fields=["isbn"],
+                name="textbook_isbn_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 6.1.2 on 2026-10-19 16:33
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def finish_duplicate_sheets(apps, schema_editor):
+    """Keep only the latest active sheet per student and textbook.
+
+    Duplicates could be created by concurrent requests before the constraint.
+    Older ones are marked finished, so no sheet or record is lost.
+
+    """
+
+    Sheet = apps.get_model("zindo", "Sheet")
+
+    duplicates = (
+        Sheet.objects.filter(is_finished=False)
+        .values("student", "textbook")
+        .annotate(count=Count("pk"), latest=Max("pk"))
+        .filter(count__gt=1)
+    )
+    for duplicate in duplicates:
+        Sheet.objects.filter(
+            student=duplicate["student"],
+            textbook=duplicate["textbook"],
+            is_finished=False,
+        ).exclude(pk=duplicate["latest"]).update(is_finished=True)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("zindo", "0011_workload_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            finish_duplicate_sheets,
+            migrations.RunPython.noop,
+        ),
+        migrations.RemoveIndex(
+            model_name="sheet",
+            name="sheet_active_textbook_idx",
+        ),
+        migrations.AddConstraint(
+            model_name="sheet",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("is_finished", False)),
+                fields=("student", "textbook"),
+                name="sheet_unique_active_textbook",
+            ),
+        ),
+    ]
@@ -0,0 +1,106 @@
+# Generated by Django 6.1.2 on 2026-10-19 16:36
+
+import collections
+import re
+import unicodedata
+
+from django.db import migrations, models, transaction
+from django.db.models import Count, Max
+
+# Helpers are copied from `zindo.utils` as of this migration,
+# so later changes there never change what it does
+
+
+def normalize_name(name):
+    name = unicodedata.normalize("NFKC", name).casefold()
+
+    return re.sub(r"\s+", "", name)
+
+
+def merge_duplicate_textbooks(apps, schema_editor):
+    """Merge duplicates the constraint would reject, then fill name keys.
+
+    The oldest textbook of each group is kept, and sheets of the others
+    are repointed to it. If a student had active sheets on several
+    textbooks of a group, only the latest one stays active.
+
+    """
+
+    TextBook = apps.get_model("zindo", "TextBook")
+    Sheet = apps.get_model("zindo", "Sheet")
+
+    groups = collections.defaultdict(list)
+    textbooks = (
+        TextBook.objects.filter(isbn__isnull=True)
+        .order_by("pk")
+        .values_list("pk", "subject", "name")
+    )
+    for pk, subject, name in textbooks.iterator():
+        groups[(subject, normalize_name(name))].append(pk)
+    groups = [pks for pks in groups.values() if len(pks) > 1]
+
+    for index in range(0, len(groups), 100):
+        with transaction.atomic():
+            for canonical, *duplicates in groups[index : index + 100]:
+                textbooks = [canonical, *duplicates]
+
+                conflicts = (
+                    Sheet.objects.filter(textbook__in=textbooks, is_finished=False)
+                    .values("student")
+                    .annotate(count=Count("pk"), latest=Max("pk"))
+                    .filter(count__gt=1)
+                )
+                for conflict in conflicts:
+                    Sheet.objects.filter(
+                        student=conflict["student"],
+                        textbook__in=textbooks,
+                        is_finished=False,
+                    ).exclude(pk=conflict["latest"]).update(is_finished=True)
+
+                Sheet.objects.filter(textbook__in=duplicates).update(textbook=canonical)
+                TextBook.objects.filter(pk__in=duplicates).delete()
+
+    batch = []
+    for textbook in TextBook.objects.only("pk", "name").order_by("pk").iterator():
+        textbook.name_key = normalize_name(textbook.name)
+        batch.append(textbook)
+
+        if len(batch) >= 1000:
+            TextBook.objects.bulk_update(batch, ["name_key"])
+            batch = []
+
+    TextBook.objects.bulk_update(batch, ["name_key"])
+
+
+class Migration(migrations.Migration):
+    # Batches commit on their own
+    atomic = False
+
+    dependencies = [
+        ("zindo", "0012_sheet_unique_active_textbook"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="textbook",
+            name="name_key",
+            field=models.CharField(
+                default="",
+                editable=False,
+                max_length=64,
+                verbose_name="교재명 검색 키",
+            ),
+        ),
+        migrations.RunPython(
+            merge_duplicate_textbooks,
+            migrations.RunPython.noop,
+        ),
+        migrations.AddConstraint(
+            model_name="textbook",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("isbn__isnull", True)),
+                fields=("subject", "name_key"),
+                name="textbook_unique_manual_name",
+            ),
+        ),
+    ]
@@ -0,0 +1,131 @@
+# Generated by Django 6.1.2 on 2026-10-19 16:41
+
+from django.db import migrations, models, transaction
+from django.db.models import (
+    Case,
+    Count,
+    IntegerField,
+    OuterRef,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.fields.json import KT
+from django.db.models.functions import Cast, Coalesce
+from django.db.models.lookups import GreaterThanOrEqual
+
+# Helpers are copied from `zindo.utils` as of this migration,
+# so later changes there never change what it does
+
+
+def count_pages_expression():
+    start = Cast(KT("progress__start"), IntegerField())
+    end = Cast(KT("progress__end"), IntegerField())
+
+    return Case(
+        When(
+            GreaterThanOrEqual(end, start),
+            progress__type="range",
+            then=end - start + 1,
+        ),
+        default=Value(0),
+    )
+
+
+def sheet_batches(Sheet, batch_size=1000):
+    pks = list(Sheet.objects.order_by("pk").values_list("pk", flat=True))
+
+    for index in range(0, len(pks), batch_size):
+        yield Sheet.objects.filter(pk__in=pks[index : index + batch_size])
+
+
+def fill_sheet_summaries(apps, schema_editor):
+    Sheet = apps.get_model("zindo", "Sheet")
+    Record = apps.get_model("zindo", "Record")
+
+    records = Record.objects.filter(sheet=OuterRef("pk")).values("sheet")
+    latest = Record.objects.filter(sheet=OuterRef("pk")).order_by(
+        "-created_at",
+        "-pk",
+    )
+
+    for sheets in sheet_batches(Sheet):
+        with transaction.atomic():
+            sheets.update(
+                record_count=Coalesce(
+                    Subquery(records.annotate(count=Count("pk")).values("count")),
+                    0,
+                ),
+                pages_covered=Coalesce(
+                    Subquery(
+                        records.annotate(pages=Sum(count_pages_expression())).values(
+                            "pages"
+                        )
+                    ),
+                    0,
+                ),
+                last_recorded_at=Subquery(latest.values("created_at")[:1]),
+                last_progress_end=Subquery(
+                    latest.filter(progress__type="range")
+                    .annotate(end=Cast(KT("progress__end"), IntegerField()))
+                    .values("end")[:1]
+                ),
+            )
+
+
+class Migration(migrations.Migration):
+    # Batches commit on their own
+    atomic = False
+
+    dependencies = [
+        ("zindo", "0013_textbook_name_key"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="sheet",
+            name="last_progress_end",
+            field=models.PositiveIntegerField(
+                blank=True, editable=False, null=True, verbose_name="마지막 진도"
+            ),
+        ),
+        migrations.AddField(
+            model_name="sheet",
+            name="last_recorded_at",
+            field=models.DateTimeField(
+                blank=True, editable=False, null=True, verbose_name="마지막 학습일"
+            ),
+        ),
+        migrations.AddField(
+            model_name="sheet",
+            name="pages_covered",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="학습 분량"
+            ),
+        ),
+        migrations.AddField(
+            model_name="sheet",
+            name="record_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="기록 수"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="sheet",
+            index=models.Index(
+                fields=["last_recorded_at"], name="sheet_last_recorded_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="sheet",
+            index=models.Index(
+                fields=["student", "last_recorded_at"],
+                name="sheet_student_recorded_idx",
+            ),
+        ),
+        migrations.RunPython(
+            fill_sheet_summaries,
+            migrations.RunPython.noop,
+        ),
+    ]
@@ -0,0 +1,136 @@
+# Generated by Django 6.1.2 on 2026-10-19 16:45
+
+import django.db.models.deletion
+from django.db import migrations, models, transaction
+from django.db.models import Case, Count, IntegerField, Sum, Value, When
+from django.db.models.fields.json import KT
+from django.db.models.functions import Cast, TruncDate
+from django.db.models.lookups import GreaterThanOrEqual
+from django.utils import timezone
+
+# Helpers are copied from `zindo.utils` as of this migration,
+# so later changes there never change what it does
+
+
+def count_pages_expression():
+    start = Cast(KT("progress__start"), IntegerField())
+    end = Cast(KT("progress__end"), IntegerField())
+
+    return Case(
+        When(
+            GreaterThanOrEqual(end, start),
+            progress__type="range",
+            then=end - start + 1,
+        ),
+        default=Value(0),
+    )
+
+
+def sheet_batches(Sheet, batch_size=1000):
+    pks = list(Sheet.objects.order_by("pk").values_list("pk", flat=True))
+
+    for index in range(0, len(pks), batch_size):
+        yield Sheet.objects.filter(pk__in=pks[index : index + batch_size])
+
+
+def fill_daily_activities(apps, schema_editor):
+    """Roll up records of every sheet by local date of `created_at`."""
+
+    Sheet = apps.get_model("zindo", "Sheet")
+    DailyActivity = apps.get_model("zindo", "DailyActivity")
+    Record = apps.get_model("zindo", "Record")
+
+    for sheets in sheet_batches(Sheet):
+        with transaction.atomic():
+            DailyActivity.objects.filter(sheet__in=sheets).delete()
+
+            rows = (
+                Record.objects.filter(sheet__in=sheets)
+                .annotate(
+                    date=TruncDate(
+                        "created_at",
+                        tzinfo=timezone.get_current_timezone(),
+                    )
+                )
+                .values("sheet", "sheet__student", "date")
+                .annotate(count=Count("pk"), pages=Sum(count_pages_expression()))
+                .order_by()
+            )
+            DailyActivity.objects.bulk_create(
+                DailyActivity(
+                    date=row["date"],
+                    student_id=row["sheet__student"],
+                    sheet_id=row["sheet"],
+                    record_count=row["count"],
+                    pages=row["pages"],
+                )
+                for row in rows
+            )
+
+
+class Migration(migrations.Migration):
+    # Batches commit on their own
+    atomic = False
+
+    dependencies = [
+        ("zindo", "0014_sheet_summary"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyActivity",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(verbose_name="학습일")),
+                (
+                    "record_count",
+                    models.PositiveIntegerField(default=0, verbose_name="기록 수"),
+                ),
+                (
+                    "pages",
+                    models.PositiveIntegerField(default=0, verbose_name="학습 분량"),
+                ),
+                (
+                    "sheet",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="zindo.sheet",
+                        verbose_name="기록지",
+                    ),
+                ),
+                (
+                    "student",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="zindo.student",
+                        verbose_name="학생",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["student", "date"], name="activity_student_date_idx"
+                    ),
+                    models.Index(fields=["date"], name="activity_date_idx"),
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("sheet", "date"), name="activity_unique_sheet_date"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(
+            fill_daily_activities,
+            migrations.RunPython.noop,
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.1.2 on 2026-10-19 17:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("zindo", "0015_dailyactivity"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="sheet",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True,
+                default=django.utils.timezone.now,
+                verbose_name="수정일",
+            ),
+            preserve_default=False,
+        ),
+    ]
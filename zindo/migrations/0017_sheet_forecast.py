@@ -0,0 +1,136 @@
+# Generated by Django 6.1.2 on 2026-10-19 16:53
+
+import datetime
+import math
+
+from django.db import migrations, models, transaction
+
+# Helpers are copied from `zindo.utils` as of this migration,
+# so later changes there never change what it does
+
+PACE_SMOOTHING = 2 / (14 + 1)
+
+
+def sheet_batches(Sheet, batch_size=1000):
+    pks = list(Sheet.objects.order_by("pk").values_list("pk", flat=True))
+
+    for index in range(0, len(pks), batch_size):
+        yield Sheet.objects.filter(pk__in=pks[index : index + batch_size])
+
+
+def add_pace(average, pace_date, date, pages, prior=None):
+    decay = 1 - PACE_SMOOTHING
+
+    if pace_date is None:
+        return (prior or 0) * decay + PACE_SMOOTHING * pages, date
+
+    if date > pace_date:
+        average *= decay ** (date - pace_date).days
+        return average + PACE_SMOOTHING * pages, date
+
+    return average + PACE_SMOOTHING * decay ** (
+        pace_date - date
+    ).days * pages, pace_date
+
+
+def get_behind_since(average, pace_date, pace):
+    if average is None or pace is None or pace <= 0:
+        return None
+
+    if average < pace:
+        return pace_date
+
+    days = math.log(pace / average) / math.log(1 - PACE_SMOOTHING)
+
+    return pace_date + datetime.timedelta(days=math.floor(days) + 1)
+
+
+def fill_sheet_forecasts(apps, schema_editor):
+    """Replay daily activity of every sheet into its pace average."""
+
+    Sheet = apps.get_model("zindo", "Sheet")
+    DailyActivity = apps.get_model("zindo", "DailyActivity")
+
+    for sheets in sheet_batches(Sheet):
+        with transaction.atomic():
+            paces = dict(sheets.values_list("pk", "pace"))
+            forecasts = {}
+
+            activities = (
+                DailyActivity.objects.filter(sheet__in=list(paces))
+                .order_by("sheet", "date")
+                .values_list("sheet", "date", "pages")
+            )
+            for sheet, date, pages in activities.iterator():
+                average, pace_date = forecasts.get(sheet, (None, None))
+                forecasts[sheet] = add_pace(
+                    average, pace_date, date, pages, paces[sheet]
+                )
+
+            objs = []
+            for pk, pace in paces.items():
+                average, pace_date = forecasts.get(pk, (None, None))
+                objs.append(
+                    Sheet(
+                        pk=pk,
+                        pace_average=average,
+                        pace_date=pace_date,
+                        behind_since=get_behind_since(average, pace_date, pace),
+                    )
+                )
+            Sheet.objects.bulk_update(
+                objs,
+                ["pace_average", "pace_date", "behind_since"],
+            )
+
+
+class Migration(migrations.Migration):
+    # Batches commit on their own
+    atomic = False
+
+    dependencies = [
+        ("zindo", "0016_sheet_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="sheet",
+            name="behind_since",
+            field=models.DateField(
+                blank=True, editable=False, null=True, verbose_name="진도 지연 시작일"
+            ),
+        ),
+        migrations.AddField(
+            model_name="sheet",
+            name="pace_average",
+            field=models.FloatField(
+                blank=True, editable=False, null=True, verbose_name="최근 학습 속도"
+            ),
+        ),
+        migrations.AddField(
+            model_name="sheet",
+            name="pace_date",
+            field=models.DateField(
+                blank=True, editable=False, null=True, verbose_name="학습 속도 기준일"
+            ),
+        ),
+        migrations.AddField(
+            model_name="textbook",
+            name="total_pages",
+            field=models.PositiveIntegerField(
+                blank=True, null=True, verbose_name="총 페이지 수"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="sheet",
+            index=models.Index(
+                condition=models.Q(("is_finished", False)),
+                fields=["behind_since"],
+                name="sheet_active_behind_idx",
+            ),
+        ),
+        migrations.RunPython(
+            fill_sheet_forecasts,
+            migrations.RunPython.noop,
+        ),
+    ]
@@ -0,0 +1,101 @@
+# Generated by Django 6.1.2 on 2026-10-19 16:56
+
+import collections
+
+from django.db import migrations, models, transaction
+
+# Helpers are copied from `zindo.utils` as of this migration,
+# so later changes there never change what it does
+
+
+def sheet_batches(Sheet, batch_size=1000):
+    pks = list(Sheet.objects.order_by("pk").values_list("pk", flat=True))
+
+    for index in range(0, len(pks), batch_size):
+        yield Sheet.objects.filter(pk__in=pks[index : index + batch_size])
+
+
+def parse_range(progress):
+    if not isinstance(progress, dict) or progress.get("type") != "range":
+        return None
+
+    start, end = progress.get("start"), progress.get("end")
+    if not isinstance(start, int) or not isinstance(end, int) or end < start:
+        return None
+
+    return start, end
+
+
+def sweep_coverage(changes):
+    segments = []
+    count = 0
+    previous = None
+
+    for page in sorted(changes):
+        if previous is not None and count > 0:
+            if (
+                segments
+                and segments[-1][1] == previous - 1
+                and segments[-1][2] == count
+            ):
+                segments[-1][1] = page - 1
+            else:
+                segments.append([previous, page - 1, count])
+
+        count += changes[page]
+        previous = page
+
+    return segments
+
+
+def fill_sheet_coverages(apps, schema_editor):
+    """Build coverage segments of every sheet from its range records."""
+
+    Sheet = apps.get_model("zindo", "Sheet")
+    Record = apps.get_model("zindo", "Record")
+
+    for sheets in sheet_batches(Sheet):
+        with transaction.atomic():
+            changes = {
+                pk: collections.Counter() for pk in sheets.values_list("pk", flat=True)
+            }
+
+            records = Record.objects.filter(
+                sheet__in=list(changes),
+                progress__type="range",
+            ).values_list("sheet", "progress")
+            for sheet, progress in records.iterator():
+                if (pages := parse_range(progress)) is not None:
+                    changes[sheet][pages[0]] += 1
+                    changes[sheet][pages[1] + 1] -= 1
+
+            Sheet.objects.bulk_update(
+                [
+                    Sheet(pk=pk, coverage=sweep_coverage(counter))
+                    for pk, counter in changes.items()
+                ],
+                ["coverage"],
+            )
+
+
+class Migration(migrations.Migration):
+    # Batches commit on their own
+    atomic = False
+
+    dependencies = [
+        ("zindo", "0017_sheet_forecast"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="sheet",
+            name="coverage",
+            field=models.JSONField(
+                default=list, editable=False, verbose_name="학습 범위"
+            ),
+        ),
+        migrations.RunPython(
+            fill_sheet_coverages,
+            migrations.RunPython.noop,
+        ),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 6.1.2 on 2026-10-19 17:06
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("zindo", "0018_sheet_coverage"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Tombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "model",
+                    models.CharField(
+                        choices=[
+                            ("student", "학생"),
+                            ("textbook", "교재"),
+                            ("sheet", "기록지"),
+                            ("record", "기록"),
+                        ],
+                        max_length=16,
+                        verbose_name="모델",
+                    ),
+                ),
+                ("object_id", models.PositiveBigIntegerField(verbose_name="ID")),
+                (
+                    "deleted_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="삭제일"),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="record",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True,
+                default=django.utils.timezone.now,
+                verbose_name="수정일",
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="student",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True,
+                default=django.utils.timezone.now,
+                verbose_name="수정일",
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="textbook",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True,
+                default=django.utils.timezone.now,
+                verbose_name="수정일",
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name="record",
+            index=models.Index(fields=["updated_at"], name="record_updated_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="sheet",
+            index=models.Index(fields=["updated_at"], name="sheet_updated_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="student",
+            index=models.Index(fields=["updated_at"], name="student_updated_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="textbook",
+            index=models.Index(fields=["updated_at"], name="textbook_updated_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="tombstone",
+            index=models.Index(fields=["deleted_at"], name="tombstone_deleted_idx"),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 6.1.2 on 2026-10-19 17:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("zindo", "0019_sync"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Event",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("record.created", "기록 생성"),
+                            ("record.updated", "기록 수정"),
+                            ("record.deleted", "기록 삭제"),
+                            ("sheet.finished", "기록지 완료"),
+                        ],
+                        max_length=16,
+                        verbose_name="종류",
+                    ),
+                ),
+                ("student_id", models.PositiveBigIntegerField(verbose_name="학생 ID")),
+                ("sheet_id", models.PositiveBigIntegerField(verbose_name="기록지 ID")),
+                ("object_id", models.PositiveBigIntegerField(verbose_name="ID")),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="발생일"),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["student_id", "id"], name="event_student_idx"),
+                    models.Index(fields=["created_at"], name="event_created_idx"),
+                ],
+            },
+        ),
+    ]
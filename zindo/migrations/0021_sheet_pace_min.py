@@ -0,0 +1,23 @@
+# Generated by Django 6.1.2 on 2026-10-19 17:46
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("zindo", "0020_event"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="sheet",
+            name="pace",
+            field=models.SmallIntegerField(
+                blank=True,
+                null=True,
+                validators=[django.core.validators.MinValueValidator(1)],
+                verbose_name="하루 목표 학습량",
+            ),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.core.validators import MinValueValidator
+from django.db import models, transaction
 from django.utils import timezone
 
 from . import utils
@@ -19,6 +20,31 @@ class Student(models.Model):
         "활성화된 아동",
         default=True,
     )
+    updated_at = models.DateTimeField(
+        "수정일",
+        auto_now=True,
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["updated_at"],
+                name="student_updated_idx",
+            ),
+            models.Index(
+                fields=["name"],
+                name="student_name_idx",
+            ),
+            models.Index(
+                fields=["admission_date"],
+                name="student_admission_date_idx",
+            ),
+            models.Index(
+                fields=["name"],
+                condition=models.Q(is_active=True),
+                name="student_active_name_idx",
+            ),
+        ]
 
     def __str__(self):
         return (
@@ -28,6 +54,23 @@ class Student(models.Model):
 
 
 class TextBookManager(models.Manager):
+    def bulk_create(self, objs, *args, **kwargs):
+        # Bulk insert skips `save()`, so fill lookup keys here
+        for obj in objs:
+            obj.name_key = utils.normalize_name(obj.name)
+
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def get_or_create_manual(self, name, subject):
+        """Get or create textbook without isbn by normalized name."""
+
+        return self.get_or_create(
+            subject=subject,
+            name_key=utils.normalize_name(name),
+            isbn=None,
+            defaults={"name": name},
+        )
+
     def create_from_isbn(self, isbn):
         # Check if textbook with given isbn exists on database
         if self.filter(isbn=isbn).exists():
@@ -72,9 +115,54 @@ class TextBook(models.Model):
         null=True,
         blank=True,
     )
+    total_pages = models.PositiveIntegerField(
+        "총 페이지 수",
+        null=True,
+        blank=True,
+    )
+    name_key = models.CharField(
+        "교재명 검색 키",
+        max_length=64,
+        editable=False,
+        default="",
+    )
+    updated_at = models.DateTimeField(
+        "수정일",
+        auto_now=True,
+    )
 
     objects = TextBookManager()
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["updated_at"],
+                name="textbook_updated_idx",
+            ),
+            models.Index(
+                fields=["isbn"],
+                condition=models.Q(isbn__isnull=False),
+                name="textbook_isbn_idx",
+            ),
+        ]
+        constraints = [
+            # Manual textbooks are unique by subject and normalized name
+            models.UniqueConstraint(
+                fields=["subject", "name_key"],
+                condition=models.Q(isbn__isnull=True),
+                name="textbook_unique_manual_name",
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.name_key = utils.normalize_name(self.name)
+
+        if (update_fields := kwargs.get("update_fields")) is not None:
+            if "name" in update_fields:
+                kwargs["update_fields"] = {*update_fields, "name_key"}
+
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"[{self.__class__.__name__} #{self.id:04d}] {self.name} {self.subject}"
 
@@ -94,12 +182,140 @@ class Sheet(models.Model):
         "하루 목표 학습량",
         null=True,
         blank=True,
+        validators=[MinValueValidator(1)],
     )
     is_finished = models.BooleanField(
         "완료된 기록지",
         default=False,
     )
 
+    # Progress summary, maintained by signals of `Record`
+    last_progress_end = models.PositiveIntegerField(
+        "마지막 진도",
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    last_recorded_at = models.DateTimeField(
+        "마지막 학습일",
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    record_count = models.PositiveIntegerField(
+        "기록 수",
+        default=0,
+        editable=False,
+    )
+    pages_covered = models.PositiveIntegerField(
+        "학습 분량",
+        default=0,
+        editable=False,
+    )
+
+    # Covered pages as `[start, end, count]` segments, see `utils.add_coverage()`
+    coverage = models.JSONField(
+        "학습 범위",
+        default=list,
+        editable=False,
+    )
+
+    # Forecast, maintained by signals of `Record`
+    pace_average = models.FloatField(
+        "최근 학습 속도",
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    pace_date = models.DateField(
+        "학습 속도 기준일",
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    behind_since = models.DateField(
+        "진도 지연 시작일",
+        null=True,
+        blank=True,
+        editable=False,
+    )
+
+    updated_at = models.DateTimeField(
+        "수정일",
+        auto_now=True,
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["updated_at"],
+                name="sheet_updated_idx",
+            ),
+            models.Index(
+                fields=["last_recorded_at"],
+                name="sheet_last_recorded_idx",
+            ),
+            models.Index(
+                fields=["student", "last_recorded_at"],
+                name="sheet_student_recorded_idx",
+            ),
+            models.Index(
+                fields=["behind_since"],
+                condition=models.Q(is_finished=False),
+                name="sheet_active_behind_idx",
+            ),
+        ]
+        constraints = [
+            # A student cannot have two active sheets of the same textbook
+            models.UniqueConstraint(
+                fields=["student", "textbook"],
+                condition=models.Q(is_finished=False),
+                name="sheet_unique_active_textbook",
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+
+        # Keep loaded state, so signals can tell when sheet gets finished
+        if "is_finished" in field_names:
+            instance._was_finished = instance.is_finished
+
+        return instance
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+
+        # Fields derived from records are written by their signals,
+        # so instances loaded before a record write must not write them back;
+        # they are only saved when named in `update_fields`
+        if update_fields is None and not self._state.adding:
+            update_fields = {
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and (field.editable or getattr(field, "auto_now", False))
+            }
+
+        with transaction.atomic():
+            # Target pace may have changed, so compare it with
+            # the latest pace average, locked until saved
+            if update_fields is not None and "pace" in update_fields:
+                self.refresh_from_db(
+                    fields=["pace_average", "pace_date"],
+                    from_queryset=Sheet.objects.select_for_update(),
+                )
+                update_fields = {*update_fields, "behind_since"}
+
+            self.behind_since = utils.get_behind_since(
+                self.pace_average,
+                self.pace_date,
+                self.pace,
+            )
+
+            super().save(*args, **{**kwargs, "update_fields": update_fields})
+
     def __str__(self):
         return f"[{self.__class__.__name__} #{self.id:04d}] {self.student.name} - {self.textbook.name}"
 
@@ -122,6 +338,53 @@ class Record(models.Model):
         null=True,
         blank=True,
     )
+    updated_at = models.DateTimeField(
+        "수정일",
+        auto_now=True,
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["updated_at"],
+                name="record_updated_idx",
+            ),
+            models.Index(
+                fields=["sheet", "created_at"],
+                name="record_sheet_created_idx",
+            ),
+            models.Index(
+                fields=["created_at"],
+                name="record_created_idx",
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+
+        # Keep loaded state, so signals can update summary by difference
+        if {"sheet_id", "created_at", "progress"} <= set(field_names):
+            instance._loaded = instance.get_state()
+
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Signals write data derived from the record in the same transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def get_state(self):
+        """Get fields of record which data derived from it depends on."""
+
+        pages = utils.parse_range(self.progress)
+
+        return {
+            "sheet_id": self.sheet_id,
+            "date": timezone.localdate(self.created_at),
+            "range": pages,
+            "pages": utils.count_pages(self.progress),
+        }
 
     def __str__(self):
         return (
@@ -129,6 +392,149 @@ class Record(models.Model):
         )
 
 
+class DailyActivity(models.Model):
+    """Records of a sheet rolled up by local date.
+
+    Maintained by signals of `Record`, so reports over days read
+    one row per sheet and day instead of every record.
+
+    """
+
+    date = models.DateField(
+        "학습일",
+    )
+    student = models.ForeignKey(
+        "zindo.Student",
+        verbose_name="학생",
+        on_delete=models.CASCADE,
+    )
+    sheet = models.ForeignKey(
+        "zindo.Sheet",
+        verbose_name="기록지",
+        on_delete=models.CASCADE,
+    )
+    record_count = models.PositiveIntegerField(
+        "기록 수",
+        default=0,
+    )
+    pages = models.PositiveIntegerField(
+        "학습 분량",
+        default=0,
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["student", "date"],
+                name="activity_student_date_idx",
+            ),
+            models.Index(
+                fields=["date"],
+                name="activity_date_idx",
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["sheet", "date"],
+                name="activity_unique_sheet_date",
+            ),
+        ]
+
+    def __str__(self):
+        return f"[{self.__class__.__name__} #{self.id:04d}] {self.sheet} {self.date}"
+
+
+class Tombstone(models.Model):
+    """Row of a synced model that has been deleted.
+
+    Written by signals, including rows deleted by cascades,
+    so clients of sync can drop their copies.
+
+    """
+
+    model = models.CharField(
+        "모델",
+        max_length=16,
+        choices=[
+            ("student", "학생"),
+            ("textbook", "교재"),
+            ("sheet", "기록지"),
+            ("record", "기록"),
+        ],
+    )
+    object_id = models.PositiveBigIntegerField(
+        "ID",
+    )
+    deleted_at = models.DateTimeField(
+        "삭제일",
+        auto_now_add=True,
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["deleted_at"],
+                name="tombstone_deleted_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return (
+            f"[{self.__class__.__name__} #{self.id:04d}] {self.model} {self.object_id}"
+        )
+
+
+class Event(models.Model):
+    """Change of records and sheets, streamed to clients by `events`.
+
+    Written by signals in the transaction of the change.
+    Ids of related rows are kept as plain integers,
+    as events outlive deleted rows.
+
+    """
+
+    kind = models.CharField(
+        "종류",
+        max_length=16,
+        choices=[
+            ("record.created", "기록 생성"),
+            ("record.updated", "기록 수정"),
+            ("record.deleted", "기록 삭제"),
+            ("sheet.finished", "기록지 완료"),
+        ],
+    )
+    student_id = models.PositiveBigIntegerField(
+        "학생 ID",
+    )
+    sheet_id = models.PositiveBigIntegerField(
+        "기록지 ID",
+    )
+    object_id = models.PositiveBigIntegerField(
+        "ID",
+    )
+    created_at = models.DateTimeField(
+        "발생일",
+        auto_now_add=True,
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["student_id", "id"],
+                name="event_student_idx",
+            ),
+            models.Index(
+                fields=["created_at"],
+                name="event_created_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return (
+            f"[{self.__class__.__name__} #{self.id:04d}] {self.kind} {self.object_id}"
+        )
+
+
 class StatsBatch(models.Model):
     title = models.CharField("제목", max_length=64)
     start_date = models.DateField("시작일", null=True, blank=True)
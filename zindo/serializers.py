@@ -1,9 +1,86 @@
+import contextlib
 import datetime
+import math
 
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
 from rest_framework import serializers
+from rest_framework.settings import api_settings
 
 from . import models, utils
 
+# Finish dates further than this are not forecast
+MAX_FORECAST_DAYS = 3650
+
+
+@contextlib.contextmanager
+def unique_conflict(instance, name, message):
+    """Convert violation of unique constraint `name` into validation error.
+
+    Checking duplicates before insert races with concurrent requests,
+    so database constraints are the only check and are mapped here instead.
+    Integrity errors don't tell which constraint failed on every database,
+    so the constraint is checked again for `instance` after the rollback,
+    and other errors, such as of rows written by signals, are raised as is.
+
+    """
+
+    try:
+        with transaction.atomic():
+            yield
+    except IntegrityError:
+        model = type(instance)
+        constraint = next(c for c in model._meta.constraints if c.name == name)
+
+        try:
+            constraint.validate(model, instance)
+        except DjangoValidationError:
+            raise serializers.ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: [message]},
+            ) from None
+
+        raise
+
+
+def get_forecast(sheet):
+    """Forecast finish of active sheet from its recent pace.
+
+    Recent pace is pages per day, averaged over about two weeks.
+    Finish dates need `total_pages` of the textbook,
+    and target finish needs `pace` of the sheet.
+
+    """
+
+    if sheet.is_finished:
+        return None
+
+    today = timezone.localdate()
+    recent_pace = utils.current_pace(sheet.pace_average, sheet.pace_date, today)
+
+    pages_remaining = None
+    if (total_pages := sheet.textbook.total_pages) is not None:
+        pages_remaining = max(total_pages - (sheet.last_progress_end or 0), 0)
+
+    def finish(pace):
+        if pages_remaining is None or pace is None or pace <= 0:
+            return None
+
+        days = math.ceil(pages_remaining / pace)
+        if days > MAX_FORECAST_DAYS:
+            return None
+
+        return today + datetime.timedelta(days=days)
+
+    return {
+        "pages_remaining": pages_remaining,
+        "recent_pace": None if recent_pace is None else round(recent_pace, 2),
+        "projected_finish": finish(recent_pace),
+        "target_finish": finish(sheet.pace),
+        "behind_schedule": sheet.behind_since is not None
+        and sheet.behind_since <= today,
+    }
+
 
 class StudentSerializer(serializers.ModelSerializer):
     object = serializers.SerializerMethodField()
@@ -42,10 +119,17 @@ class StudentSerializer(serializers.ModelSerializer):
         return "student"
 
     def get_grade(self, obj):
-        days = (datetime.date.today() - obj.admission_date).days
-        grade = int(days / 365.25) + 1
+        # Annotated by `StudentViewSet`, except on students just saved
+        if (grade := getattr(obj, "grade", None)) is not None:
+            return grade
+
+        return utils.get_grade(obj.admission_date)
 
-        return grade
+    def update(self, instance, validated_data):
+        # Annotated grade goes stale when admission date changes
+        instance.__dict__.pop("grade", None)
+
+        return super().update(instance, validated_data)
 
 
 class TextBookSerializer(serializers.ModelSerializer):
@@ -60,12 +144,33 @@ class TextBookSerializer(serializers.ModelSerializer):
             "subject",
             "isbn",
             "image",
+            "total_pages",
         ]
         read_only_fields = [
             "object",
             "id",
         ]
 
+    def create(self, validated_data):
+        # Saved here instead of `super().create()`, so conflicts can be checked
+        instance = models.TextBook(**validated_data)
+        with unique_conflict(
+            instance,
+            "textbook_unique_manual_name",
+            "Textbook with given name already exists.",
+        ):
+            instance.save()
+
+        return instance
+
+    def update(self, instance, validated_data):
+        with unique_conflict(
+            instance,
+            "textbook_unique_manual_name",
+            "Textbook with given name already exists.",
+        ):
+            return super().update(instance, validated_data)
+
     def get_object(self, _):
         return "textbook"
 
@@ -99,6 +204,9 @@ class SheetSerializer(serializers.ModelSerializer):
     is_recorded = serializers.BooleanField(
         read_only=True,
     )
+    forecast = serializers.SerializerMethodField(
+        read_only=True,
+    )
 
     class Meta:
         model = models.Sheet
@@ -114,10 +222,19 @@ class SheetSerializer(serializers.ModelSerializer):
             "pace",
             "is_recorded",
             "is_finished",
+            "last_progress_end",
+            "last_recorded_at",
+            "record_count",
+            "pages_covered",
+            "forecast",
         ]
         read_only_fields = [
             "object",
             "id",
+            "last_progress_end",
+            "last_recorded_at",
+            "record_count",
+            "pages_covered",
         ]
 
     def validate(self, data):
@@ -127,14 +244,14 @@ class SheetSerializer(serializers.ModelSerializer):
 
         1. Check if isbn field is provided.
         2. If not, get or create textbook from `name` and `subject`.
+           Names are compared by normalized key, ignoring case and spacing.
         3. Check if textbook with given isbn exists on database.
         4. If not, call book search API and fetch book data from it.
         5. If book search was successful, create new textbook and return.
         6. If book search was not successful, raise validation error.
 
-        Then, validator validates textbook selected by:
-
-        1. Check if active sheet with given textbook already exists.
+        Active sheet with the same textbook is rejected on save,
+        by `sheet_unique_active_textbook` constraint of database.
 
         It is possible to review the same book.
         So it is allowed to write sheet with the same book if the former book was finished.
@@ -159,8 +276,8 @@ class SheetSerializer(serializers.ModelSerializer):
                     "Both `name` and `subject` are required when `isbn` is not provided."
                 )
 
-            # Get or create textbook
-            textbook, _ = models.TextBook.objects.get_or_create(
+            # Get or create textbook by normalized name
+            textbook, _ = models.TextBook.objects.get_or_create_manual(
                 name=name,
                 subject=subject,
             )
@@ -168,11 +285,10 @@ class SheetSerializer(serializers.ModelSerializer):
         # isbn is not provided - search mode
         else:
             # Check if textbook with given isbn exists on database
-            if (qs := models.TextBook.objects.filter(isbn=isbn)).exists():
-                textbook = qs.first()
+            textbook = models.TextBook.objects.filter(isbn=isbn).first()
 
             # If not, call book search API with given isbn
-            else:
+            if textbook is None:
                 search_res = utils.search_book(isbn)
 
                 # Raise error if no books were found,
@@ -192,23 +308,34 @@ class SheetSerializer(serializers.ModelSerializer):
         # Add textbook fields to data.
         data["textbook"] = textbook
 
-        # Check textbook is already exists in active sheet.
-        student = data.get("student")
-
-        if models.Sheet.objects.filter(
-            student=student,
-            textbook=textbook,
-            is_finished=False,
-        ).exists():
-            raise serializers.ValidationError(
-                "Active sheet already exists with given textbook.",
-            )
-
         return data
 
+    def create(self, validated_data):
+        # Saved here instead of `super().create()`, so conflicts can be checked
+        instance = models.Sheet(**validated_data)
+        with unique_conflict(
+            instance,
+            "sheet_unique_active_textbook",
+            "Active sheet already exists with given textbook.",
+        ):
+            instance.save()
+
+        return instance
+
+    def update(self, instance, validated_data):
+        with unique_conflict(
+            instance,
+            "sheet_unique_active_textbook",
+            "Active sheet already exists with given textbook.",
+        ):
+            return super().update(instance, validated_data)
+
     def get_object(self, _):
         return "sheet"
 
+    def get_forecast(self, obj):
+        return get_forecast(obj)
+
 
 class RecordSerializer(serializers.ModelSerializer):
     object = serializers.SerializerMethodField()
@@ -237,10 +364,357 @@ class RecordSerializer(serializers.ModelSerializer):
             "id",
         ]
 
+    def validate_progress(self, value):
+        # Ranges which are not counted would silently count 0 pages
+        if isinstance(value, dict) and value.get("type") == "range":
+            if utils.parse_range(value) is None:
+                raise serializers.ValidationError(
+                    "Range needs integer `start` and `end` pages, "
+                    "from 1 and with `start` not after `end`."
+                )
+
+        return value
+
+    def get_object(self, _):
+        return "record"
+
+
+class CompactSheetSerializer(serializers.ModelSerializer):
+    """Sheet referring to its textbook by id, for compound documents."""
+
+    object = serializers.SerializerMethodField()
+    is_recorded = serializers.BooleanField(
+        read_only=True,
+    )
+    forecast = serializers.SerializerMethodField(
+        read_only=True,
+    )
+
+    class Meta:
+        model = models.Sheet
+        fields = [
+            "object",
+            "id",
+            "textbook",
+            "pace",
+            "is_recorded",
+            "is_finished",
+            "last_progress_end",
+            "last_recorded_at",
+            "record_count",
+            "pages_covered",
+            "forecast",
+        ]
+        read_only_fields = fields
+
+    def get_object(self, _):
+        return "sheet"
+
+    def get_forecast(self, obj):
+        return get_forecast(obj)
+
+
+class SyncStudentSerializer(serializers.ModelSerializer):
+    """Student without fields derived from its sheets or the date.
+
+    Synced rows are only listed again when they change,
+    so clients derive counts and grade from synced data.
+
+    """
+
+    object = serializers.SerializerMethodField()
+
+    class Meta:
+        model = models.Student
+        fields = [
+            "object",
+            "id",
+            "name",
+            "admission_date",
+            "is_active",
+        ]
+        read_only_fields = fields
+
+    def get_object(self, _):
+        return "student"
+
+
+class SyncSheetSerializer(serializers.ModelSerializer):
+    """Sheet referring to student and textbook by id, without fields
+    derived from the date, like `SyncStudentSerializer`.
+
+    Summary fields are kept, as writes of records stamp the sheet.
+
+    """
+
+    object = serializers.SerializerMethodField()
+
+    class Meta:
+        model = models.Sheet
+        fields = [
+            "object",
+            "id",
+            "student",
+            "textbook",
+            "pace",
+            "is_finished",
+            "last_progress_end",
+            "last_recorded_at",
+            "record_count",
+            "pages_covered",
+        ]
+        read_only_fields = fields
+
+    def get_object(self, _):
+        return "sheet"
+
+
+class TombstoneSerializer(serializers.ModelSerializer):
+    object = serializers.CharField(
+        source="model",
+        read_only=True,
+    )
+    id = serializers.IntegerField(
+        source="object_id",
+        read_only=True,
+    )
+
+    class Meta:
+        model = models.Tombstone
+        fields = [
+            "object",
+            "id",
+        ]
+        read_only_fields = fields
+
+
+class CompactRecordSerializer(serializers.ModelSerializer):
+    """Record referring to its sheet by id, for compound documents."""
+
+    object = serializers.SerializerMethodField()
+
+    class Meta:
+        model = models.Record
+        fields = [
+            "object",
+            "id",
+            "sheet",
+            "created_at",
+            "progress",
+            "note",
+        ]
+        read_only_fields = fields
+
     def get_object(self, _):
         return "record"
 
 
+class DailyActivitySerializer(serializers.ModelSerializer):
+    object = serializers.SerializerMethodField()
+
+    class Meta:
+        model = models.DailyActivity
+        fields = [
+            "object",
+            "id",
+            "date",
+            "student",
+            "sheet",
+            "record_count",
+            "pages",
+        ]
+        read_only_fields = fields
+
+    def get_object(self, _):
+        return "activity"
+
+
+class TimelineQuerySerializer(serializers.Serializer):
+    """Validate query parameters of timeline actions.
+
+    Range defaults to the last 90 days, and `auto` bucket is resolved
+    by length of the range, so long histories are downsampled.
+    Series are built in memory, so they are limited to `MAX_BUCKETS` points.
+
+    """
+
+    # Longest range in days listed by each bucket on `auto`
+    AUTO_BUCKETS = [(92, "day"), (730, "week")]
+
+    MAX_BUCKETS = 400
+
+    # Buckets after the last date must still be representable
+    LATEST_END = datetime.date.max - datetime.timedelta(days=31)
+
+    start = serializers.DateField(
+        required=False,
+    )
+    end = serializers.DateField(
+        required=False,
+    )
+    bucket = serializers.ChoiceField(
+        choices=["auto", "day", "week", "month"],
+        default="auto",
+    )
+
+    def validate(self, data):
+        end = data.get("end") or timezone.localdate()
+        start = data.get("start") or utils.add_days(end, -89)
+
+        if start > end:
+            raise serializers.ValidationError("`start` must not be later than `end`.")
+        if end > self.LATEST_END:
+            raise serializers.ValidationError(
+                f"`end` must not be later than {self.LATEST_END}."
+            )
+
+        bucket = data["bucket"]
+        if bucket == "auto":
+            days = (end - start).days + 1
+            bucket = next(
+                (bucket for limit, bucket in self.AUTO_BUCKETS if days <= limit),
+                "month",
+            )
+
+        if utils.count_buckets(start, end, bucket) > self.MAX_BUCKETS:
+            raise serializers.ValidationError(
+                f"Range must not span more than {self.MAX_BUCKETS} {bucket}s."
+            )
+
+        return {"start": start, "end": end, "bucket": bucket}
+
+
+class AnalyticsQuerySerializer(serializers.Serializer):
+    """Validate query parameters of academy analytics.
+
+    `group_by` and `measures` are repeated parameters,
+    and range defaults to the last 90 days.
+    Rows of the whole range are aggregated, so it is limited to `MAX_DAYS`.
+
+    """
+
+    # Two school years
+    MAX_DAYS = 731
+
+    group_by = serializers.ListField(
+        child=serializers.ChoiceField(
+            choices=["subject", "grade", "week", "month", "is_finished"],
+        ),
+        default=list,
+    )
+    measures = serializers.ListField(
+        child=serializers.ChoiceField(
+            choices=["record_count", "pages", "active_students"],
+        ),
+        allow_empty=False,
+        default=["record_count", "pages", "active_students"],
+    )
+    start = serializers.DateField(
+        required=False,
+    )
+    end = serializers.DateField(
+        required=False,
+    )
+
+    def validate(self, data):
+        end = data.get("end") or timezone.localdate()
+        start = data.get("start") or utils.add_days(end, -89)
+
+        if start > end:
+            raise serializers.ValidationError("`start` must not be later than `end`.")
+        if (end - start).days >= self.MAX_DAYS:
+            raise serializers.ValidationError(
+                f"Range must not be longer than {self.MAX_DAYS} days."
+            )
+
+        return {
+            "start": start,
+            "end": end,
+            # Repeated names would only repeat columns
+            "group_by": list(dict.fromkeys(data["group_by"])),
+            "measures": list(dict.fromkeys(data["measures"])),
+        }
+
+
+class SyncQuerySerializer(serializers.Serializer):
+    """Validate query parameters of sync.
+
+    `page` is `next` of the previous response, and carries
+    the cursor and position of the sync it continues.
+
+    """
+
+    since = serializers.IntegerField(
+        min_value=0,
+        required=False,
+    )
+    page = serializers.CharField(
+        required=False,
+    )
+
+    def validate_since(self, value):
+        try:
+            return utils.decode_cursor(value)
+        except OverflowError:
+            raise serializers.ValidationError("Invalid cursor.")
+
+    def validate_page(self, value):
+        try:
+            return utils.decode_page(value)
+        except (ValueError, OverflowError):
+            raise serializers.ValidationError("Invalid page.")
+
+    def validate(self, data):
+        if (page := data.get("page")) is not None:
+            return page
+
+        return {
+            "cursor": timezone.now(),
+            "since": data.get("since"),
+            "section": 0,
+            "after": None,
+        }
+
+
+class ProfileQuerySerializer(serializers.Serializer):
+    records = serializers.IntegerField(
+        min_value=0,
+        max_value=50,
+        default=5,
+    )
+
+
+class AttendanceQuerySerializer(serializers.Serializer):
+    """Validate query parameters of attendance grid.
+
+    Range defaults to the current week, from Monday to Sunday.
+
+    """
+
+    MAX_DAYS = 366
+
+    start = serializers.DateField(
+        required=False,
+    )
+    end = serializers.DateField(
+        required=False,
+    )
+
+    def validate(self, data):
+        today = timezone.localdate()
+        start = data.get("start") or today - datetime.timedelta(days=today.weekday())
+        end = data.get("end") or utils.add_days(start, 6)
+
+        if start > end:
+            raise serializers.ValidationError("`start` must not be later than `end`.")
+        if (end - start).days >= self.MAX_DAYS:
+            raise serializers.ValidationError(
+                f"Range must not be longer than {self.MAX_DAYS} days."
+            )
+
+        return {"start": start, "end": end}
+
+
 class StatsBatchSerializer(serializers.ModelSerializer):
     class Meta:
         model = models.StatsBatch
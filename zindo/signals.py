@@ -0,0 +1,257 @@
+"""
+Signals
+
+This file keeps data derived from records up to date with them.
+
+- Progress summary of sheets: counters are adjusted by difference,
+  and fields taken from the latest record are looked up with
+  `record_sheet_created_idx`.
+- Daily activity rollup: the row of the sheet and local date
+  is adjusted by difference, and removed once it has no records.
+- Forecast of sheets: pages are added into the pace average
+  by their weight, see `utils.add_pace()`.
+- Coverage of sheets: the range is added into counted segments,
+  see `utils.add_coverage()`.
+
+Deletes of synced models also leave tombstones for sync,
+and changes of records and finished sheets are logged as events.
+
+Each write of a record costs a few statements regardless of history.
+They run in one transaction, so they apply together, and the sheet row
+is locked before fields derived from it are read and written back
+(SQLite takes the write lock on `BEGIN IMMEDIATE`, see `DATABASES`).
+Bulk writes skip signals, so run `rebuild_summaries` after them.
+Resets of development data delete under `untracked_deletes()`.
+
+"""
+
+import contextlib
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import models, utils
+
+
+def update_summary(state, sign):
+    """Add (`sign` of 1) or remove (-1) record of given state from sheet."""
+
+    sheets = models.Sheet.objects.filter(pk=state["sheet_id"]).select_for_update()
+    pages = sign * state["pages"]
+    changes = {}
+
+    if state["range"] is not None and (
+        sheet := sheets.values("pace", "pace_average", "pace_date", "coverage").first()
+    ):
+        changes["coverage"] = utils.add_coverage(
+            sheet["coverage"],
+            *state["range"],
+            sign,
+        )
+
+        average, pace_date = utils.add_pace(
+            sheet["pace_average"],
+            sheet["pace_date"],
+            state["date"],
+            pages,
+            sheet["pace"],
+        )
+        changes["pace_average"] = average
+        changes["pace_date"] = pace_date
+        changes["behind_since"] = utils.get_behind_since(
+            average,
+            pace_date,
+            sheet["pace"],
+        )
+
+    sheets.update(
+        record_count=F("record_count") + sign,
+        pages_covered=F("pages_covered") + pages,
+        # Queryset updates skip `auto_now`
+        updated_at=timezone.now(),
+        **utils.latest_record_fields(models.Record),
+        **changes,
+    )
+
+
+def add_activity(sheet, date, pages):
+    activities = models.DailyActivity.objects.filter(sheet=sheet, date=date)
+    changes = {"record_count": F("record_count") + 1, "pages": F("pages") + pages}
+
+    if activities.update(**changes):
+        return
+
+    # Concurrent request may have created the row in the meantime
+    try:
+        with transaction.atomic():
+            models.DailyActivity.objects.create(
+                date=date,
+                student_id=sheet.student_id,
+                sheet=sheet,
+                record_count=1,
+                pages=pages,
+            )
+    except IntegrityError:
+        activities.update(**changes)
+
+
+def remove_activity(sheet_id, date, pages):
+    activities = models.DailyActivity.objects.filter(sheet=sheet_id, date=date)
+
+    activities.update(
+        record_count=F("record_count") - 1,
+        pages=F("pages") - pages,
+    )
+    activities.filter(record_count=0).delete()
+
+
+def add_event(kind, sheet, object_id):
+    models.Event.objects.create(
+        kind=kind,
+        student_id=sheet.student_id,
+        sheet_id=sheet.pk,
+        object_id=object_id,
+    )
+
+
+def is_origin(sender, origin):
+    """Check if delete was called on rows of `sender`, not cascaded."""
+
+    return isinstance(origin, sender) or getattr(origin, "model", None) is sender
+
+
+def add_tombstones(model, pks):
+    models.Tombstone.objects.bulk_create(
+        [models.Tombstone(model=model._meta.model_name, object_id=pk) for pk in pks]
+    )
+
+
+@receiver(post_save, sender=models.Record)
+@transaction.atomic
+def record_saved(sender, instance, created, raw=False, **kwargs):
+    # Fixtures are loaded as is
+    if raw:
+        return
+
+    state = instance.get_state()
+
+    # Record saved without `from_db`, so its former state is unknown
+    if not created and (loaded := getattr(instance, "_loaded", None)) is None:
+        sheets = models.Sheet.objects.filter(pk=instance.sheet_id)
+        utils.refresh_sheet_summaries(sheets, models.Record)
+        utils.refresh_daily_activities(sheets, models.DailyActivity, models.Record)
+        utils.refresh_sheet_forecasts(sheets, models.DailyActivity)
+        utils.refresh_sheet_coverages(sheets, models.Record)
+
+    elif created:
+        update_summary(state, 1)
+        add_activity(instance.sheet, state["date"], state["pages"])
+
+    elif loaded != state:
+        update_summary(loaded, -1)
+        update_summary(state, 1)
+
+        remove_activity(loaded["sheet_id"], loaded["date"], loaded["pages"])
+        add_activity(instance.sheet, state["date"], state["pages"])
+
+    instance._loaded = state
+    add_event(
+        "record.created" if created else "record.updated",
+        instance.sheet,
+        instance.pk,
+    )
+
+
+@receiver(post_delete, sender=models.Record)
+@transaction.atomic
+def record_deleted(sender, instance, origin=None, **kwargs):
+    # Sheet is deleted together on cascades from sheets and students
+    if not is_origin(sender, origin):
+        return
+
+    loaded = getattr(instance, "_loaded", None) or instance.get_state()
+    update_summary(loaded, -1)
+    remove_activity(loaded["sheet_id"], loaded["date"], loaded["pages"])
+    add_event("record.deleted", instance.sheet, instance.pk)
+
+
+@receiver(post_save, sender=models.Sheet)
+def sheet_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+
+    # Rollup keeps student of the sheet, so follow reassigned sheets
+    if not created:
+        models.DailyActivity.objects.filter(sheet=instance).exclude(
+            student=instance.student_id
+        ).update(student=instance.student_id)
+
+    if instance.is_finished and not getattr(instance, "_was_finished", True):
+        add_event("sheet.finished", instance, instance.pk)
+    instance._was_finished = instance.is_finished
+
+
+@receiver(pre_delete, sender=models.Student)
+def student_deleting(sender, instance, origin=None, **kwargs):
+    # Tombstones of cascaded rows are written here in bulk
+    if is_origin(sender, origin):
+        add_tombstones(
+            models.Sheet,
+            models.Sheet.objects.filter(student=instance).values_list("pk", flat=True),
+        )
+        add_tombstones(
+            models.Record,
+            models.Record.objects.filter(sheet__student=instance).values_list(
+                "pk", flat=True
+            ),
+        )
+
+
+@receiver(pre_delete, sender=models.Sheet)
+def sheet_deleting(sender, instance, origin=None, **kwargs):
+    if is_origin(sender, origin):
+        add_tombstones(
+            models.Record,
+            models.Record.objects.filter(sheet=instance).values_list("pk", flat=True),
+        )
+
+
+@receiver(post_delete, sender=models.Student)
+@receiver(post_delete, sender=models.TextBook)
+@receiver(post_delete, sender=models.Sheet)
+@receiver(post_delete, sender=models.Record)
+def add_tombstone(sender, instance, origin=None, **kwargs):
+    # Cascaded rows are written by `pre_delete` of their origin
+    if is_origin(sender, origin):
+        add_tombstones(sender, [instance.pk])
+
+
+@contextlib.contextmanager
+def untracked_deletes():
+    """Disconnect receivers of deletes, so querysets delete in bulk.
+
+    Nothing derived from deleted rows is updated and no tombstone is left,
+    so this is only meant for resets of development data.
+
+    """
+
+    receivers = [
+        (pre_delete, student_deleting, models.Student),
+        (pre_delete, sheet_deleting, models.Sheet),
+        (post_delete, record_deleted, models.Record),
+        *(
+            (post_delete, add_tombstone, model)
+            for model in [models.Student, models.TextBook, models.Sheet, models.Record]
+        ),
+    ]
+
+    for signal, func, sender in receivers:
+        signal.disconnect(func, sender=sender)
+    try:
+        yield
+    finally:
+        for signal, func, sender in receivers:
+            signal.connect(func, sender=sender)
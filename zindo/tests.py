@@ -0,0 +1,2210 @@
+import asyncio
+import datetime
+import io
+import itertools
+import json
+import pathlib
+import subprocess
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from core.testing import QueryCountMixin, QueryPlanMixin, StubServer
+
+from . import models, signals, utils
+from .management.commands import benchmark, startup
+
+
+# Textbook names must be unique across calls
+TEXTBOOK_NUMBERS = itertools.count()
+
+
+def populate(students, sheets=2, records=5):
+    """Create students with active sheets and records of today.
+
+    Returns created students, so tests can point at one of them.
+
+    """
+
+    now = timezone.now()
+    student_objs = models.Student.objects.bulk_create(
+        [
+            models.Student(
+                name=f"학생{index}", admission_date=datetime.date(2024, 3, 4)
+            )
+            for index in range(students)
+        ]
+    )
+    textbooks = models.TextBook.objects.bulk_create(
+        [
+            models.TextBook(name=f"교재 {next(TEXTBOOK_NUMBERS)}", subject="수학")
+            for _ in range(students * sheets)
+        ]
+    )
+    sheet_objs = models.Sheet.objects.bulk_create(
+        [
+            models.Sheet(student=student, textbook=textbooks.pop(), pace=4)
+            for student in student_objs
+            for _ in range(sheets)
+        ]
+    )
+    models.Record.objects.bulk_create(
+        [
+            models.Record(
+                sheet=sheet,
+                created_at=now - datetime.timedelta(days=index),
+                progress={
+                    "type": "range",
+                    "start": index * 4 + 1,
+                    "end": index * 4 + 4,
+                },
+            )
+            for sheet in sheet_objs
+            for index in range(records)
+        ]
+    )
+    sheets = models.Sheet.objects.filter(pk__in=[sheet.pk for sheet in sheet_objs])
+    utils.refresh_sheet_summaries(sheets, models.Record)
+    utils.refresh_daily_activities(sheets, models.DailyActivity, models.Record)
+
+    return student_objs
+
+
+class SheetTestCase(APITestCase):
+    def setUp(self):
+        self.student = populate(1, sheets=0, records=0)[0]
+        self.payload = {
+            "student": self.student.pk,
+            "name": "쎈 수학 3-1",
+            "subject": "수학",
+            "pace": 4,
+        }
+
+    def test_duplicate_active_sheet(self):
+        response = self.client.post("/zindo/sheets/", self.payload, format="json")
+        self.assertEqual(response.status_code, 201)
+
+        response = self.client.post("/zindo/sheets/", self.payload, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json(),
+            {"non_field_errors": ["Active sheet already exists with given textbook."]},
+        )
+        self.assertEqual(models.Sheet.objects.count(), 1)
+
+    def test_review_finished_sheet(self):
+        first = self.client.post("/zindo/sheets/", self.payload, format="json")
+        self.client.patch(
+            f"/zindo/sheets/{first.json()['id']}/",
+            {"is_finished": True},
+            format="json",
+        )
+
+        response = self.client.post("/zindo/sheets/", self.payload, format="json")
+        self.assertEqual(response.status_code, 201)
+
+        # Reopening the finished sheet would make two active sheets
+        response = self.client.patch(
+            f"/zindo/sheets/{first.json()['id']}/",
+            {"is_finished": False},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_other_integrity_error(self):
+        response = self.client.post("/zindo/sheets/", self.payload, format="json")
+
+        # Errors of rows written by signals are not conflicts of the sheet
+        with mock.patch.object(signals, "add_event", side_effect=IntegrityError):
+            with self.assertRaises(IntegrityError):
+                self.client.patch(
+                    f"/zindo/sheets/{response.json()['id']}/",
+                    {"is_finished": True},
+                    format="json",
+                )
+
+        self.assertFalse(models.Sheet.objects.get().is_finished)
+
+
+class SheetSummaryTestCase(APITestCase):
+    def setUp(self):
+        self.sheet, self.other = models.Sheet.objects.filter(
+            student=populate(1, records=3)[0]
+        )
+
+    def summary(self, sheet):
+        return self.client.get(f"/zindo/sheets/{sheet.pk}/").json()
+
+    def assertSummary(self, sheet, **expected):
+        summary = self.summary(sheet)
+        self.assertEqual(
+            {key: summary[key] for key in expected},
+            expected,
+        )
+
+        # Incremental summary must match the one rebuilt from records
+        utils.refresh_sheet_summaries(
+            models.Sheet.objects.filter(pk=sheet.pk),
+            models.Record,
+        )
+        self.assertEqual(self.summary(sheet), summary)
+
+    def test_populated(self):
+        self.assertSummary(
+            self.sheet,
+            last_progress_end=4,
+            record_count=3,
+            pages_covered=12,
+        )
+
+    def test_record_create(self):
+        response = self.client.post(
+            "/zindo/records/",
+            {
+                "sheet": self.sheet.pk,
+                "progress": {"type": "range", "start": 5, "end": 7},
+            },
+            format="json",
+        )
+
+        self.assertSummary(
+            self.sheet,
+            last_progress_end=7,
+            last_recorded_at=response.json()["created_at"],
+            record_count=4,
+            pages_covered=15,
+        )
+
+        # Backdated records do not move the latest progress
+        self.client.post(
+            "/zindo/records/",
+            {
+                "sheet": self.sheet.pk,
+                "created_at": "2020-01-01T00:00:00+09:00",
+                "progress": {"type": "range", "start": 1, "end": 1},
+            },
+            format="json",
+        )
+        self.assertSummary(self.sheet, last_progress_end=7, record_count=5)
+
+    def test_invalid_range(self):
+        for progress in [
+            {"type": "range", "start": "1", "end": "10"},
+            {"type": "range", "start": True, "end": 10},
+            {"type": "range", "start": 10, "end": 1},
+            {"type": "range", "start": 0, "end": 1},
+            {"type": "range", "start": 1},
+        ]:
+            response = self.client.post(
+                "/zindo/records/",
+                {"sheet": self.sheet.pk, "progress": progress},
+                format="json",
+            )
+            self.assertEqual(response.status_code, 400, progress)
+            self.assertIn("progress", response.json())
+
+        response = self.client.post(
+            "/zindo/records/",
+            {"sheet": self.sheet.pk, "progress": {"type": "note", "text": "복습"}},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+
+    def test_rebuild(self):
+        # Fixtures are bulk inserted, so start from rebuilt data
+        call_command("rebuild_summaries", stdout=io.StringIO())
+
+        self.client.post(
+            "/zindo/records/",
+            {
+                "sheet": self.sheet.pk,
+                "progress": {"type": "range", "start": 13, "end": 20},
+            },
+            format="json",
+        )
+        # Rows written before validation are counted the same by both paths
+        for progress in [
+            {"type": "range", "start": "1", "end": "10"},
+            {"type": "range", "start": True, "end": 10},
+            {"type": "range", "start": 21, "end": 22.5},
+        ]:
+            models.Record.objects.create(sheet=self.other, progress=progress)
+
+        fields = [
+            "pk",
+            "record_count",
+            "pages_covered",
+            "last_progress_end",
+            "last_recorded_at",
+            "coverage",
+            "pace_average",
+            "pace_date",
+            "behind_since",
+        ]
+        sheets = list(models.Sheet.objects.order_by("pk").values(*fields))
+        activities = list(
+            models.DailyActivity.objects.order_by("sheet", "date").values(
+                "sheet", "student", "date", "record_count", "pages"
+            )
+        )
+
+        call_command("rebuild_summaries", stdout=io.StringIO())
+
+        self.assertEqual(
+            list(models.Sheet.objects.order_by("pk").values(*fields)), sheets
+        )
+        self.assertEqual(
+            list(
+                models.DailyActivity.objects.order_by("sheet", "date").values(
+                    "sheet", "student", "date", "record_count", "pages"
+                )
+            ),
+            activities,
+        )
+
+    def test_record_update(self):
+        record = models.Record.objects.filter(sheet=self.sheet).latest("created_at")
+
+        self.client.patch(
+            f"/zindo/records/{record.pk}/",
+            {"progress": {"type": "range", "start": 1, "end": 10}},
+            format="json",
+        )
+        self.assertSummary(
+            self.sheet,
+            last_progress_end=10,
+            record_count=3,
+            pages_covered=18,
+        )
+
+        self.client.patch(
+            f"/zindo/records/{record.pk}/",
+            {"sheet": self.other.pk},
+            format="json",
+        )
+        self.assertSummary(
+            self.sheet,
+            last_progress_end=8,
+            record_count=2,
+            pages_covered=8,
+        )
+        self.assertSummary(
+            self.other,
+            record_count=4,
+            pages_covered=22,
+        )
+
+    def test_record_delete(self):
+        for record in models.Record.objects.filter(sheet=self.sheet):
+            self.client.delete(f"/zindo/records/{record.pk}/")
+
+        self.assertSummary(
+            self.sheet,
+            last_progress_end=None,
+            last_recorded_at=None,
+            record_count=0,
+            pages_covered=0,
+        )
+
+    def test_failed_write(self):
+        # Record and data derived from it are written together, or not at all
+        with mock.patch.object(signals, "add_event", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                models.Record.objects.create(
+                    sheet=self.sheet,
+                    progress={"type": "range", "start": 5, "end": 7},
+                )
+
+        self.assertEqual(models.Record.objects.filter(sheet=self.sheet).count(), 3)
+        self.assertSummary(self.sheet, record_count=3, pages_covered=12)
+        self.assertEqual(
+            models.DailyActivity.objects.get(
+                sheet=self.sheet, date=timezone.localdate()
+            ).record_count,
+            1,
+        )
+
+    def test_stale_save(self):
+        stale = models.Sheet.objects.get(pk=self.sheet.pk)
+        models.Record.objects.create(
+            sheet=self.sheet,
+            progress={"type": "range", "start": 13, "end": 20},
+        )
+        fresh = models.Sheet.objects.get(pk=self.sheet.pk)
+
+        # Saving an instance loaded before the record keeps what signals wrote
+        stale.pace = 8
+        stale.save()
+
+        saved = models.Sheet.objects.get(pk=self.sheet.pk)
+        self.assertEqual(saved.pace, 8)
+        for field in [
+            "record_count",
+            "pages_covered",
+            "last_progress_end",
+            "last_recorded_at",
+            "coverage",
+            "pace_average",
+            "pace_date",
+        ]:
+            self.assertEqual(getattr(saved, field), getattr(fresh, field), field)
+        self.assertEqual(
+            saved.behind_since,
+            utils.get_behind_since(fresh.pace_average, fresh.pace_date, 8),
+        )
+
+    def test_ordering(self):
+        models.Record.objects.filter(sheet=self.sheet).delete()
+
+        response = self.client.get("/zindo/sheets/?ordering=-last_recorded_at")
+        self.assertEqual(
+            [sheet["id"] for sheet in response.json()],
+            [self.other.pk, self.sheet.pk],
+        )
+
+        response = self.client.get("/zindo/sheets/?last_recorded_at__isnull=true")
+        self.assertEqual([sheet["id"] for sheet in response.json()], [self.sheet.pk])
+
+
+class DailyActivityTestCase(APITestCase):
+    def setUp(self):
+        self.student = populate(1, sheets=1, records=0)[0]
+        self.sheet = models.Sheet.objects.get(student=self.student)
+        self.today = timezone.localdate()
+
+    def create(self, date, start, end):
+        return self.client.post(
+            "/zindo/records/",
+            {
+                "sheet": self.sheet.pk,
+                "created_at": f"{date}T23:30:00+09:00",
+                "progress": {"type": "range", "start": start, "end": end},
+            },
+            format="json",
+        ).json()
+
+    def activities(self):
+        return [
+            (activity["date"], activity["record_count"], activity["pages"])
+            for activity in self.client.get(
+                f"/zindo/activities/?student__id={self.student.pk}"
+            ).json()
+        ]
+
+    def assertActivities(self, expected):
+        self.assertEqual(self.activities(), expected)
+
+        # Incremental rollup must match the one rebuilt from records
+        utils.refresh_daily_activities(
+            models.Sheet.objects.filter(pk=self.sheet.pk),
+            models.DailyActivity,
+            models.Record,
+        )
+        self.assertEqual(self.activities(), expected)
+
+    def test_local_date(self):
+        # 23:30 in Seoul is the previous day in UTC
+        self.create("2026-03-02", 1, 4)
+        self.create("2026-03-02", 5, 6)
+        self.create("2026-03-03", 7, 10)
+
+        self.assertActivities([("2026-03-02", 2, 6), ("2026-03-03", 1, 4)])
+
+    def test_update_and_delete(self):
+        record = self.create("2026-03-02", 1, 4)
+        self.create("2026-03-02", 5, 6)
+
+        self.client.patch(
+            f"/zindo/records/{record['id']}/",
+            {"created_at": "2026-03-04T10:00:00+09:00"},
+            format="json",
+        )
+        self.assertActivities([("2026-03-02", 1, 2), ("2026-03-04", 1, 4)])
+
+        self.client.delete(f"/zindo/records/{record['id']}/")
+        self.assertActivities([("2026-03-02", 1, 2)])
+
+    def test_recorded_today(self):
+        response = self.client.get(f"/zindo/students/{self.student.pk}/")
+        self.assertEqual(response.json()["count_recorded"], 0)
+
+        self.create(self.today, 1, 4)
+
+        response = self.client.get(f"/zindo/students/{self.student.pk}/")
+        self.assertEqual(response.json()["count_recorded"], 1)
+        response = self.client.get(f"/zindo/sheets/{self.sheet.pk}/")
+        self.assertTrue(response.json()["is_recorded"])
+
+    def test_sheet_reassigned(self):
+        self.create("2026-03-02", 1, 4)
+        other = populate(1, sheets=0, records=0)[0]
+
+        self.client.patch(
+            f"/zindo/sheets/{self.sheet.pk}/",
+            {"student": other.pk},
+            format="json",
+        )
+        self.assertEqual(self.activities(), [])
+        self.assertEqual(
+            models.DailyActivity.objects.get(sheet=self.sheet).student_id,
+            other.pk,
+        )
+
+
+class TimelineTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.student = populate(1, sheets=1, records=0)[0]
+        self.sheet = models.Sheet.objects.get(student=self.student)
+        for date, start, end in [
+            ("2026-03-02", 1, 4),
+            ("2026-03-03", 5, 6),
+            ("2026-03-05", 7, 10),
+            ("2026-03-10", 11, 14),
+        ]:
+            self.create(date, start, end)
+
+    def create(self, date, start, end):
+        self.client.post(
+            "/zindo/records/",
+            {
+                "sheet": self.sheet.pk,
+                "created_at": f"{date}T18:00:00+09:00",
+                "progress": {"type": "range", "start": start, "end": end},
+            },
+            format="json",
+        )
+
+    def series(self, path):
+        return [
+            (
+                item["date"],
+                item["pages"],
+                item["cumulative_pages"],
+                item["target_pages"],
+            )
+            for item in self.client.get(path).json()["series"]
+        ]
+
+    def test_daily(self):
+        self.assertEqual(
+            self.series(
+                f"/zindo/sheets/{self.sheet.pk}/timeline/"
+                "?start=2026-03-03&end=2026-03-06"
+            ),
+            [
+                ("2026-03-03", 2, 6, 8),
+                ("2026-03-04", 0, 6, 12),
+                ("2026-03-05", 4, 10, 16),
+                ("2026-03-06", 0, 10, 20),
+            ],
+        )
+
+    def test_weekly(self):
+        path = (
+            f"/zindo/sheets/{self.sheet.pk}/timeline/"
+            "?start=2026-03-01&end=2026-03-15&bucket=week"
+        )
+
+        self.assertEqual(self.client.get(path).json()["bucket"], "week")
+        self.assertEqual(
+            self.series(path),
+            [
+                ("2026-02-23", 0, 0, 0),
+                ("2026-03-02", 10, 10, 28),
+                ("2026-03-09", 4, 14, 56),
+            ],
+        )
+
+    def test_auto_bucket(self):
+        response = self.client.get(
+            f"/zindo/sheets/{self.sheet.pk}/timeline/?start=2024-01-01&end=2026-03-31"
+        )
+        self.assertEqual(response.json()["bucket"], "month")
+        self.assertEqual(response.json()["series"][-1]["cumulative_pages"], 14)
+
+    def test_invalid_range(self):
+        response = self.client.get(
+            f"/zindo/sheets/{self.sheet.pk}/timeline/?start=2026-03-10&end=2026-03-01"
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_range_limit(self):
+        path = f"/zindo/sheets/{self.sheet.pk}/timeline/"
+
+        # 400 buckets at most, whichever their size
+        response = self.client.get(f"{path}?start=2025-01-01&end=2026-02-04&bucket=day")
+        self.assertEqual(len(response.json()["series"]), 400)
+        response = self.client.get(f"{path}?start=2025-01-01&end=2026-02-05&bucket=day")
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(f"{path}?start=1900-01-01&end=2026-03-31")
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.get(
+            f"/zindo/students/{self.student.pk}/timeline/"
+            "?start=0001-01-01&end=9999-12-31&bucket=day"
+        )
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(
+            f"{path}?start=9999-12-01&end=9999-12-31&bucket=month"
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_first_dates(self):
+        # Default range is cut at the first representable date
+        for path in [
+            f"/zindo/sheets/{self.sheet.pk}/timeline/",
+            f"/zindo/students/{self.student.pk}/timeline/",
+        ]:
+            for bucket in ["auto", "day", "week", "month"]:
+                response = self.client.get(f"{path}?end=0001-01-05&bucket={bucket}")
+                self.assertEqual(response.status_code, 200, bucket)
+                self.assertEqual(response.json()["start"], "0001-01-01")
+
+    def test_cache_follows_records(self):
+        path = (
+            f"/zindo/sheets/{self.sheet.pk}/timeline/?start=2026-03-10&end=2026-03-11"
+        )
+        self.assertEqual(self.series(path)[-1][2], 14)
+
+        self.create("2026-03-11", 15, 20)
+        self.assertEqual(self.series(path)[-1][2], 20)
+
+    def test_student(self):
+        response = self.client.get(
+            f"/zindo/students/{self.student.pk}/timeline/"
+            "?start=2026-03-01&end=2026-03-31&bucket=month"
+        )
+        self.assertEqual(
+            [
+                (sheet["sheet"], sheet["series"][0]["pages"])
+                for sheet in response.json()["sheets"]
+            ],
+            [(self.sheet.pk, 14)],
+        )
+
+
+class AttendanceTestCase(APITestCase):
+    def setUp(self):
+        self.student, self.inactive = populate(2, sheets=2, records=0)
+        models.Student.objects.filter(pk=self.inactive.pk).update(is_active=False)
+        self.sheet, self.finished = models.Sheet.objects.filter(student=self.student)
+
+    def create(self, sheet, date):
+        self.client.post(
+            "/zindo/records/",
+            {
+                "sheet": sheet.pk,
+                "created_at": f"{date}T18:00:00+09:00",
+                "progress": {"type": "range", "start": 1, "end": 4},
+            },
+            format="json",
+        )
+
+    def test_grid(self):
+        self.create(self.sheet, "2026-03-02")
+        self.create(self.sheet, "2026-03-04")
+        self.create(self.finished, "2026-03-03")
+        self.create(self.finished, "2026-03-09")
+        self.client.patch(
+            f"/zindo/sheets/{self.finished.pk}/",
+            {"is_finished": True},
+            format="json",
+        )
+
+        response = self.client.get(
+            "/zindo/students/attendance/?start=2026-03-02&end=2026-03-08"
+        )
+        self.assertEqual(response.json()["days"], 7)
+        self.assertEqual(
+            response.json()["students"],
+            [
+                {
+                    "id": self.student.pk,
+                    "name": self.student.name,
+                    "days": "7",
+                    "sheets": [
+                        {
+                            "id": self.sheet.pk,
+                            "textbook": self.sheet.textbook.name,
+                            "is_finished": False,
+                            "days": "5",
+                        },
+                        {
+                            "id": self.finished.pk,
+                            "textbook": self.finished.textbook.name,
+                            "is_finished": True,
+                            "days": "2",
+                        },
+                    ],
+                }
+            ],
+        )
+
+        # Finished sheets without records in range are left out
+        response = self.client.get(
+            "/zindo/students/attendance/?start=2026-03-16&end=2026-03-22"
+        )
+        self.assertEqual(
+            [sheet["id"] for sheet in response.json()["students"][0]["sheets"]],
+            [self.sheet.pk],
+        )
+
+    def test_range_limit(self):
+        response = self.client.get(
+            "/zindo/students/attendance/?start=2025-01-01&end=2026-03-01"
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_last_dates(self):
+        # Default week is cut at the last representable date
+        response = self.client.get("/zindo/students/attendance/?start=9999-12-30")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["end"], "9999-12-31")
+
+
+class ForecastTestCase(APITestCase):
+    def setUp(self):
+        self.student = populate(1, sheets=2, records=0)[0]
+        self.sheet, self.other = models.Sheet.objects.filter(student=self.student)
+        models.TextBook.objects.filter(pk=self.sheet.textbook_id).update(
+            total_pages=100
+        )
+        self.today = timezone.localdate()
+
+    def create(self, days_ago, start, end, sheet=None):
+        return self.client.post(
+            "/zindo/records/",
+            {
+                "sheet": (sheet or self.sheet).pk,
+                "created_at": timezone.now() - datetime.timedelta(days=days_ago),
+                "progress": {"type": "range", "start": start, "end": end},
+            },
+            format="json",
+        ).json()
+
+    def forecast(self, sheet=None):
+        return self.client.get(f"/zindo/sheets/{(sheet or self.sheet).pk}/").json()[
+            "forecast"
+        ]
+
+    def test_incremental_matches_rebuild(self):
+        self.create(9, 1, 4)
+        self.create(7, 5, 8)
+        self.create(3, 9, 16)
+        record = self.create(2, 17, 20)
+        self.create(1, 21, 24)
+
+        # Past and removed pages are added by their weight
+        self.create(5, 25, 28)
+        self.client.delete(f"/zindo/records/{record['id']}/")
+        self.client.patch(
+            f"/zindo/records/{record['id'] + 1}/",
+            {"progress": {"type": "range", "start": 21, "end": 30}},
+            format="json",
+        )
+
+        incremental = models.Sheet.objects.get(pk=self.sheet.pk)
+        utils.refresh_sheet_forecasts(
+            models.Sheet.objects.filter(pk=self.sheet.pk),
+            models.DailyActivity,
+        )
+        rebuilt = models.Sheet.objects.get(pk=self.sheet.pk)
+
+        self.assertAlmostEqual(incremental.pace_average, rebuilt.pace_average)
+        self.assertEqual(incremental.pace_date, rebuilt.pace_date)
+        self.assertEqual(incremental.behind_since, rebuilt.behind_since)
+
+    def test_forecast(self):
+        for days_ago in range(10, 0, -1):
+            self.create(days_ago, 1, 8)
+        self.create(0, 41, 50)
+
+        forecast = self.forecast()
+        self.assertEqual(forecast["pages_remaining"], 50)
+        self.assertEqual(
+            forecast["target_finish"],
+            str(self.today + datetime.timedelta(days=13)),
+        )
+        self.assertGreater(forecast["recent_pace"], 4)
+        self.assertLessEqual(forecast["projected_finish"], forecast["target_finish"])
+        self.assertFalse(forecast["behind_schedule"])
+
+        # Without total pages, only pace is known
+        forecast = self.forecast(self.other)
+        self.assertIsNone(forecast["pages_remaining"])
+        self.assertIsNone(forecast["projected_finish"])
+
+    def test_behind_schedule(self):
+        self.create(0, 1, 8)
+        self.create(20, 1, 1, sheet=self.other)
+
+        response = self.client.get("/zindo/sheets/?behind_schedule=true")
+        self.assertEqual([sheet["id"] for sheet in response.json()], [self.other.pk])
+        self.assertTrue(self.forecast(self.other)["behind_schedule"])
+
+        # Sheets without target pace are never behind
+        self.client.patch(
+            f"/zindo/sheets/{self.other.pk}/",
+            {"pace": None},
+            format="json",
+        )
+        response = self.client.get("/zindo/sheets/?behind_schedule=true")
+        self.assertEqual(response.json(), [])
+
+    def test_invalid_pace(self):
+        response = self.client.patch(
+            f"/zindo/sheets/{self.sheet.pk}/",
+            {"pace": -5},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("pace", response.json())
+
+        # Paces stored before validation are never behind
+        self.assertIsNone(utils.get_behind_since(3.0, self.today, -5))
+        self.assertIsNone(utils.get_behind_since(0.0, self.today, -5))
+        self.assertIsNone(utils.get_behind_since(0.0, self.today, 0))
+
+        models.Sheet.objects.filter(pk=self.sheet.pk).update(pace=-5)
+        self.create(0, 1, 8)
+        self.assertFalse(self.forecast()["behind_schedule"])
+        self.assertIsNone(self.forecast()["target_finish"])
+
+
+class CoverageTestCase(APITestCase):
+    def setUp(self):
+        self.student = populate(1, sheets=1, records=0)[0]
+        self.sheet = models.Sheet.objects.get(student=self.student)
+        models.TextBook.objects.filter(pk=self.sheet.textbook_id).update(total_pages=30)
+
+    def create(self, start, end):
+        return self.client.post(
+            "/zindo/records/",
+            {
+                "sheet": self.sheet.pk,
+                "progress": {"type": "range", "start": start, "end": end},
+            },
+            format="json",
+        ).json()
+
+    def assertCoverage(self, segments):
+        self.assertEqual(models.Sheet.objects.get(pk=self.sheet.pk).coverage, segments)
+
+        # Incremental coverage must match the one rebuilt from records
+        utils.refresh_sheet_coverages(
+            models.Sheet.objects.filter(pk=self.sheet.pk),
+            models.Record,
+        )
+        self.assertEqual(models.Sheet.objects.get(pk=self.sheet.pk).coverage, segments)
+
+    def test_add_coverage(self):
+        segments = utils.add_coverage([], 1, 4)
+        segments = utils.add_coverage(segments, 5, 8)
+        self.assertEqual(segments, [[1, 8, 1]])
+
+        segments = utils.add_coverage(segments, 3, 6)
+        self.assertEqual(segments, [[1, 2, 1], [3, 6, 2], [7, 8, 1]])
+
+        segments = utils.add_coverage(segments, 3, 6, -1)
+        self.assertEqual(segments, [[1, 8, 1]])
+
+    def test_coverage(self):
+        self.create(1, 10)
+        repeat = self.create(5, 12)
+        self.create(20, 25)
+        self.assertCoverage([[1, 4, 1], [5, 10, 2], [11, 12, 1], [20, 25, 1]])
+
+        response = self.client.get(f"/zindo/sheets/{self.sheet.pk}/coverage/")
+        self.assertEqual(
+            response.json(),
+            {
+                "object": "coverage",
+                "sheet": self.sheet.pk,
+                "total_pages": 30,
+                "covered_pages": 18,
+                "percent_complete": 60.0,
+                "covered": [[1, 12], [20, 25]],
+                "uncovered": [[13, 19], [26, 30]],
+                "repeated": [[5, 10]],
+            },
+        )
+
+        self.client.patch(
+            f"/zindo/records/{repeat['id']}/",
+            {"progress": {"type": "range", "start": 11, "end": 19}},
+            format="json",
+        )
+        self.assertCoverage([[1, 25, 1]])
+
+        self.client.delete(f"/zindo/records/{repeat['id']}/")
+        self.assertCoverage([[1, 10, 1], [20, 25, 1]])
+
+    def test_student_coverage(self):
+        self.create(1, 10)
+
+        response = self.client.get(f"/zindo/students/{self.student.pk}/coverage/")
+        self.assertEqual(
+            [
+                (sheet["sheet"], sheet["percent_complete"])
+                for sheet in response.json()["sheets"]
+            ],
+            [(self.sheet.pk, 33.3)],
+        )
+
+
+class AnalyticsTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.students = populate(2, sheets=1, records=0)
+        models.Student.objects.filter(pk=self.students[1].pk).update(
+            admission_date=datetime.date(2025, 3, 3)
+        )
+        self.sheets = [
+            models.Sheet.objects.get(student=student) for student in self.students
+        ]
+        models.TextBook.objects.filter(pk=self.sheets[1].textbook_id).update(
+            subject="영어"
+        )
+
+        for sheet, date, start, end in [
+            (self.sheets[0], "2026-03-02", 1, 4),
+            (self.sheets[0], "2026-03-03", 5, 6),
+            (self.sheets[1], "2026-03-03", 1, 10),
+            (self.sheets[1], "2026-03-10", 11, 12),
+        ]:
+            self.create(sheet, date, start, end)
+
+    def create(self, sheet, date, start, end):
+        self.client.post(
+            "/zindo/records/",
+            {
+                "sheet": sheet.pk,
+                "created_at": f"{date}T18:00:00+09:00",
+                "progress": {"type": "range", "start": start, "end": end},
+            },
+            format="json",
+        )
+
+    def rows(self, query):
+        response = self.client.get(
+            f"/zindo/activities/analytics/?start=2026-03-01&end=2026-03-31&{query}"
+        )
+
+        return response.json()["rows"]
+
+    def test_subject_week(self):
+        self.assertEqual(
+            self.rows("group_by=subject&group_by=week"),
+            [
+                {
+                    "subject": "수학",
+                    "week": "2026-03-02",
+                    "record_count": 2,
+                    "pages": 6,
+                    "active_students": 1,
+                },
+                {
+                    "subject": "영어",
+                    "week": "2026-03-02",
+                    "record_count": 1,
+                    "pages": 10,
+                    "active_students": 1,
+                },
+                {
+                    "subject": "영어",
+                    "week": "2026-03-09",
+                    "record_count": 1,
+                    "pages": 2,
+                    "active_students": 1,
+                },
+            ],
+        )
+
+    def test_grade(self):
+        self.assertEqual(
+            self.rows("group_by=grade&measures=pages"),
+            sorted(
+                [
+                    {"grade": utils.get_grade(datetime.date(2024, 3, 4)), "pages": 6},
+                    {"grade": utils.get_grade(datetime.date(2025, 3, 3)), "pages": 12},
+                ],
+                key=lambda row: row["grade"],
+            ),
+        )
+
+    def test_total(self):
+        self.assertEqual(
+            self.rows("measures=record_count&measures=active_students"),
+            [{"record_count": 4, "active_students": 2}],
+        )
+
+    def test_invalidated_by_records(self):
+        self.assertEqual(self.rows("measures=pages"), [{"pages": 18}])
+
+        # Versions are read from the database, whichever worker wrote
+        self.create(self.sheets[0], "2026-03-20", 7, 8)
+        self.assertEqual(self.rows("measures=pages"), [{"pages": 20}])
+
+        self.client.delete(f"/zindo/sheets/{self.sheets[1].pk}/")
+        self.assertEqual(self.rows("measures=pages"), [{"pages": 8}])
+
+    def test_invalid_dimension(self):
+        response = self.client.get("/zindo/activities/analytics/?group_by=teacher")
+        self.assertEqual(response.status_code, 400)
+
+    def test_range_limit(self):
+        path = "/zindo/activities/analytics/"
+
+        response = self.client.get(f"{path}?start=2024-03-01&end=2026-03-01")
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(f"{path}?start=2024-03-01&end=2026-03-02")
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(f"{path}?start=0001-01-01&end=9999-12-31")
+        self.assertEqual(response.status_code, 400)
+
+        # Default range is cut at the first representable date
+        response = self.client.get(f"{path}?end=0001-01-05&group_by=week")
+        self.assertEqual(response.status_code, 200)
+
+
+class GradeTestCase(APITestCase):
+    def setUp(self):
+        self.students = {}
+        for grade in [1, 2, 2, 3]:
+            start, _ = utils.grade_admission_range(grade)
+            student = models.Student.objects.create(
+                name=f"{grade}학년",
+                admission_date=start + datetime.timedelta(days=len(self.students)),
+            )
+            self.students[student.pk] = grade
+
+    def test_school_year_boundary(self):
+        for today, admission_date, grade in [
+            ("2026-02-28", "2026-02-28", 1),
+            ("2026-02-28", "2025-03-01", 1),
+            ("2026-02-28", "2025-02-28", 2),
+            ("2026-03-01", "2026-03-01", 1),
+            ("2026-03-01", "2026-02-28", 2),
+            ("2026-03-01", "2024-02-29", 4),
+        ]:
+            today = datetime.date.fromisoformat(today)
+            admission_date = datetime.date.fromisoformat(admission_date)
+
+            self.assertEqual(utils.get_grade(admission_date, today), grade)
+
+            # Database agrees with Python
+            student = models.Student.objects.create(
+                name="경계",
+                admission_date=admission_date,
+            )
+            self.assertEqual(
+                models.Student.objects.annotate(
+                    grade=utils.grade_expression(today=today)
+                )
+                .get(pk=student.pk)
+                .grade,
+                grade,
+            )
+
+    def test_serialized(self):
+        response = self.client.get("/zindo/students/")
+
+        self.assertEqual(
+            {student["id"]: student["grade"] for student in response.json()},
+            self.students,
+        )
+
+    def test_filter(self):
+        response = self.client.get("/zindo/students/?grade=2")
+
+        self.assertEqual(
+            {student["id"] for student in response.json()},
+            {pk for pk, grade in self.students.items() if grade == 2},
+        )
+
+    def test_ordering(self):
+        response = self.client.get("/zindo/students/?ordering=-grade")
+
+        self.assertEqual(
+            [student["grade"] for student in response.json()],
+            [3, 2, 2, 1],
+        )
+
+    def test_counts(self):
+        response = self.client.get("/zindo/students/grades/")
+
+        self.assertEqual(
+            response.json()["grades"],
+            [
+                {"grade": 1, "count": 1},
+                {"grade": 2, "count": 2},
+                {"grade": 3, "count": 1},
+            ],
+        )
+
+    def test_update(self):
+        pk = next(iter(self.students))
+        start, _ = utils.grade_admission_range(4)
+
+        response = self.client.patch(
+            f"/zindo/students/{pk}/",
+            {"admission_date": str(start)},
+            format="json",
+        )
+        self.assertEqual(response.json()["grade"], 4)
+
+
+class SyncTestCase(APITestCase):
+    def setUp(self):
+        self.student, self.other = populate(2)
+        self.sheet = models.Sheet.objects.filter(student=self.other).first()
+
+        # Older than the overlap of cursors
+        past = timezone.now() - datetime.timedelta(hours=1)
+        for model in [models.Student, models.TextBook, models.Sheet, models.Record]:
+            model.objects.update(updated_at=past)
+
+        self.cursor = self.sync()["cursor"]
+
+    def sync(self, since=None):
+        query = "" if since is None else f"?since={since}"
+
+        return self.client.get(f"/zindo/sync/{query}").json()
+
+    def ids(self, data):
+        return {
+            key: [row["id"] for row in data[key]]
+            for key in ["students", "textbooks", "sheets", "records"]
+        }
+
+    def test_full(self):
+        data = self.sync()
+
+        self.assertEqual(
+            {key: len(ids) for key, ids in self.ids(data).items()},
+            {"students": 2, "textbooks": 4, "sheets": 4, "records": 20},
+        )
+        self.assertEqual(data["deleted"], [])
+
+    def test_changes(self):
+        response = self.client.post(
+            "/zindo/records/",
+            {
+                "sheet": self.sheet.pk,
+                "progress": {"type": "range", "start": 21, "end": 24},
+            },
+            format="json",
+        )
+        self.client.patch(
+            f"/zindo/students/{self.student.pk}/",
+            {"name": "새이름"},
+            format="json",
+        )
+
+        data = self.sync(self.cursor)
+        self.assertEqual(
+            self.ids(data),
+            {
+                "students": [self.student.pk],
+                "textbooks": [],
+                # Summary of the sheet follows its records
+                "sheets": [self.sheet.pk],
+                "records": [response.json()["id"]],
+            },
+        )
+        self.assertEqual(data["deleted"], [])
+
+    def test_cascade(self):
+        sheets = list(
+            models.Sheet.objects.filter(student=self.student).values_list(
+                "pk", flat=True
+            )
+        )
+        records = list(
+            models.Record.objects.filter(sheet__student=self.student).values_list(
+                "pk", flat=True
+            )
+        )
+        record = models.Record.objects.filter(sheet=self.sheet).first()
+
+        self.client.delete(f"/zindo/students/{self.student.pk}/")
+        self.client.delete(f"/zindo/records/{record.pk}/")
+
+        data = self.sync(self.cursor)
+        self.assertCountEqual(
+            [(item["object"], item["id"]) for item in data["deleted"]],
+            [
+                ("student", self.student.pk),
+                *[("sheet", pk) for pk in sheets],
+                *[("record", pk) for pk in records],
+                ("record", record.pk),
+            ],
+        )
+        self.assertEqual(self.ids(data)["sheets"], [self.sheet.pk])
+
+    def test_derived_fields(self):
+        # Counts, grade and forecasts change without the row changing
+        data = self.sync()
+        self.assertEqual(
+            set(data["students"][0]),
+            {"object", "id", "name", "admission_date", "is_active"},
+        )
+        self.assertNotIn("is_recorded", data["sheets"][0])
+        self.assertNotIn("forecast", data["sheets"][0])
+        self.assertIn("student", data["sheets"][0])
+
+    @override_settings(SYNC_PAGE_SIZE=7)
+    def test_pages(self):
+        # Rows of a section share `updated_at`, so pages split ties by id
+        pages = [self.sync()]
+        while pages[-1]["next"] is not None:
+            response = self.client.get(f"/zindo/sync/?page={pages[-1]['next']}")
+            pages.append(response.json())
+
+        self.assertEqual(len(pages), 5)
+        self.assertEqual({page["cursor"] for page in pages}, {pages[0]["cursor"]})
+        self.assertEqual(
+            {
+                key: sorted(itertools.chain(*(self.ids(page)[key] for page in pages)))
+                for key in ["students", "textbooks", "sheets", "records"]
+            },
+            {
+                "students": sorted(models.Student.objects.values_list("pk", flat=True)),
+                "textbooks": sorted(
+                    models.TextBook.objects.values_list("pk", flat=True)
+                ),
+                "sheets": sorted(models.Sheet.objects.values_list("pk", flat=True)),
+                "records": sorted(models.Record.objects.values_list("pk", flat=True)),
+            },
+        )
+
+    def test_expired_cursor(self):
+        old = timezone.now() - datetime.timedelta(days=31)
+        response = self.client.get(f"/zindo/sync/?since={utils.encode_cursor(old)}")
+        self.assertEqual(response.status_code, 410)
+
+        self.client.delete(f"/zindo/students/{self.student.pk}/")
+        models.Tombstone.objects.update(deleted_at=old)
+        call_command("prune_tombstones", stdout=io.StringIO())
+        self.assertFalse(models.Tombstone.objects.exists())
+
+    def test_invalid_cursor(self):
+        for since in ["-1", "abc", str(10**20)]:
+            response = self.client.get(f"/zindo/sync/?since={since}")
+            self.assertEqual(response.status_code, 400)
+
+        for page in ["abc", "1.2.3", "1..0..x"]:
+            response = self.client.get(f"/zindo/sync/?page={page}")
+            self.assertEqual(response.status_code, 400)
+
+
+@override_settings(EVENT_STREAM_POLL=0.01, EVENT_STREAM_HEARTBEAT=0.05)
+class EventStreamTestCase(TestCase):
+    def setUp(self):
+        self.student, self.other = populate(2, sheets=1, records=0)
+        self.sheet = models.Sheet.objects.get(student=self.student)
+        self.other_sheet = models.Sheet.objects.get(student=self.other)
+
+    async def read(self, content, count):
+        """Read `count` events as `(kind, id)`, skipping keep-alive."""
+
+        events = []
+        while len(events) < count:
+            chunk = (await asyncio.wait_for(anext(content), 5)).decode()
+            if chunk.startswith("id:"):
+                fields = dict(
+                    line.split(": ", 1) for line in chunk.strip().splitlines()
+                )
+                events.append((fields["event"], json.loads(fields["data"])["id"]))
+
+        return events
+
+    async def create(self, sheet):
+        return await models.Record.objects.acreate(
+            sheet=sheet,
+            progress={"type": "range", "start": 1, "end": 4},
+        )
+
+    async def test_student_stream(self):
+        record = await self.create(self.sheet)
+        await self.create(self.other_sheet)
+
+        response = await self.async_client.get(
+            f"/zindo/events/?student={self.student.pk}",
+            headers={"Last-Event-ID": "0"},
+        )
+        content = aiter(response.streaming_content)
+        self.assertEqual(await anext(content), b"retry: 3000\n\n")
+
+        # Resumed from the database
+        self.assertEqual(
+            await self.read(content, 1),
+            [("record.created", record.pk)],
+        )
+
+        # Pushed as they come, without events of other students
+        await self.create(self.other_sheet)
+        record.note = "메모"
+        await record.asave()
+        pk = record.pk
+        await record.adelete()
+        await self.async_client.patch(
+            f"/zindo/sheets/{self.sheet.pk}/",
+            {"is_finished": True},
+            content_type="application/json",
+        )
+
+        self.assertEqual(
+            await self.read(content, 3),
+            [
+                ("record.updated", pk),
+                ("record.deleted", pk),
+                ("sheet.finished", self.sheet.pk),
+            ],
+        )
+        await content.aclose()
+
+    async def test_start_from_now(self):
+        await self.create(self.sheet)
+
+        response = await self.async_client.get("/zindo/events/")
+        content = aiter(response.streaming_content)
+        await anext(content)
+
+        record = await self.create(self.other_sheet)
+        self.assertEqual(
+            await self.read(content, 1),
+            [("record.created", record.pk)],
+        )
+        await content.aclose()
+
+    async def test_poll_error(self):
+        failures = [DatabaseError("database is locked")]
+        original = models.Event.objects.filter
+
+        def filter(*args, **kwargs):
+            if failures:
+                raise failures.pop()
+            return original(*args, **kwargs)
+
+        response = await self.async_client.get("/zindo/events/")
+        content = aiter(response.streaming_content)
+        await anext(content)
+
+        with (
+            mock.patch.object(models.Event.objects, "filter", side_effect=filter),
+            self.assertLogs("zindo.events", "ERROR") as logs,
+        ):
+            reading = asyncio.create_task(self.read(content, 1))
+            await asyncio.sleep(0.05)
+
+            # Polling goes on after the failed round
+            record = await self.create(self.sheet)
+            self.assertEqual(
+                await asyncio.wait_for(reading, 5),
+                [("record.created", record.pk)],
+            )
+            await content.aclose()
+
+        self.assertIn("database is locked", logs.output[0])
+
+    async def test_invalid(self):
+        response = await self.async_client.get("/zindo/events/?student=abc")
+        self.assertEqual(response.status_code, 400)
+
+    def test_wsgi(self):
+        response = self.client.get("/zindo/events/")
+        self.assertEqual(response.status_code, 501)
+
+    def test_prune(self):
+        for sheet in [self.sheet, self.other_sheet]:
+            models.Record.objects.create(
+                sheet=sheet,
+                progress={"type": "range", "start": 1, "end": 4},
+            )
+        old = models.Event.objects.order_by("pk").first()
+        models.Event.objects.filter(pk=old.pk).update(
+            created_at=timezone.now() - datetime.timedelta(days=8)
+        )
+
+        stdout = io.StringIO()
+        call_command("prune_events", stdout=stdout)
+
+        self.assertEqual(stdout.getvalue(), "Deleted 1 events.\n")
+        self.assertFalse(models.Event.objects.filter(pk=old.pk).exists())
+        self.assertEqual(models.Event.objects.count(), 1)
+
+        call_command("prune_events", days=0, stdout=io.StringIO())
+        self.assertFalse(models.Event.objects.exists())
+
+
+class ProfileTestCase(APITestCase):
+    def test_profile(self):
+        student = populate(1, sheets=3, records=4)[0]
+        sheets = list(models.Sheet.objects.filter(student=student).order_by("pk"))
+
+        # Review of a finished book shares its textbook
+        models.Sheet.objects.filter(pk=sheets[0].pk).update(is_finished=True)
+        review = models.Sheet.objects.create(
+            student=student,
+            textbook=sheets[0].textbook,
+        )
+
+        response = self.client.get(f"/zindo/students/{student.pk}/profile/?records=2")
+        data = response.json()
+
+        self.assertEqual(data["student"]["id"], student.pk)
+        self.assertEqual(
+            [textbook["id"] for textbook in data["textbooks"]],
+            sorted({sheet.textbook_id for sheet in sheets}),
+        )
+        self.assertEqual(
+            [(sheet["id"], sheet["textbook"]) for sheet in data["sheets"]],
+            [(sheet.pk, sheet.textbook_id) for sheet in [*sheets, review]],
+        )
+
+        # Latest two records of each sheet, newest first
+        expected = []
+        for sheet in sheets:
+            expected += models.Record.objects.filter(sheet=sheet).order_by(
+                "-created_at"
+            )[:2]
+        self.assertEqual(
+            [(record["sheet"], record["id"]) for record in data["records"]],
+            [(record.sheet_id, record.pk) for record in expected],
+        )
+
+    def test_invalid_records(self):
+        student = populate(1)[0]
+
+        response = self.client.get(f"/zindo/students/{student.pk}/profile/?records=99")
+        self.assertEqual(response.status_code, 400)
+
+
+# Answer of Naver book search with a single book
+NAVER_BOOK = {
+    "items": [
+        {
+            "title": "쎈 수학 3-1",
+            "isbn": "9791100000001",
+            "image": "https://example.com/book.jpg",
+        }
+    ]
+}
+
+
+class TextBookSearchTestCase(TestCase):
+    def test_database(self):
+        textbook = models.TextBook.objects.create(
+            name="쎈 수학 3-1",
+            subject="수학",
+            isbn="9791100000001",
+        )
+
+        response = self.client.get("/zindo/textbooks/search/?isbn=9791100000001")
+        self.assertEqual(response.json()["id"], textbook.pk)
+
+    def test_upstream(self):
+        with (
+            StubServer(NAVER_BOOK) as stub,
+            override_settings(NAVER_BOOK_SEARCH_URL=stub.url),
+        ):
+            response = self.client.get("/zindo/textbooks/search/?isbn=9791100000001")
+
+        self.assertEqual(
+            response.json(),
+            {
+                "object": "textbook",
+                "id": None,
+                "name": "쎈 수학 3-1",
+                "subject": "수학",
+                "isbn": "9791100000001",
+                "image": "https://example.com/book.jpg",
+            },
+        )
+
+    def test_upstream_timeout(self):
+        with (
+            StubServer(NAVER_BOOK, delay=0.5) as stub,
+            override_settings(NAVER_BOOK_SEARCH_URL=stub.url, NAVER_TIMEOUT=0.05),
+        ):
+            response = self.client.get("/zindo/textbooks/search/?isbn=9791100000001")
+
+        self.assertEqual(response.json(), {})
+
+    async def test_concurrent_upstream(self):
+        with (
+            StubServer(NAVER_BOOK, delay=0.2) as stub,
+            override_settings(NAVER_BOOK_SEARCH_URL=stub.url),
+        ):
+            responses = await asyncio.gather(
+                *[
+                    self.async_client.get(f"/zindo/textbooks/search/?isbn={isbn}")
+                    for isbn in range(4)
+                ]
+            )
+
+        # Requests wait on the upstream together
+        self.assertEqual([response.status_code for response in responses], [200] * 4)
+        self.assertGreater(stub.max_active, 1)
+
+
+class TextBookTestCase(APITestCase):
+    def test_normalize_name(self):
+        self.assertEqual(
+            utils.normalize_name("쎈 수학 3-1"),
+            utils.normalize_name(" 쎈수학\u30003－1 "),
+        )
+        self.assertEqual(
+            utils.normalize_name("Bricks Reading"),
+            utils.normalize_name("ＢＲＩＣＫＳ reading"),
+        )
+
+    def test_manual_sheet_reuses_textbook(self):
+        student = populate(1, sheets=0, records=0)[0]
+        textbook = models.TextBook.objects.create(name="쎈 수학 3-1", subject="수학")
+
+        response = self.client.post(
+            "/zindo/sheets/",
+            {"student": student.pk, "name": "쎈수학 3-1", "subject": "수학"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["textbook_detail"]["id"], textbook.pk)
+
+    def test_duplicate_textbook(self):
+        models.TextBook.objects.create(name="쎈 수학 3-1", subject="수학")
+
+        response = self.client.post(
+            "/zindo/textbooks/",
+            {"name": "쎈수학 3-1", "subject": "수학"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_merge_duplicates(self):
+        student = populate(1, sheets=0, records=0)[0]
+        textbooks = models.TextBook.objects.bulk_create(
+            [
+                models.TextBook(name="쎈 수학 3-1", subject="수학"),
+                models.TextBook(name="기적의 계산법", subject="수학"),
+            ]
+        )
+        sheets = models.Sheet.objects.bulk_create(
+            [
+                models.Sheet(student=student, textbook=textbooks[0]),
+                models.Sheet(student=student, textbook=textbooks[1]),
+            ]
+        )
+
+        # Simulate duplicates created before the constraint
+        models.TextBook.objects.filter(pk=textbooks[1].pk).update(
+            name="쎈수학 3-1",
+            name_key="",
+        )
+
+        merged, removed = utils.merge_duplicate_textbooks(models.TextBook, models.Sheet)
+
+        self.assertEqual((merged, removed), (1, 1))
+        self.assertFalse(models.TextBook.objects.filter(pk=textbooks[1].pk).exists())
+        self.assertEqual(
+            list(
+                models.Sheet.objects.order_by("pk").values_list(
+                    "textbook", "is_finished"
+                )
+            ),
+            [(textbooks[0].pk, True), (textbooks[0].pk, False)],
+        )
+        self.assertEqual(sheets[1].pk, models.Sheet.objects.get(is_finished=False).pk)
+
+    def test_merge_command(self):
+        student = populate(1, sheets=0, records=0)[0]
+        textbooks = models.TextBook.objects.bulk_create(
+            [
+                models.TextBook(name="쎈 수학 3-1", subject="수학"),
+                models.TextBook(name="기적의 계산법", subject="수학"),
+            ]
+        )
+        models.Sheet.objects.bulk_create(
+            [
+                models.Sheet(student=student, textbook=textbooks[0]),
+                models.Sheet(student=student, textbook=textbooks[1]),
+            ]
+        )
+        models.TextBook.objects.filter(pk=textbooks[1].pk).update(
+            name="쎈수학 3-1",
+            name_key="",
+        )
+
+        stdout = io.StringIO()
+        call_command("merge_textbooks", dry_run=True, stdout=stdout)
+
+        self.assertEqual(
+            stdout.getvalue().splitlines(),
+            ["  [수학] 쎈 수학 3-1, 쎈수학 3-1", "Found 1 duplicate groups."],
+        )
+        self.assertEqual(models.TextBook.objects.count(), 2)
+
+        stdout = io.StringIO()
+        call_command("merge_textbooks", stdout=stdout)
+
+        self.assertEqual(
+            stdout.getvalue().splitlines(),
+            ["Merged 1 groups, removed 1 textbooks.", "Updated 0 name keys."],
+        )
+        self.assertEqual(
+            list(models.Sheet.objects.values_list("textbook", flat=True).distinct()),
+            [textbooks[0].pk],
+        )
+
+
+class SeedTestCase(TestCase):
+    def seed(self, **options):
+        call_command(
+            "seed",
+            flush=True,
+            students=3,
+            sheets_per_student=4,
+            days=60,
+            stdout=io.StringIO(),
+            **options,
+        )
+
+    def rows(self):
+        return {
+            "students": list(
+                models.Student.objects.order_by("pk").values_list(
+                    "name", "admission_date", "is_active"
+                )
+            ),
+            "sheets": list(
+                models.Sheet.objects.order_by("pk").values_list(
+                    "student__name", "textbook__name", "pace", "is_finished"
+                )
+            ),
+            "records": list(
+                models.Record.objects.order_by("pk").values_list(
+                    "sheet__textbook__name", "created_at", "progress", "note"
+                )
+            ),
+        }
+
+    def test_deterministic(self):
+        self.seed(seed=3)
+        rows = self.rows()
+        self.assertTrue(rows["records"])
+
+        self.seed(seed=3)
+        self.assertEqual(self.rows(), rows)
+
+        self.seed(seed=4)
+        self.assertNotEqual(self.rows(), rows)
+
+    def test_matches_signals(self):
+        self.seed(seed=3)
+
+        fields = [
+            "record_count",
+            "pages_covered",
+            "last_progress_end",
+            "last_recorded_at",
+            "coverage",
+            "pace_date",
+            "behind_since",
+        ]
+        sheets = list(models.Sheet.objects.order_by("pk").values("pk", *fields))
+        averages = list(
+            models.Sheet.objects.order_by("pk").values_list("pace_average", flat=True)
+        )
+        activities = list(
+            models.DailyActivity.objects.order_by("sheet", "date").values(
+                "sheet", "student", "date", "record_count", "pages"
+            )
+        )
+
+        # Write the same records again, one by one through signals
+        records = list(models.Record.objects.order_by("created_at", "pk"))
+        with signals.untracked_deletes():
+            models.Record.objects.all().delete()
+        models.DailyActivity.objects.all().delete()
+        models.Sheet.objects.update(
+            record_count=0,
+            pages_covered=0,
+            last_progress_end=None,
+            last_recorded_at=None,
+            coverage=[],
+            pace_average=None,
+            pace_date=None,
+            behind_since=None,
+        )
+        for record in records:
+            models.Record.objects.create(
+                sheet_id=record.sheet_id,
+                created_at=record.created_at,
+                progress=record.progress,
+            )
+
+        self.assertEqual(
+            list(models.Sheet.objects.order_by("pk").values("pk", *fields)), sheets
+        )
+        for average, expected in zip(
+            models.Sheet.objects.order_by("pk").values_list("pace_average", flat=True),
+            averages,
+        ):
+            self.assertAlmostEqual(average, expected)
+        self.assertEqual(
+            list(
+                models.DailyActivity.objects.order_by("sheet", "date").values(
+                    "sheet", "student", "date", "record_count", "pages"
+                )
+            ),
+            activities,
+        )
+
+    def test_flush(self):
+        self.seed(seed=3)
+        tombstones = models.Tombstone.objects.count()
+
+        call_command("seed", flush=True, stdout=io.StringIO())
+
+        # Development resets leave no tombstones
+        self.assertEqual(models.Tombstone.objects.count(), tombstones)
+        self.assertEqual(models.Student.objects.count(), 5)
+        self.assertFalse(
+            models.DailyActivity.objects.exclude(
+                sheet__in=models.Sheet.objects.all()
+            ).exists()
+        )
+
+
+class BenchmarkTestCase(TestCase):
+    def benchmark(self, baseline=None, **options):
+        """Run benchmark on the test database, comparing with `baseline`."""
+
+        directory = pathlib.Path(self.enterContext(tempfile.TemporaryDirectory()))
+        if baseline is not None:
+            options["baseline"] = directory / "baseline.json"
+            options["baseline"].write_text(
+                json.dumps({"sizes": {"2": {"students.list": baseline}}})
+            )
+
+        stdout = io.StringIO()
+        with (
+            mock.patch.object(connection.creation, "create_test_db"),
+            mock.patch.object(connection.creation, "destroy_test_db"),
+            mock.patch.object(benchmark, "setup_test_environment"),
+            mock.patch.object(benchmark, "teardown_test_environment"),
+            # Datasets are generated in the test database, so drop each of them
+            transaction.atomic(),
+        ):
+            try:
+                call_command(
+                    "benchmark",
+                    sizes="2",
+                    days=30,
+                    iterations=1,
+                    only=["students.list"],
+                    output=directory / "results.json",
+                    stdout=stdout,
+                    **options,
+                )
+            finally:
+                transaction.set_rollback(True)
+
+        return stdout.getvalue(), json.loads((directory / "results.json").read_text())
+
+    def test_smoke(self):
+        output, results = self.benchmark()
+
+        self.assertIn("students.list", output)
+        self.assertEqual(
+            set(results["sizes"]["2"]),
+            {"students.list", "students.list.grade"},
+        )
+        self.assertEqual(
+            set(results["sizes"]["2"]["students.list"]),
+            {"p50", "p95", "queries", "bytes"},
+        )
+
+    def test_baseline(self):
+        output, _ = self.benchmark({"p95": 1e6, "queries": 100})
+        self.assertIn("No regressions", output)
+
+        # Slowdowns within `--min-delta` are noise
+        output, _ = self.benchmark({"p95": 1e-6, "queries": 100}, min_delta=1e6)
+        self.assertIn("No regressions", output)
+
+        with self.assertRaisesMessage(CommandError, "1 regression(s)"):
+            self.benchmark({"p95": 1e-6, "queries": 100}, min_delta=0)
+        with self.assertRaisesMessage(CommandError, "1 regression(s)"):
+            self.benchmark({"p95": 1e6, "queries": 0})
+
+
+class StartupTestCase(TestCase):
+    def boot(self, urls, framework):
+        """Fake output of a booted interpreter."""
+
+        return subprocess.CompletedProcess(
+            args=[],
+            returncode=0,
+            stdout=json.dumps({"settings": 1.0, "apps": 2.0, "urls": urls}),
+            stderr=(
+                "import time: self [us] | cumulative | imported package\n"
+                "import time:       100 |        100 |   django.utils\n"
+                "import time:       300 |        400 | django\n"
+                f"import time: {framework:>9} | {framework:>10} | rest_framework\n"
+            ),
+        )
+
+    def test_parse_import_times(self):
+        self.assertEqual(
+            startup.parse_import_times(self.boot(3.0, 1000).stderr),
+            {"django.utils": 100, "django": 300, "rest_framework": 1000},
+        )
+
+    def test_medians(self):
+        runs = [self.boot(3.0, 1000), self.boot(5.0, 2000), self.boot(30.0, 9000)]
+
+        stdout = io.StringIO()
+        with mock.patch.object(startup.subprocess, "run", side_effect=runs):
+            call_command("startup", repeat=3, stdout=stdout)
+        lines = [line.split() for line in stdout.getvalue().splitlines()]
+
+        self.assertIn(["urls", "5.0ms"], lines)
+        # Modules add up to their top-level package
+        self.assertIn(["rest_framework", "2.0ms", "83.3%"], lines)
+        self.assertIn(["django", "0.4ms", "16.7%"], lines)
+
+        stdout = io.StringIO()
+        runs = [self.boot(3.0, 1000)]
+        with mock.patch.object(startup.subprocess, "run", side_effect=runs):
+            call_command("startup", repeat=1, modules=True, stdout=stdout)
+        self.assertIn("django.utils", stdout.getvalue())
+
+    def test_failed_boot(self):
+        result = subprocess.CompletedProcess([], 1, stdout="", stderr="ImportError")
+
+        with mock.patch.object(startup.subprocess, "run", return_value=result):
+            with self.assertRaisesMessage(CommandError, "ImportError"):
+                call_command("startup", repeat=1, stdout=io.StringIO())
+
+
+class QueryCountTestCase(QueryCountMixin, APITestCase):
+    """Query counts of zindo endpoints must not grow with rows.
+
+    Every test starts with 10 records and grows them to 1,000.
+
+    """
+
+    def setUp(self):
+        self.student = populate(1)[0]
+        self.sheet = models.Sheet.objects.filter(student=self.student).first()
+        self.record = models.Record.objects.filter(sheet=self.sheet).first()
+        self.stats_batch = models.StatsBatch.objects.create(
+            title="통계",
+            student_ids=[self.student.pk],
+        )
+
+    def grow(self):
+        populate(100)
+        models.StatsBatch.objects.bulk_create(
+            [models.StatsBatch(title=f"통계 {index}") for index in range(100)]
+        )
+
+    def grow_uncached(self):
+        self.grow()
+        cache.clear()
+
+    def test_student_list(self):
+        self.assertConstantQueries("get", "/zindo/students/", self.grow)
+
+    def test_student_detail(self):
+        self.assertConstantQueries(
+            "get",
+            f"/zindo/students/{self.student.pk}/",
+            self.grow,
+        )
+
+    def test_student_attendance(self):
+        self.assertConstantQueries("get", "/zindo/students/attendance/", self.grow)
+
+    def test_student_grades(self):
+        self.assertConstantQueries("get", "/zindo/students/grades/", self.grow)
+
+    def test_student_profile(self):
+        self.assertConstantQueries(
+            "get",
+            f"/zindo/students/{self.student.pk}/profile/",
+            self.grow,
+        )
+
+    def test_student_create(self):
+        self.assertConstantQueries(
+            "post",
+            "/zindo/students/",
+            self.grow,
+            data={"name": "신입생", "admission_date": "2025-03-03"},
+            status=201,
+        )
+
+    def test_textbook_list(self):
+        self.assertConstantQueries("get", "/zindo/textbooks/", self.grow)
+
+    def test_textbook_detail(self):
+        self.assertConstantQueries(
+            "get",
+            f"/zindo/textbooks/{self.sheet.textbook_id}/",
+            self.grow,
+        )
+
+    def test_textbook_search(self):
+        models.TextBook.objects.filter(pk=self.sheet.textbook_id).update(
+            isbn="9791100000000"
+        )
+        self.assertConstantQueries(
+            "get",
+            "/zindo/textbooks/search/?isbn=9791100000000",
+            self.grow,
+        )
+
+    def test_sheet_list(self):
+        self.assertConstantQueries("get", "/zindo/sheets/", self.grow)
+
+    def test_sheet_list_by_student(self):
+        self.assertConstantQueries(
+            "get",
+            f"/zindo/sheets/?student__id={self.student.pk}",
+            self.grow,
+        )
+
+    def test_sheet_detail(self):
+        self.assertConstantQueries(
+            "get",
+            f"/zindo/sheets/{self.sheet.pk}/",
+            self.grow,
+        )
+
+    def test_sheet_timeline(self):
+        self.assertConstantQueries(
+            "get",
+            f"/zindo/sheets/{self.sheet.pk}/timeline/",
+            self.grow_uncached,
+        )
+
+    def test_student_timeline(self):
+        self.assertConstantQueries(
+            "get",
+            f"/zindo/students/{self.student.pk}/timeline/",
+            self.grow_uncached,
+        )
+
+    def test_sheet_coverage(self):
+        self.assertConstantQueries(
+            "get",
+            f"/zindo/sheets/{self.sheet.pk}/coverage/",
+            self.grow,
+        )
+
+    def test_student_coverage(self):
+        self.assertConstantQueries(
+            "get",
+            f"/zindo/students/{self.student.pk}/coverage/",
+            self.grow,
+        )
+
+    def test_sheet_create(self):
+        count = iter(range(10))
+
+        self.assertConstantQueries(
+            "post",
+            "/zindo/sheets/",
+            self.grow,
+            data=lambda: {
+                "student": self.student.pk,
+                "name": f"새 교재 {next(count)}",
+                "subject": "국어",
+                "pace": 3,
+            },
+            status=201,
+        )
+
+    def test_record_list(self):
+        self.assertConstantQueries("get", "/zindo/records/", self.grow)
+
+    def test_record_list_by_sheet(self):
+        self.assertConstantQueries(
+            "get",
+            f"/zindo/records/?sheet__id={self.sheet.pk}",
+            self.grow,
+        )
+
+    def test_record_list_by_date(self):
+        today = timezone.localdate()
+
+        self.assertConstantQueries(
+            "get",
+            f"/zindo/records/?created_at__date__gte={today}"
+            f"&created_at__date__lte={today}",
+            self.grow,
+        )
+
+    def test_record_detail(self):
+        self.assertConstantQueries(
+            "get",
+            f"/zindo/records/{self.record.pk}/",
+            self.grow,
+        )
+
+    def test_record_create(self):
+        self.assertConstantQueries(
+            "post",
+            "/zindo/records/",
+            self.grow,
+            data={
+                "sheet": self.sheet.pk,
+                "progress": {"type": "range", "start": 21, "end": 24},
+            },
+            status=201,
+        )
+
+    def test_activity_list(self):
+        self.assertConstantQueries(
+            "get",
+            f"/zindo/activities/?student__id={self.student.pk}",
+            self.grow,
+        )
+
+    def test_activity_analytics(self):
+        self.assertConstantQueries(
+            "get",
+            "/zindo/activities/analytics/?group_by=subject&group_by=grade"
+            "&group_by=week",
+            self.grow_uncached,
+        )
+
+    # Every section is listed in one page
+    @override_settings(SYNC_PAGE_SIZE=100_000)
+    def test_sync(self):
+        since = utils.encode_cursor(timezone.now() - datetime.timedelta(hours=1))
+        self.assertConstantQueries("get", f"/zindo/sync/?since={since}", self.grow)
+
+    def test_stats_batch_list(self):
+        self.assertConstantQueries("get", "/zindo/stats-batches/", self.grow)
+
+    def test_stats_batch_detail(self):
+        self.assertConstantQueries(
+            "get",
+            f"/zindo/stats-batches/{self.stats_batch.pk}/",
+            self.grow,
+        )
+
+    def test_stats_batch_create(self):
+        self.assertConstantQueries(
+            "post",
+            "/zindo/stats-batches/",
+            self.grow,
+            data={"title": "새 통계", "student_ids": [self.student.pk]},
+            status=201,
+        )
+
+
+class QueryPlanTestCase(QueryPlanMixin, APITestCase):
+    """Queries of zindo endpoints must not scan or sort large tables."""
+
+    query_plans = pathlib.Path(__file__).parent / "query_plans.json"
+
+    def setUp(self):
+        self.student, self.other = populate(3)[:2]
+        self.sheet = models.Sheet.objects.filter(student=self.student).first()
+        models.TextBook.objects.filter(pk=self.sheet.textbook_id).update(
+            isbn="9791100000000"
+        )
+
+    def test_student_list(self):
+        self.assertAcceptedPlans("students.list", "get", "/zindo/students/")
+
+    def test_student_list_ordering(self):
+        for ordering in ["name", "-name", "admission_date", "-admission_date"]:
+            self.assertAcceptedPlans(
+                f"students.list.ordering={ordering}",
+                "get",
+                f"/zindo/students/?ordering={ordering}",
+            )
+
+    def test_student_detail(self):
+        self.assertAcceptedPlans(
+            "students.detail",
+            "get",
+            f"/zindo/students/{self.student.pk}/",
+        )
+
+    def test_student_attendance(self):
+        self.assertAcceptedPlans(
+            "students.attendance",
+            "get",
+            "/zindo/students/attendance/",
+        )
+
+    def test_student_grade(self):
+        self.assertAcceptedPlans(
+            "students.list.grade",
+            "get",
+            "/zindo/students/?grade=2",
+        )
+        self.assertAcceptedPlans(
+            "students.list.ordering=grade",
+            "get",
+            "/zindo/students/?ordering=grade",
+        )
+        self.assertAcceptedPlans("students.grades", "get", "/zindo/students/grades/")
+
+    def test_student_profile(self):
+        self.assertAcceptedPlans(
+            "students.profile",
+            "get",
+            f"/zindo/students/{self.student.pk}/profile/",
+        )
+
+    def test_textbook_search(self):
+        self.assertAcceptedPlans(
+            "textbooks.search",
+            "get",
+            "/zindo/textbooks/search/?isbn=9791100000000",
+        )
+
+    def test_sheet_list(self):
+        self.assertAcceptedPlans("sheets.list", "get", "/zindo/sheets/")
+
+    def test_sheet_list_by_student(self):
+        self.assertAcceptedPlans(
+            "sheets.list.student",
+            "get",
+            f"/zindo/sheets/?student__id={self.student.pk}",
+        )
+
+    def test_timeline(self):
+        cache.clear()
+        self.assertAcceptedPlans(
+            "sheets.timeline",
+            "get",
+            f"/zindo/sheets/{self.sheet.pk}/timeline/",
+        )
+        self.assertAcceptedPlans(
+            "students.timeline",
+            "get",
+            f"/zindo/students/{self.student.pk}/timeline/",
+        )
+
+    def test_sheet_list_behind_schedule(self):
+        self.assertAcceptedPlans(
+            "sheets.list.behind_schedule",
+            "get",
+            "/zindo/sheets/?behind_schedule=true",
+        )
+
+    def test_coverage(self):
+        self.assertAcceptedPlans(
+            "students.coverage",
+            "get",
+            f"/zindo/students/{self.student.pk}/coverage/",
+        )
+
+    def test_sheet_list_by_activity(self):
+        self.assertAcceptedPlans(
+            "sheets.list.ordering=-last_recorded_at",
+            "get",
+            "/zindo/sheets/?ordering=-last_recorded_at",
+        )
+        self.assertAcceptedPlans(
+            "sheets.list.student.ordering=-last_recorded_at",
+            "get",
+            f"/zindo/sheets/?student__id={self.student.pk}&ordering=-last_recorded_at",
+        )
+
+    def test_sheet_create(self):
+        self.assertAcceptedPlans(
+            "sheets.create.isbn",
+            "post",
+            "/zindo/sheets/",
+            {"student": self.other.pk, "isbn": "9791100000000", "pace": 3},
+        )
+        self.assertAcceptedPlans(
+            "sheets.create.manual",
+            "post",
+            "/zindo/sheets/",
+            {"student": self.student.pk, "name": "새 교재", "subject": "국어"},
+        )
+
+    def test_record_list(self):
+        self.assertAcceptedPlans("records.list", "get", "/zindo/records/")
+
+    def test_record_list_by_sheet(self):
+        self.assertAcceptedPlans(
+            "records.list.sheet",
+            "get",
+            f"/zindo/records/?sheet__id={self.sheet.pk}",
+        )
+
+    def test_record_list_by_student(self):
+        self.assertAcceptedPlans(
+            "records.list.student",
+            "get",
+            f"/zindo/records/?sheet__student__id={self.student.pk}",
+        )
+
+    def test_record_list_by_date(self):
+        today = timezone.localdate()
+        start = today - datetime.timedelta(days=7)
+
+        self.assertAcceptedPlans(
+            "records.list.date",
+            "get",
+            f"/zindo/records/?created_at__date__gte={start}"
+            f"&created_at__date__lte={today}",
+        )
+        self.assertAcceptedPlans(
+            "records.list.student.date",
+            "get",
+            f"/zindo/records/?sheet__student__id={self.student.pk}"
+            f"&created_at__date__gte={start}&created_at__date__lte={today}",
+        )
+
+    def test_activity_list(self):
+        today = timezone.localdate()
+        start = today - datetime.timedelta(days=30)
+
+        self.assertAcceptedPlans(
+            "activities.list.student.date",
+            "get",
+            f"/zindo/activities/?student__id={self.student.pk}"
+            f"&date__gte={start}&date__lte={today}",
+        )
+        self.assertAcceptedPlans(
+            "activities.list.date",
+            "get",
+            f"/zindo/activities/?date__gte={start}&date__lte={today}",
+        )
+
+    def test_activity_analytics(self):
+        self.assertAcceptedPlans(
+            "activities.analytics",
+            "get",
+            "/zindo/activities/analytics/?group_by=subject&group_by=grade"
+            "&group_by=week",
+        )
+
+    def test_sync(self):
+        self.assertAcceptedPlans("sync", "get", "/zindo/sync/")
+
+        since = utils.encode_cursor(timezone.now())
+        self.assertAcceptedPlans("sync.since", "get", f"/zindo/sync/?since={since}")
+
+    def test_stats_batch_list(self):
+        self.assertAcceptedPlans("stats-batches.list", "get", "/zindo/stats-batches/")
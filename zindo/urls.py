@@ -1,6 +1,7 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 
-from . import viewsets
+from . import events, views, viewsets
 
 # Initialize default router
 router = DefaultRouter()
@@ -22,9 +23,24 @@ router.register(
     "records",
     viewsets.RecordViewSet,
 )
+router.register(
+    "activities",
+    viewsets.DailyActivityViewSet,
+)
 router.register(
     "stats-batches",
     viewsets.StatsBatchViewSet,
 )
+router.register(
+    "sync",
+    viewsets.SyncViewSet,
+    basename="sync",
+)
 
-urlpatterns = router.urls
+urlpatterns = [
+    # Server-sent events, served by ASGI only
+    path("events/", events.stream),
+    # Async, and ahead of the textbook detail route
+    path("textbooks/search/", views.search_textbook),
+    *router.urls,
+]
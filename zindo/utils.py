@@ -1,9 +1,878 @@
-import environ
-import requests
+import collections
+import datetime
+import math
+import re
+import unicodedata
+
 from django.conf import settings
+from django.db import transaction
+from django.db.models import (
+    Case,
+    CharField,
+    Count,
+    DateField,
+    ExpressionWrapper,
+    F,
+    Func,
+    IntegerField,
+    Max,
+    Min,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.fields.json import KT
+from django.db.models.functions import Cast, Coalesce, ExtractYear, Trunc, TruncDate
+from django.db.models.lookups import Exact, GreaterThanOrEqual
+from django.utils import timezone
+
+# Weight of each new day in pace average, about two weeks of span
+PACE_SMOOTHING = 2 / (14 + 1)
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.UTC)
+
+# School year begins on March 1, so grades move on then
+SCHOOL_YEAR_MONTH = 3
+
+
+def add_days(date, days):
+    """Add days to date, clamped to the range of `datetime.date`."""
+
+    try:
+        return date + datetime.timedelta(days=days)
+    except OverflowError:
+        return datetime.date.max if days > 0 else datetime.date.min
+
+
+def local_day_bounds(date):
+    """Get aware datetimes where given local date starts and ends.
+
+    Filtering `created_at` with these bounds, instead of `created_at__date`,
+    keeps the lookup a plain range that indexes can serve.
+
+    """
+
+    start = datetime.datetime.combine(
+        date,
+        datetime.time.min,
+        tzinfo=timezone.get_current_timezone(),
+    )
+    end = datetime.datetime.combine(
+        date + datetime.timedelta(days=1),
+        datetime.time.min,
+        tzinfo=timezone.get_current_timezone(),
+    )
+
+    return start, end
+
+
+def touch():
+    """Get change of `updated_at` for queryset updates, which skip `auto_now`."""
+
+    return {"updated_at": timezone.now()}
+
+
+def encode_cursor(moment):
+    """Encode aware datetime as sync cursor, in microseconds since epoch."""
+
+    return (moment - EPOCH) // datetime.timedelta(microseconds=1)
+
+
+def decode_cursor(cursor):
+    return EPOCH + datetime.timedelta(microseconds=cursor)
+
+
+def encode_page(cursor, since, section, after):
+    """Encode position of paged sync as dotted cursors and primary key.
+
+    `after` is the moment and primary key of the last row listed
+    from `section`, or None to start from its first row.
+
+    """
+
+    moment, pk = after or (None, None)
+    parts = [
+        encode_cursor(cursor),
+        "" if since is None else encode_cursor(since),
+        section,
+        "" if moment is None else encode_cursor(moment),
+        "" if pk is None else pk,
+    ]
+
+    return ".".join(str(part) for part in parts)
+
+
+def decode_page(page):
+    """Decode position of paged sync, see `encode_page()`."""
+
+    cursor, since, section, moment, pk = page.split(".")
+
+    return {
+        "cursor": decode_cursor(int(cursor)),
+        "since": decode_cursor(int(since)) if since else None,
+        "section": int(section),
+        "after": (decode_cursor(int(moment)), int(pk)) if moment or pk else None,
+    }
+
+
+def normalize_name(name):
+    """Get lookup key of textbook name.
+
+    Names are folded with NFKC, which also folds full-width characters
+    and composes Hangul jamo into syllables, then case-folded.
+    Whitespace is removed, since Korean spacing of titles is inconsistent
+    (e.g. `쎈 수학 3-1` and `쎈수학 3 - 1` share the same key).
+
+    """
+
+    name = unicodedata.normalize("NFKC", name).casefold()
+
+    return re.sub(r"\s+", "", name)
+
+
+def update_textbook_keys(textbook_model, batch_size=1000):
+    """Fill `name_key` of textbooks whose key is outdated, in batches.
+
+    Model is given as argument, so migrations can pass historical model.
+    Duplicates must be merged first, or new keys may violate the constraint.
+    Returns the number of updated textbooks.
+
+    """
+
+    updated = 0
+    textbooks = textbook_model.objects.only("pk", "name", "name_key").order_by("pk")
+
+    batch = []
+    for textbook in textbooks.iterator(chunk_size=batch_size):
+        if textbook.name_key != (key := normalize_name(textbook.name)):
+            textbook.name_key = key
+            batch.append(textbook)
+
+        if len(batch) >= batch_size:
+            textbook_model.objects.bulk_update(batch, ["name_key"])
+            updated += len(batch)
+            batch = []
+
+    textbook_model.objects.bulk_update(batch, ["name_key"])
+
+    return updated + len(batch)
+
+
+def find_duplicate_textbooks(textbook_model):
+    """Group manual textbooks by subject and normalized name.
+
+    Keys are computed here rather than read from `name_key`,
+    so groups are found even when stored keys are outdated.
+    Returns lists of primary keys, oldest first, for groups of two or more.
+
+    """
+
+    groups = collections.defaultdict(list)
+    textbooks = (
+        textbook_model.objects.filter(isbn__isnull=True)
+        .order_by("pk")
+        .values_list("pk", "subject", "name")
+    )
+    for pk, subject, name in textbooks.iterator():
+        groups[(subject, normalize_name(name))].append(pk)
+
+    return [pks for pks in groups.values() if len(pks) > 1]
+
+
+def merge_duplicate_textbooks(textbook_model, sheet_model, batch_size=100):
+    """Merge manual textbooks sharing the same subject and normalized name.
+
+    The oldest textbook of each group is kept, and sheets of the others
+    are repointed to it in bulk. If a student had active sheets on several
+    textbooks of a group, only the latest one stays active.
+
+    Each batch of `batch_size` groups is merged in its own transaction,
+    so the write lock on SQLite is held shortly.
+    Returns the number of merged groups and removed textbooks.
+
+    """
+
+    groups = find_duplicate_textbooks(textbook_model)
+    removed = 0
+
+    for index in range(0, len(groups), batch_size):
+        with transaction.atomic():
+            for canonical, *duplicates in groups[index : index + batch_size]:
+                textbooks = [canonical, *duplicates]
+
+                # Keep the latest active sheet for each student
+                conflicts = (
+                    sheet_model.objects.filter(
+                        textbook__in=textbooks,
+                        is_finished=False,
+                    )
+                    .values("student")
+                    .annotate(count=Count("pk"), latest=Max("pk"))
+                    .filter(count__gt=1)
+                )
+                for conflict in conflicts:
+                    sheet_model.objects.filter(
+                        student=conflict["student"],
+                        textbook__in=textbooks,
+                        is_finished=False,
+                    ).exclude(pk=conflict["latest"]).update(
+                        is_finished=True,
+                        **touch(),
+                    )
+
+                sheet_model.objects.filter(textbook__in=duplicates).update(
+                    textbook=canonical,
+                    **touch(),
+                )
+                textbook_model.objects.filter(pk__in=duplicates).delete()
+                removed += len(duplicates)
+
+    return len(groups), removed
+
+
+def parse_range(progress):
+    """Get `(start, end)` pages of range progress, or None for others.
+
+    A range has integer pages, not booleans or strings, from page 1,
+    and `range_condition()` applies the same rule in SQL.
+
+    """
+
+    if not isinstance(progress, dict) or progress.get("type") != "range":
+        return None
+
+    start, end = progress.get("start"), progress.get("end")
+    if type(start) is not int or type(end) is not int or not 1 <= start <= end:
+        return None
+
+    return start, end
+
+
+class JSONType(Func):
+    """SQLite `JSON_TYPE()` of a key of JSON field, such as "integer"."""
+
+    function = "JSON_TYPE"
+    output_field = CharField()
+
+    def __init__(self, field, key):
+        super().__init__(field, Value(f"$.{key}"))
+
+
+def range_condition():
+    """Build SQL condition of `parse_range()` accepting record rows."""
+
+    start = Cast(KT("progress__start"), IntegerField())
+    end = Cast(KT("progress__end"), IntegerField())
+
+    return Q(
+        Exact(JSONType("progress", "start"), "integer"),
+        Exact(JSONType("progress", "end"), "integer"),
+        GreaterThanOrEqual(start, 1),
+        GreaterThanOrEqual(end, start),
+        progress__type="range",
+    )
+
+
+def count_pages(progress):
+    """Get number of pages covered by a progress, counting both ends."""
+
+    if (pages := parse_range(progress)) is None:
+        return 0
+
+    return pages[1] - pages[0] + 1
+
+
+def count_pages_expression():
+    """Build SQL expression of `count_pages()` over record rows."""
+
+    start = Cast(KT("progress__start"), IntegerField())
+    end = Cast(KT("progress__end"), IntegerField())
+
+    return Case(
+        When(range_condition(), then=end - start + 1),
+        default=Value(0),
+    )
+
+
+def latest_record_fields(record_model):
+    """Build summary fields of sheets taken from their latest record.
+
+    Returned expressions are correlated to the sheet being updated,
+    and are served by `record_sheet_created_idx`.
+
+    """
+
+    latest = record_model.objects.filter(sheet=OuterRef("pk")).order_by(
+        "-created_at",
+        "-pk",
+    )
+
+    return {
+        "last_recorded_at": Subquery(latest.values("created_at")[:1]),
+        "last_progress_end": Subquery(
+            latest.filter(range_condition())
+            .annotate(end=Cast(KT("progress__end"), IntegerField()))
+            .values("end")[:1]
+        ),
+    }
+
+
+def sheet_batches(sheet_model, batch_size):
+    """Yield querysets of every sheet, `batch_size` sheets at a time."""
+
+    pks = list(sheet_model.objects.order_by("pk").values_list("pk", flat=True))
+
+    for index in range(0, len(pks), batch_size):
+        yield sheet_model.objects.filter(pk__in=pks[index : index + batch_size])
+
+
+def refresh_sheet_summaries(sheets, record_model):
+    """Recompute progress summary of given sheets from their records.
+
+    Summaries are maintained incrementally by signals of `Record`,
+    so this is only needed after bulk writes which skip signals.
+    Queryset and model are given as arguments,
+    so migrations can pass historical models.
+    Returns the number of updated sheets.
+
+    """
+
+    records = record_model.objects.filter(sheet=OuterRef("pk")).values("sheet")
+    latest = latest_record_fields(record_model)
+
+    return sheets.update(
+        **touch(),
+        record_count=Coalesce(
+            Subquery(records.annotate(count=Count("pk")).values("count")),
+            0,
+        ),
+        pages_covered=Coalesce(
+            Subquery(
+                records.annotate(pages=Sum(count_pages_expression())).values("pages")
+            ),
+            0,
+        ),
+        last_recorded_at=latest["last_recorded_at"],
+        # Latest record may not be a range, so take the latest range
+        last_progress_end=latest["last_progress_end"],
+    )
+
+
+def refresh_all_sheet_summaries(sheet_model, record_model, batch_size=1000):
+    """Recompute progress summary of every sheet, in batches.
+
+    Each batch is updated in its own transaction,
+    so the write lock on SQLite is held shortly.
+    Returns the number of updated sheets.
+
+    """
+
+    updated = 0
+    for sheets in sheet_batches(sheet_model, batch_size):
+        with transaction.atomic():
+            updated += refresh_sheet_summaries(sheets, record_model)
+
+    return updated
+
+
+def refresh_daily_activities(sheets, activity_model, record_model):
+    """Rebuild daily activity rollup of given sheets from their records.
+
+    Records are grouped by local date of `created_at`,
+    which converts timezone per row, so this is only meant for rebuilds.
+    Returns the number of created rollup rows.
+
+    """
+
+    activity_model.objects.filter(sheet__in=sheets).delete()
+
+    rows = (
+        record_model.objects.filter(sheet__in=sheets)
+        .annotate(date=TruncDate("created_at", tzinfo=timezone.get_current_timezone()))
+        .values("sheet", "sheet__student", "date")
+        .annotate(count=Count("pk"), pages=Sum(count_pages_expression()))
+        .order_by()
+    )
+
+    return len(
+        activity_model.objects.bulk_create(
+            activity_model(
+                date=row["date"],
+                student_id=row["sheet__student"],
+                sheet_id=row["sheet"],
+                record_count=row["count"],
+                pages=row["pages"],
+            )
+            for row in rows
+        )
+    )
+
+
+def refresh_all_daily_activities(
+    sheet_model, activity_model, record_model, batch_size=1000
+):
+    """Rebuild daily activity rollup of every sheet, in batches.
+
+    Returns the number of created rollup rows.
+
+    """
+
+    created = 0
+    for sheets in sheet_batches(sheet_model, batch_size):
+        with transaction.atomic():
+            created += refresh_daily_activities(sheets, activity_model, record_model)
+
+    return created
+
+
+def bucket_start(date, bucket):
+    """Get first date of `day`, `week` or `month` bucket containing date."""
+
+    if bucket == "week":
+        return date - datetime.timedelta(days=date.weekday())
+    if bucket == "month":
+        return date.replace(day=1)
+
+    return date
+
+
+def next_bucket(date, bucket):
+    """Get first date of the bucket following the one starting at date."""
 
-env = environ.Env()
-env.read_env(settings.BASE_DIR / ".env")
+    if bucket == "week":
+        return date + datetime.timedelta(days=7)
+    if bucket == "month":
+        return (date.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+
+    return date + datetime.timedelta(days=1)
+
+
+def count_buckets(start, end, bucket):
+    """Count `day`, `week` or `month` buckets overlapping range of dates."""
+
+    if bucket == "week":
+        return (bucket_start(end, bucket) - bucket_start(start, bucket)).days // 7 + 1
+    if bucket == "month":
+        return (end.year - start.year) * 12 + end.month - start.month + 1
+
+    return (end - start).days + 1
+
+
+def build_timelines(activity_model, sheets, start, end, bucket):
+    """Build progress series of sheets between two dates from daily activity.
+
+    Activities are grouped into buckets by the database, and every bucket
+    in range is listed, so charts need no gap filling.
+    Cumulative pages include pages before `start`, and target pages grow
+    by `pace` a day from the first activity of the sheet.
+    Returns series by primary key of sheet.
+
+    """
+
+    activities = activity_model.objects.filter(sheet__in=[sheet.pk for sheet in sheets])
+
+    totals = {
+        row["sheet"]: row
+        for row in activities.values("sheet")
+        .annotate(
+            first=Min("date"),
+            before=Coalesce(Sum("pages", filter=Q(date__lt=start)), 0),
+        )
+        .order_by()
+    }
+    buckets = {
+        (row["sheet"], row["bucket"]): row
+        for row in activities.filter(date__gte=start, date__lte=end)
+        .annotate(
+            bucket=F("date")
+            if bucket == "day"
+            else Trunc("date", bucket, output_field=DateField())
+        )
+        .values("sheet", "bucket")
+        .annotate(record_count=Sum("record_count"), pages=Sum("pages"))
+        .order_by()
+    }
+
+    timelines = {}
+    for sheet in sheets:
+        total = totals.get(sheet.pk, {"first": None, "before": 0})
+        cumulative = total["before"]
+        series = []
+
+        date = bucket_start(start, bucket)
+        while date <= end:
+            row = buckets.get((sheet.pk, date), {"record_count": 0, "pages": 0})
+            last = min(next_bucket(date, bucket) - datetime.timedelta(days=1), end)
+            cumulative += row["pages"]
+
+            target = None
+            if sheet.pace is not None and total["first"] is not None:
+                target = max((last - total["first"]).days + 1, 0) * sheet.pace
+
+            series.append(
+                {
+                    "date": date,
+                    "record_count": row["record_count"],
+                    "pages": row["pages"],
+                    "cumulative_pages": cumulative,
+                    "target_pages": target,
+                }
+            )
+            date = next_bucket(date, bucket)
+
+        timelines[sheet.pk] = series
+
+    return timelines
+
+
+def school_year(date):
+    return date.year if date.month >= SCHOOL_YEAR_MONTH else date.year - 1
+
+
+def get_grade(admission_date, today=None):
+    """Get grade of a student admitted on given date.
+
+    Grade is the number of school years since admission, counting
+    the first one, as of local date (Asia/Seoul) unless `today` is given.
+
+    """
+
+    today = today or timezone.localdate()
+
+    return school_year(today) - school_year(admission_date) + 1
+
+
+def grade_expression(field="admission_date", today=None):
+    """Build SQL expression of `get_grade()` over rows with `field`."""
+
+    today = today or timezone.localdate()
+
+    return ExpressionWrapper(
+        Value(school_year(today) + 1)
+        - ExtractYear(field)
+        + Case(
+            When(**{f"{field}__month__lt": SCHOOL_YEAR_MONTH}, then=Value(1)),
+            default=Value(0),
+        ),
+        output_field=IntegerField(),
+    )
+
+
+def grade_admission_range(grade, today=None):
+    """Get range of admission dates of given grade, end exclusive.
+
+    Returns None when the range falls outside of supported dates.
+
+    """
+
+    year = school_year(today or timezone.localdate()) - grade + 1
+    if not datetime.MINYEAR <= year < datetime.MAXYEAR:
+        return None
+
+    return (
+        datetime.date(year, SCHOOL_YEAR_MONTH, 1),
+        datetime.date(year + 1, SCHOOL_YEAR_MONTH, 1),
+    )
+
+
+def build_analytics(activity_model, start, end, group_by, measures):
+    """Aggregate daily activity between two dates by given dimensions.
+
+    Rows are grouped by the database in a single query.
+
+    """
+
+    columns = {
+        "subject": F("sheet__textbook__subject"),
+        "grade": grade_expression("student__admission_date"),
+        "week": Trunc("date", "week", output_field=DateField()),
+        "month": Trunc("date", "month", output_field=DateField()),
+        "is_finished": F("sheet__is_finished"),
+    }
+    aggregates = {
+        "record_count": Coalesce(Sum("record_count"), 0),
+        "pages": Coalesce(Sum("pages"), 0),
+        "active_students": Count("student", distinct=True),
+    }
+
+    activities = activity_model.objects.filter(date__gte=start, date__lte=end)
+    aggregates = {name: aggregates[name] for name in measures}
+
+    if not group_by:
+        return [activities.aggregate(**aggregates)]
+
+    return list(
+        activities.values(**{name: columns[name] for name in group_by})
+        .annotate(**aggregates)
+        .order_by(*group_by)
+    )
+
+
+def sweep_coverage(changes):
+    """Build coverage segments from counts changing at pages.
+
+    `changes` maps a page to how much the count changes from it.
+    Returns sorted `[start, end, count]` segments of positive count,
+    merging neighbors of the same count.
+
+    """
+
+    segments = []
+    count = 0
+    previous = None
+
+    for page in sorted(changes):
+        if previous is not None and count > 0:
+            if (
+                segments
+                and segments[-1][1] == previous - 1
+                and segments[-1][2] == count
+            ):
+                segments[-1][1] = page - 1
+            else:
+                segments.append([previous, page - 1, count])
+
+        count += changes[page]
+        previous = page
+
+    return segments
+
+
+def add_coverage(segments, start, end, delta=1):
+    """Add a range of pages into coverage segments.
+
+    Coverage is a list of disjoint `[start, end, count]` segments,
+    where count is the number of records covering the pages.
+    Removed records are added with `delta` of -1.
+    Sequential records merge into a single segment,
+    so the list stays as short as the number of skips and repeats.
+
+    """
+
+    changes = collections.Counter()
+    for segment_start, segment_end, count in segments:
+        changes[segment_start] += count
+        changes[segment_end + 1] -= count
+
+    changes[start] += delta
+    changes[end + 1] -= delta
+
+    return sweep_coverage(changes)
+
+
+def merge_segments(segments):
+    """Merge adjacent segments into `[start, end]` ranges, ignoring counts."""
+
+    ranges = []
+    for start, end, *_ in segments:
+        if ranges and ranges[-1][1] >= start - 1:
+            ranges[-1][1] = max(ranges[-1][1], end)
+        else:
+            ranges.append([start, end])
+
+    return ranges
+
+
+def describe_coverage(segments, total_pages=None):
+    """Describe coverage segments of a sheet for clients.
+
+    Uncovered ranges are gaps between page 1 and `total_pages`,
+    or the last covered page if total is unknown.
+
+    """
+
+    covered = merge_segments(segments)
+    last = total_pages or (covered[-1][1] if covered else 0)
+
+    uncovered = []
+    page = 1
+    for start, end in covered:
+        if start > page:
+            uncovered.append([page, min(start - 1, last)])
+        page = max(page, end + 1)
+        if page > last:
+            break
+    if page <= last:
+        uncovered.append([page, last])
+
+    covered_pages = sum(
+        max(min(end, last) - max(start, 1) + 1, 0) for start, end in covered
+    )
+
+    return {
+        "total_pages": total_pages,
+        "covered_pages": covered_pages,
+        "percent_complete": round(covered_pages / total_pages * 100, 1)
+        if total_pages
+        else None,
+        "covered": covered,
+        "uncovered": [item for item in uncovered if item[0] <= item[1]],
+        "repeated": merge_segments([segment for segment in segments if segment[2] > 1]),
+    }
+
+
+def refresh_sheet_coverages(sheets, record_model):
+    """Rebuild coverage segments of given sheets from their records.
+
+    Returns the number of updated sheets.
+
+    """
+
+    changes = {pk: collections.Counter() for pk in sheets.values_list("pk", flat=True)}
+
+    records = record_model.objects.filter(
+        sheet__in=list(changes),
+        progress__type="range",
+    ).values_list("sheet", "progress")
+    for sheet, progress in records.iterator():
+        if (pages := parse_range(progress)) is not None:
+            changes[sheet][pages[0]] += 1
+            changes[sheet][pages[1] + 1] -= 1
+
+    return sheets.model.objects.bulk_update(
+        [
+            sheets.model(pk=pk, coverage=sweep_coverage(counter))
+            for pk, counter in changes.items()
+        ],
+        ["coverage"],
+    )
+
+
+def refresh_all_sheet_coverages(sheet_model, record_model, batch_size=1000):
+    """Rebuild coverage segments of every sheet, in batches.
+
+    Returns the number of updated sheets.
+
+    """
+
+    updated = 0
+    for sheets in sheet_batches(sheet_model, batch_size):
+        with transaction.atomic():
+            updated += refresh_sheet_coverages(sheets, record_model)
+
+    return updated
+
+
+def encode_days(dates, start):
+    """Encode dates as hex bitmap, where bit `n` is the `n`th day from start."""
+
+    bits = 0
+    for date in dates:
+        bits |= 1 << (date - start).days
+
+    return format(bits, "x")
+
+
+def add_pace(average, pace_date, date, pages, prior=None):
+    """Add pages studied on a date into daily pace average.
+
+    Pace is an exponentially weighted moving average of pages per
+    calendar day, as of `pace_date`. Days without records count as zero,
+    and the average starts from `prior`, usually the target pace.
+    The average is linear in daily pages, so pages of past dates,
+    or removed ones as negative, are added by their decayed weight,
+    without replaying history.
+    Returns new average and its date.
+
+    """
+
+    decay = 1 - PACE_SMOOTHING
+
+    if pace_date is None:
+        return (prior or 0) * decay + PACE_SMOOTHING * pages, date
+
+    if date > pace_date:
+        average *= decay ** (date - pace_date).days
+        return average + PACE_SMOOTHING * pages, date
+
+    return average + PACE_SMOOTHING * decay ** (
+        pace_date - date
+    ).days * pages, pace_date
+
+
+def current_pace(average, pace_date, date):
+    """Get pace average decayed by days without records until date."""
+
+    if average is None:
+        return None
+
+    days = max((date - pace_date).days, 0)
+
+    return max(average * (1 - PACE_SMOOTHING) ** days, 0)
+
+
+def get_behind_since(average, pace_date, pace):
+    """Get date from which decayed pace average falls below target pace.
+
+    Storing this date lets "behind schedule" be a plain date comparison.
+    Sheets without a positive target pace are never behind.
+
+    """
+
+    if average is None or pace is None or pace <= 0:
+        return None
+
+    if average < pace:
+        return pace_date
+
+    days = math.log(pace / average) / math.log(1 - PACE_SMOOTHING)
+
+    return pace_date + datetime.timedelta(days=math.floor(days) + 1)
+
+
+def refresh_sheet_forecasts(sheets, activity_model):
+    """Recompute pace average of given sheets from daily activity.
+
+    Returns the number of updated sheets.
+
+    """
+
+    paces = dict(sheets.values_list("pk", "pace"))
+    forecasts = {}
+
+    activities = (
+        activity_model.objects.filter(sheet__in=list(paces))
+        .order_by("sheet", "date")
+        .values_list("sheet", "date", "pages")
+    )
+    for sheet, date, pages in activities.iterator():
+        average, pace_date = forecasts.get(sheet, (None, None))
+        forecasts[sheet] = add_pace(average, pace_date, date, pages, paces[sheet])
+
+    objs = []
+    for pk, pace in paces.items():
+        average, pace_date = forecasts.get(pk, (None, None))
+        objs.append(
+            sheets.model(
+                pk=pk,
+                pace_average=average,
+                pace_date=pace_date,
+                behind_since=get_behind_since(average, pace_date, pace),
+            )
+        )
+
+    return sheets.model.objects.bulk_update(
+        objs,
+        ["pace_average", "pace_date", "behind_since"],
+    )
+
+
+def refresh_all_sheet_forecasts(sheet_model, activity_model, batch_size=1000):
+    """Recompute pace average of every sheet, in batches.
+
+    Returns the number of updated sheets.
+
+    """
+
+    updated = 0
+    for sheets in sheet_batches(sheet_model, batch_size):
+        with transaction.atomic():
+            updated += refresh_sheet_forecasts(sheets, activity_model)
+
+    return updated
 
 
 def get_subject(title):
@@ -46,16 +915,23 @@ def search_book(isbn):
 
     """
 
-    # Initialize url with headers
-    url = "https://openapi.naver.com/v1/search/book.json"
+    # Imported here, as few requests need it and it is slow to import
+    import requests
+
+    # Initialize headers, missing keys are refused by the API
     headers = {
-        "X-Naver-Client-Id": env("NAVER_CLIENT_ID"),
-        "X-Naver-Client-Secret": env("NAVER_CLIENT_SECRET"),
+        "X-Naver-Client-Id": settings.NAVER_CLIENT_ID,
+        "X-Naver-Client-Secret": settings.NAVER_CLIENT_SECRET,
     }
 
     # Run requests to get response, then fetch search results
     try:
-        response = requests.get(url, headers=headers, params={"query": isbn})
+        response = requests.get(
+            settings.NAVER_BOOK_SEARCH_URL,
+            headers=headers,
+            params={"query": isbn},
+            timeout=settings.NAVER_TIMEOUT,
+        )
         items = response.json().get("items", [])
 
     # Return empty dict if error occurred
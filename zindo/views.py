@@ -0,0 +1,22 @@
+from core.concurrency import offload, respond
+
+from . import models, serializers, utils
+
+
+async def search_textbook(request):
+    """Search textbook by isbn on database, then on Naver.
+
+    Async, so waiting on Naver holds no worker under ASGI.
+
+    """
+
+    # Get isbn and check if exists
+    if (isbn := request.GET.get("isbn")) is None:
+        return respond({})
+
+    # Filter textbook and check if exists
+    if textbook := await models.TextBook.objects.filter(isbn=isbn).afirst():
+        return respond(serializers.TextBookSerializer(textbook).data)
+
+    # If not, get book info externally
+    return respond(await offload(utils.search_book)(isbn))
@@ -1,7 +1,24 @@
+import datetime
+
 import django_filters
-from django.db.models import Count, Exists, OuterRef, Q
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import (
+    Count,
+    Exists,
+    F,
+    Max,
+    OuterRef,
+    Prefetch,
+    Q,
+    Subquery,
+    Window,
+)
+from django.db.models.functions import Coalesce, RowNumber
+from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from rest_framework import filters, viewsets
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import filters, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
@@ -10,110 +27,607 @@ from . import models, serializers, utils
 
 class RecordFilter(django_filters.FilterSet):
     created_at__date__gte = django_filters.DateFilter(
-        field_name="created_at__date",
-        lookup_expr="gte",
+        method="filter_created_at__date__gte",
     )
     created_at__date__lte = django_filters.DateFilter(
-        field_name="created_at__date",
-        lookup_expr="lte",
+        method="filter_created_at__date__lte",
     )
 
     class Meta:
         model = models.Record
         fields = ["sheet__id", "sheet__student__id"]
 
+    def filter_created_at__date__gte(self, queryset, name, value):
+        start, _ = utils.local_day_bounds(value)
+
+        return queryset.filter(created_at__gte=start)
+
+    def filter_created_at__date__lte(self, queryset, name, value):
+        _, end = utils.local_day_bounds(value)
+
+        return queryset.filter(created_at__lt=end)
+
+
+class SheetFilter(django_filters.FilterSet):
+    behind_schedule = django_filters.BooleanFilter(
+        method="filter_behind_schedule",
+    )
+
+    class Meta:
+        model = models.Sheet
+        fields = {
+            "student__id": ["exact"],
+            "is_finished": ["exact"],
+            "last_recorded_at": ["gte", "lte", "isnull"],
+        }
+
+    def filter_behind_schedule(self, queryset, name, value):
+        behind = Q(
+            is_finished=False,
+            behind_since__lte=timezone.localdate(),
+        )
+
+        return queryset.filter(behind if value else ~behind)
+
+
+def get_timeline(key, sheets, params):
+    """Get cached timelines of sheets, building them on miss.
+
+    `key` must change whenever any of the sheets is modified.
+
+    """
+
+    key = f"zindo:timeline:{key}:{params['start']}:{params['end']}:{params['bucket']}"
+
+    if (timelines := cache.get(key)) is None:
+        timelines = utils.build_timelines(models.DailyActivity, sheets, **params)
+        cache.set(key, timelines, settings.TIMELINE_CACHE_TIMEOUT)
+
+    return timelines
+
+
+def get_analytics(params):
+    """Get cached analytics, building them on miss.
+
+    Keys carry a version read from the database, so writes of any worker
+    expire them: writes of records and sheets stamp `Sheet.updated_at`,
+    and deletes of sheets leave tombstones. Keys also carry the date,
+    as grades move on with it.
+
+    """
+
+    updated = models.Sheet.objects.aggregate(updated=Max("updated_at"))["updated"]
+    deleted = models.Tombstone.objects.aggregate(deleted=Max("pk"))["deleted"]
+    version = f"{updated.timestamp() if updated else 0}:{deleted or 0}"
+    key = (
+        f"zindo:analytics:{version}:{timezone.localdate()}:"
+        f"{params['start']}:{params['end']}:"
+        f"{','.join(params['group_by'])}:{','.join(params['measures'])}"
+    )
+
+    if (rows := cache.get(key)) is None:
+        rows = utils.build_analytics(models.DailyActivity, **params)
+        cache.set(key, rows, settings.ANALYTICS_CACHE_TIMEOUT)
+
+    return rows
+
+
+class DailyActivityFilter(django_filters.FilterSet):
+    class Meta:
+        model = models.DailyActivity
+        fields = {
+            "student__id": ["exact", "in"],
+            "sheet__id": ["exact"],
+            "date": ["gte", "lte"],
+        }
+
+
+def annotate_students(students):
+    today = timezone.localdate()
+
+    # Counts are correlated subqueries rather than aggregates over joins,
+    # so the list needs no GROUP BY and can be ordered with an index
+    def count_sheets(*args, **kwargs):
+        return Coalesce(
+            Subquery(
+                models.Sheet.objects.filter(student=OuterRef("pk"))
+                .filter(*args, **kwargs)
+                .values("student")
+                .annotate(count=Count("pk"))
+                .values("count")
+            ),
+            0,
+        )
+
+    return students.annotate(
+        grade=utils.grade_expression(),
+        count_on_progress=count_sheets(
+            is_finished=False,
+        ),
+        count_recorded=count_sheets(
+            Exists(
+                models.DailyActivity.objects.filter(
+                    sheet=OuterRef("pk"),
+                    date=today,
+                )
+            ),
+            is_finished=False,
+        ),
+        count_finished=count_sheets(
+            is_finished=True,
+        ),
+    )
+
+
+def annotate_sheets(sheets):
+    return sheets.annotate(
+        is_recorded=Exists(
+            models.DailyActivity.objects.filter(
+                sheet=OuterRef("pk"),
+                date=timezone.localdate(),
+            )
+        )
+    )
+
+
+class StudentFilter(django_filters.FilterSet):
+    grade = django_filters.NumberFilter(
+        method="filter_grade",
+    )
+
+    class Meta:
+        model = models.Student
+        fields = ["is_active"]
+
+    def filter_grade(self, queryset, name, value):
+        # Range of admission dates is served by `student_admission_date_idx`
+        if (bounds := utils.grade_admission_range(int(value))) is None:
+            return queryset.none()
+
+        return queryset.filter(
+            admission_date__gte=bounds[0],
+            admission_date__lt=bounds[1],
+        )
+
+
+class GradeOrderingFilter(filters.OrderingFilter):
+    """Order by grade through admission date, which is indexed.
+
+    Grade only falls as admission date rises, so orders match,
+    and students of a grade are ordered by admission date.
+
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        terms = {"grade": "-admission_date", "-grade": "admission_date"}
+
+        return [terms.get(term, term) for term in ordering]
+
 
 class StudentViewSet(viewsets.ModelViewSet):
     queryset = models.Student.objects.all()
     serializer_class = serializers.StudentSerializer
-    filter_backends = [filters.OrderingFilter]
-    ordering_fields = ["name", "admission_date"]
+    filter_backends = [DjangoFilterBackend, GradeOrderingFilter]
+    filterset_class = StudentFilter
+    ordering_fields = ["name", "admission_date", "grade"]
     ordering = ["name"]
 
     def get_queryset(self):
-        today = timezone.localdate()
+        return annotate_students(super().get_queryset())
 
-        return (
-            super()
-            .get_queryset()
-            .annotate(
-                count_on_progress=Count(
-                    "sheet",
-                    filter=Q(
-                        sheet__is_finished=False,
-                    ),
-                    distinct=True,
-                ),
-                count_recorded=Count(
-                    "sheet",
-                    filter=Q(
-                        sheet__is_finished=False,
-                        sheet__record__created_at__date=today,
-                    ),
-                    distinct=True,
+    @action(methods=["get"], detail=False)
+    def grades(self, request):
+        """Number of students by grade, after filters."""
+
+        students = self.filter_queryset(models.Student.objects.all())
+
+        return Response(
+            {
+                "object": "grades",
+                "grades": list(
+                    students.values(grade=utils.grade_expression())
+                    .annotate(count=Count("pk"))
+                    .order_by("grade")
                 ),
-                count_finished=Count(
-                    "sheet",
-                    filter=Q(
-                        sheet__is_finished=True,
+            }
+        )
+
+    @action(methods=["get"], detail=False)
+    def attendance(self, request):
+        """Days with records of active students and their sheets.
+
+        Days are hex bitmaps, where bit `n` is set when there are records
+        on the `n`th day from `start`. Sheets are the active ones,
+        and finished ones recorded within the range.
+
+        """
+
+        params = serializers.AttendanceQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        start, end = params.validated_data["start"], params.validated_data["end"]
+        since, _ = utils.local_day_bounds(start)
+
+        students = models.Student.objects.filter(is_active=True).prefetch_related(
+            Prefetch(
+                "sheet_set",
+                queryset=models.Sheet.objects.filter(
+                    Q(is_finished=False) | Q(last_recorded_at__gte=since)
+                ).select_related("textbook"),
+            )
+        )
+
+        days = {}
+        activities = models.DailyActivity.objects.filter(
+            date__gte=start,
+            date__lte=end,
+            student__is_active=True,
+        ).values_list("sheet", "date")
+        for sheet, date in activities:
+            days.setdefault(sheet, []).append(date)
+
+        grid = []
+        for student in sorted(students, key=lambda student: (student.name, student.pk)):
+            sheets = sorted(student.sheet_set.all(), key=lambda sheet: sheet.pk)
+            grid.append(
+                {
+                    "id": student.pk,
+                    "name": student.name,
+                    "days": utils.encode_days(
+                        [date for sheet in sheets for date in days.get(sheet.pk, [])],
+                        start,
                     ),
-                    distinct=True,
-                ),
+                    "sheets": [
+                        {
+                            "id": sheet.pk,
+                            "textbook": sheet.textbook.name,
+                            "is_finished": sheet.is_finished,
+                            "days": utils.encode_days(days.get(sheet.pk, []), start),
+                        }
+                        for sheet in sheets
+                    ],
+                }
             )
+
+        return Response(
+            {
+                "object": "attendance",
+                "start": start,
+                "end": end,
+                "days": (end - start).days + 1,
+                "students": grid,
+            }
         )
 
+    @action(methods=["get"], detail=True)
+    def profile(self, request, pk=None):
+        """Student with every sheet, their textbooks and latest records.
 
-class TextBookViewSet(viewsets.ModelViewSet):
-    queryset = models.TextBook.objects.all()
-    serializer_class = serializers.TextBookSerializer
+        Textbooks are listed once and referred to by id from sheets,
+        and records refer to sheets by id.
+        Latest `records` records of each sheet are ranked by a window
+        function, so the document takes a constant number of queries.
 
-    @action(methods=["get"], detail=False)
-    def search(self, *args, **kwargs):
-        # Get isbn and check if exists
-        if (isbn := self.request.query_params.get("isbn", None)) is None:
-            return Response({})
+        """
 
-        # Filter textbook and check if exists
-        if (queryset := self.queryset.filter(isbn=isbn)).exists():
-            serializer = serializers.TextBookSerializer(queryset.first())
+        student = self.get_object()
+        params = serializers.ProfileQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
 
-            return Response(serializer.data)
+        sheets = list(
+            annotate_sheets(
+                models.Sheet.objects.filter(student=student)
+                .select_related("textbook")
+                .defer("coverage")
+            ).order_by("pk")
+        )
+        textbooks = sorted(
+            {sheet.textbook_id: sheet.textbook for sheet in sheets}.values(),
+            key=lambda textbook: textbook.pk,
+        )
+        records = (
+            models.Record.objects.filter(sheet__student=student)
+            .annotate(
+                rank=Window(
+                    RowNumber(),
+                    partition_by=F("sheet"),
+                    order_by=[F("created_at").desc(), F("pk").desc()],
+                )
+            )
+            .filter(rank__lte=params.validated_data["records"])
+            .order_by("sheet", "rank")
+        )
 
-        # If not, get book info externally
-        else:
-            data = utils.search_book(isbn)
+        return Response(
+            {
+                "object": "profile",
+                "student": serializers.StudentSerializer(student).data,
+                "textbooks": serializers.TextBookSerializer(textbooks, many=True).data,
+                "sheets": serializers.CompactSheetSerializer(sheets, many=True).data,
+                "records": serializers.CompactRecordSerializer(records, many=True).data,
+            }
+        )
 
-            return Response(data)
+    @action(methods=["get"], detail=True)
+    def coverage(self, request, pk=None):
+        """Coverage of every sheet of the student, from stored segments."""
+
+        student = get_object_or_404(models.Student, pk=pk)
+        sheets = (
+            models.Sheet.objects.filter(student=student)
+            .select_related("textbook")
+            .order_by("pk")
+        )
+
+        return Response(
+            {
+                "object": "coverage",
+                "student": student.pk,
+                "sheets": [
+                    {
+                        "sheet": sheet.pk,
+                        "textbook": sheet.textbook.name,
+                        "is_finished": sheet.is_finished,
+                        **utils.describe_coverage(
+                            sheet.coverage,
+                            sheet.textbook.total_pages,
+                        ),
+                    }
+                    for sheet in sheets
+                ],
+            }
+        )
+
+    @action(methods=["get"], detail=True)
+    def timeline(self, request, pk=None):
+        student = self.get_object()
+        params = serializers.TimelineQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+
+        sheets = list(
+            models.Sheet.objects.filter(student=student)
+            .select_related("textbook")
+            .order_by("pk")
+        )
+        version = max((sheet.updated_at.timestamp() for sheet in sheets), default=0)
+        timelines = get_timeline(
+            f"student:{student.pk}:{len(sheets)}:{version}",
+            sheets,
+            params.validated_data,
+        )
+
+        return Response(
+            {
+                "object": "timeline",
+                "student": student.pk,
+                **params.validated_data,
+                "sheets": [
+                    {
+                        "sheet": sheet.pk,
+                        "textbook": sheet.textbook.name,
+                        "pace": sheet.pace,
+                        "is_finished": sheet.is_finished,
+                        "series": timelines[sheet.pk],
+                    }
+                    for sheet in sheets
+                ],
+            }
+        )
+
+
+class TextBookViewSet(viewsets.ModelViewSet):
+    """Textbooks, searched by isbn with `views.search_textbook`."""
+
+    queryset = models.TextBook.objects.all()
+    serializer_class = serializers.TextBookSerializer
 
 
 class SheetViewSet(viewsets.ModelViewSet):
-    queryset = models.Sheet.objects.all()
+    # Coverage is read by its own action only
+    queryset = models.Sheet.objects.select_related("student", "textbook").defer(
+        "coverage"
+    )
     serializer_class = serializers.SheetSerializer
-    filterset_fields = ["student__id"]
+    filter_backends = [
+        DjangoFilterBackend,
+        filters.OrderingFilter,
+    ]
+    filterset_class = SheetFilter
+    ordering_fields = ["last_recorded_at", "record_count", "pages_covered"]
 
     def get_queryset(self):
-        today = timezone.localdate()
+        return annotate_sheets(super().get_queryset())
 
-        return (
-            super()
-            .get_queryset()
-            .annotate(
-                is_recorded=Exists(
-                    models.Record.objects.filter(
-                        sheet=OuterRef("pk"),
-                        created_at__date=today,
-                    )
-                )
-            )
+    @action(methods=["get"], detail=True)
+    def timeline(self, request, pk=None):
+        sheet = self.get_object()
+        params = serializers.TimelineQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+
+        timelines = get_timeline(
+            f"sheet:{sheet.pk}:{sheet.updated_at.timestamp()}",
+            [sheet],
+            params.validated_data,
+        )
+
+        return Response(
+            {
+                "object": "timeline",
+                "sheet": sheet.pk,
+                **params.validated_data,
+                "pace": sheet.pace,
+                "series": timelines[sheet.pk],
+            }
+        )
+
+    @action(methods=["get"], detail=True)
+    def coverage(self, request, pk=None):
+        sheet = get_object_or_404(
+            models.Sheet.objects.select_related("textbook"), pk=pk
+        )
+
+        return Response(
+            {
+                "object": "coverage",
+                "sheet": sheet.pk,
+                **utils.describe_coverage(sheet.coverage, sheet.textbook.total_pages),
+            }
         )
 
 
 class RecordViewSet(viewsets.ModelViewSet):
-    queryset = models.Record.objects.all().order_by("-created_at")
+    queryset = (
+        models.Record.objects.select_related(
+            "sheet__student",
+            "sheet__textbook",
+        )
+        .defer("sheet__coverage")
+        .order_by("-created_at")
+    )
     serializer_class = serializers.RecordSerializer
     filterset_class = RecordFilter
 
 
+class DailyActivityViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = models.DailyActivity.objects.order_by("date", "pk")
+    serializer_class = serializers.DailyActivitySerializer
+    filterset_class = DailyActivityFilter
+
+    @action(methods=["get"], detail=False)
+    def analytics(self, request):
+        """Academy-wide measures of activity grouped by dimensions.
+
+        Dimensions are `subject`, `grade`, `week`, `month` and
+        `is_finished`, and measures are `record_count`, `pages` and
+        `active_students`, over local dates between `start` and `end`.
+
+        """
+
+        params = serializers.AnalyticsQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+
+        return Response(
+            {
+                "object": "analytics",
+                **params.validated_data,
+                "rows": get_analytics(params.validated_data),
+            }
+        )
+
+
 class StatsBatchViewSet(viewsets.ModelViewSet):
     queryset = models.StatsBatch.objects.all().order_by("-created_at")
     serializer_class = serializers.StatsBatchSerializer
+
+
+class SyncViewSet(viewsets.ViewSet):
+    """Students, textbooks, sheets and records changed since a cursor.
+
+    Every row is listed without `since`. `cursor` of a response is
+    passed as `since` of the next request, which lists rows created
+    or updated since then, and `deleted` rows from tombstones.
+    Sheets and records refer to students, textbooks and sheets by id.
+
+    Responses list at most `SYNC_PAGE_SIZE` rows. While `next` is set,
+    request it as `page` to continue, and keep `cursor` for later.
+    Tombstones are kept for `TOMBSTONE_RETENTION_DAYS`, so older
+    cursors answer 410, and clients sync again without `since`.
+
+    """
+
+    # Listed in this order, each in order of its `field`
+    sections = [
+        (
+            "students",
+            models.Student.objects.all(),
+            "updated_at",
+            serializers.SyncStudentSerializer,
+        ),
+        (
+            "textbooks",
+            models.TextBook.objects.all(),
+            "updated_at",
+            serializers.TextBookSerializer,
+        ),
+        (
+            "sheets",
+            models.Sheet.objects.defer("coverage"),
+            "updated_at",
+            serializers.SyncSheetSerializer,
+        ),
+        (
+            "records",
+            models.Record.objects.all(),
+            "updated_at",
+            serializers.CompactRecordSerializer,
+        ),
+        (
+            "deleted",
+            models.Tombstone.objects.all(),
+            "deleted_at",
+            serializers.TombstoneSerializer,
+        ),
+    ]
+
+    def list(self, request):
+        params = serializers.SyncQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        page = params.validated_data
+        cursor, since = page["cursor"], page["since"]
+
+        if since is not None:
+            retention = datetime.timedelta(days=settings.TOMBSTONE_RETENTION_DAYS)
+            if since < timezone.now() - retention:
+                return Response(
+                    {"detail": "Cursor is too old, sync again without `since`."},
+                    status=status.HTTP_410_GONE,
+                )
+
+        data = {"object": "sync", "cursor": utils.encode_cursor(cursor), "next": None}
+        remaining = settings.SYNC_PAGE_SIZE
+
+        for index, (name, queryset, field, serializer_class) in enumerate(
+            self.sections
+        ):
+            rows = []
+
+            # Sections before the page are done, and a full sync has no deletes
+            done = index < page["section"] or data["next"] is not None
+            if not done and not (name == "deleted" and since is None):
+                if remaining == 0:
+                    data["next"] = utils.encode_page(cursor, since, index, None)
+                else:
+                    rows = self.changed(
+                        queryset,
+                        field,
+                        since,
+                        page["after"] if index == page["section"] else None,
+                        remaining + 1,
+                    )
+                    if len(rows) > remaining:
+                        rows = rows[:remaining]
+                        last = (getattr(rows[-1], field), rows[-1].pk)
+                        data["next"] = utils.encode_page(cursor, since, index, last)
+                    remaining -= len(rows)
+
+            data[name] = serializer_class(rows, many=True).data
+
+        return Response(data)
+
+    def changed(self, queryset, field, since, after, limit):
+        """List rows changed since a cursor, after a position in a page."""
+
+        # Served in order by the index on `field`, with primary key
+        queryset = queryset.all().order_by(field, "pk")
+
+        if since is not None:
+            since -= datetime.timedelta(seconds=settings.SYNC_OVERLAP)
+            queryset = queryset.filter(**{f"{field}__gte": since})
+
+        if after is not None:
+            moment, pk = after
+            queryset = queryset.filter(**{f"{field}__gte": moment}).exclude(
+                **{field: moment, "pk__lte": pk}
+            )
+
+        return list(queryset[:limit])